@@ -16,6 +16,7 @@ from .serializers import (
 from .utils import extract_text, extract_fields
 from .offer_pdf import generate_offer_letter_pdf
 from activitylog.utils import log_activity
+from login.tenant import resolve_admin_owner, tenant_config
 
 # ─────────────────────────────────────────────────────────────
 #  Tenant helpers
@@ -28,11 +29,7 @@ def _is_admin(user):
     )
 
 def _get_admin_owner(user):
-    if user.role == 'ADMIN' or getattr(user, 'is_admin_user', False):
-        return user if user.role == 'ADMIN' else user.admin_owner
-    if user.role == 'USER':
-        return user.admin_owner
-    return None
+    return resolve_admin_owner(user)
 
 def _pipeline_stage_qs(user):
     if user.role == 'SUPER_ADMIN':
@@ -55,7 +52,7 @@ def _company_settings_dict(user):
     if admin is None:
         return {}
 
-    settings_obj = CompanySettings.objects.filter(owner=admin).first()
+    settings_obj = tenant_config(admin).company_settings
     if not settings_obj:
         return {
             "name": admin.company_name or "Company",
@@ -83,10 +83,10 @@ class UserWithAccessSerializer(serializers.ModelSerializer):
         return None
 
     def get_employee_profile_image(self, obj):
-        """Return the linked employee's profile photo (R2) matched by email."""
+        """Return the linked employee's profile photo (R2) via Employee.user."""
         try:
-            from employee_management.models import Employee
-            employee = Employee.objects.filter(email=obj.email).first()
+            from employee_management.identity import employee_for_user
+            employee = employee_for_user(obj)
             if employee and employee.profile_image:
                 return employee.profile_image.url
         except Exception:
@@ -12,6 +12,7 @@ from .serializers import (
     BulkMenuAccessSerializer
 )
 from activitylog.utils import log_activity
+from login.tenant import resolve_admin_owner
 
 User = get_user_model()
 
@@ -24,11 +25,7 @@ def _get_admin_owner(user):
     """
     Return the ADMIN who owns the current request's tenant scope.
     """
-    if getattr(user, 'role', None) == 'ADMIN' or getattr(user, 'is_admin_user', False):
-        return user if user.role == 'ADMIN' else user.admin_owner
-    if getattr(user, 'role', None) == 'USER' and hasattr(user, 'admin_owner'):
-        return user.admin_owner
-    return None
+    return resolve_admin_owner(user)
 
 class IsAdminOrSuperAdmin(permissions.BasePermission):
     """
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ActivityLog
+from .models import ActivityLog, ActivityLogArchive
 
 
 @admin.register(ActivityLog)
@@ -9,3 +9,9 @@ class ActivityLogAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'description', 'module')
     readonly_fields = ('created_at',)
 
+
+
+@admin.register(ActivityLogArchive)
+class ActivityLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('month', 'row_count', 'format', 'archived_at')
+    readonly_fields = ('month', 'storage_name', 'format', 'row_count', 'archived_at')
@@ -0,0 +1,217 @@
+# activitylog/archive.py
+"""
+Retention for the activity log: whole months past
+ACTIVITY_LOG_RETENTION_MONTHS are exported to a gzip-compressed JSON Lines
+(or CSV) file in the ACTIVITY_LOG_ARCHIVE_STORAGE storage, recorded as an
+ActivityLogArchive row, and removed from the table — on PostgreSQL by
+detaching and dropping the month's partition (partitions.py), elsewhere
+with a DELETE.
+
+    python manage.py archive_activity_logs [--retention-months N] [--format csv] [--dry-run]
+
+archived_months() and read_archive() serve the activity-log view's
+`archived` action, scoped to one tenant or user like the live log.  Archive
+files never change once written, so read_archive() caches a month's
+filtered rows for ACTIVITY_LOG_ARCHIVE_CACHE_SECONDS instead of downloading
+and parsing the whole file for every page.
+
+File names carry a random token: the default storage is a bucket with a
+public custom domain, so names must not be guessable.
+"""
+
+import csv
+import gzip
+import io
+import json
+import secrets
+import tempfile
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from . import partitions
+from .models import ActivityLog, ActivityLogArchive
+
+FIELDS = (
+    'id', 'user_id', 'admin_owner_id', 'action_type', 'module',
+    'description', 'ip_address', 'user_agent', 'created_at',
+)
+
+ARCHIVE_PREFIX = 'activity-log-archive/'
+
+
+def archive_storage():
+    return storages[getattr(settings, 'ACTIVITY_LOG_ARCHIVE_STORAGE', 'default')]
+
+
+def month_bounds(month):
+    """[start, end) of a UTC month as aware datetimes."""
+    start = datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(partitions.add_months(month, 1), time.min, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def _month_rows(month):
+    start, end = month_bounds(month)
+    return (
+        ActivityLog.objects
+        .filter(created_at__gte=start, created_at__lt=end)
+        .order_by('id')
+        .values_list(*FIELDS)
+        .iterator(chunk_size=2000)
+    )
+
+
+def _write_rows(text, rows, fmt, owners):
+    """Write rows to text; owners collects their {'admin_owner_ids', 'user_ids'}."""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(text)
+        writer.writerow(FIELDS)
+    for row in rows:
+        values = dict(zip(FIELDS, row))
+        values['created_at'] = values['created_at'].isoformat()
+        owners['admin_owner_ids'].add(values['admin_owner_id'])
+        owners['user_ids'].add(values['user_id'])
+        if fmt == 'csv':
+            writer.writerow([values[field] if values[field] is not None else '' for field in FIELDS])
+        else:
+            text.write(json.dumps(values) + '\n')
+        count += 1
+    return count
+
+
+def export_month(month, fmt='jsonl'):
+    """
+    Write the month's rows to a compressed file in the archive storage;
+    returns (name, rows, {'admin_owner_ids': [...], 'user_ids': [...]}).
+    """
+    owners = {'admin_owner_ids': set(), 'user_ids': set()}
+    with tempfile.TemporaryFile() as tmp:
+        with gzip.GzipFile(fileobj=tmp, mode='wb') as gz:
+            with io.TextIOWrapper(gz, encoding='utf-8', newline='') as text:
+                count = _write_rows(text, _month_rows(month), fmt, owners)
+        owners = {key: sorted(i for i in ids if i is not None) for key, ids in owners.items()}
+        if not count:
+            return None, 0, owners
+        tmp.seek(0)
+        name = f'{ARCHIVE_PREFIX}{month:%Y-%m}-{secrets.token_hex(8)}.{fmt}.gz'
+        return archive_storage().save(name, File(tmp, name=name)), count, owners
+
+
+def archive_month(month, fmt='jsonl'):
+    """
+    Export the month, then remove it from the table.  Returns the
+    ActivityLogArchive row, or None when the month had no rows (its empty
+    partition is still dropped).
+    """
+    month = partitions.month_start(month)
+    name, count, owners = export_month(month, fmt)
+
+    with transaction.atomic():
+        if month in partitions.partitions():
+            partitions.drop_partition(month)
+        # Rows of the month outside a partition (default partition, or an
+        # unpartitioned table).
+        start, end = month_bounds(month)
+        ActivityLog.objects.filter(created_at__gte=start, created_at__lt=end).delete()
+        if not count:
+            return None
+        # A month archived again (rows logged late) gets a second file.
+        return ActivityLogArchive.objects.create(
+            month=month, storage_name=name, format=fmt, row_count=count, **owners,
+        )
+
+
+def expired_months(retention_months, today):
+    """Months wholly older than the retention window that still have rows or a partition."""
+    cutoff = partitions.add_months(partitions.month_start(today), -retention_months)
+    start, _ = month_bounds(cutoff)
+    months = {
+        partitions.month_start(d)
+        for d in ActivityLog.objects.filter(created_at__lt=start).dates('created_at', 'month')
+    }
+    months.update(m for m in partitions.partitions() if m < cutoff)
+    return sorted(months)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# READ PATH
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _int_or_none(value):
+    return int(value) if value not in (None, '') else None
+
+
+def _read_rows(fh, fmt):
+    text = io.TextIOWrapper(gzip.GzipFile(fileobj=fh, mode='rb'), encoding='utf-8', newline='')
+    if fmt == 'csv':
+        for record in csv.DictReader(text):
+            for field in ('id', 'user_id', 'admin_owner_id'):
+                record[field] = _int_or_none(record[field])
+            record['ip_address'] = record['ip_address'] or None
+            yield record
+    else:
+        for line in text:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _in_scope(archive, admin_owner_id, user_id):
+    return (
+        (admin_owner_id is None or admin_owner_id in archive.admin_owner_ids)
+        and (user_id is None or user_id in archive.user_ids)
+    )
+
+
+def archived_months(admin_owner_id=None, user_id=None):
+    """The archived months holding rows of the tenant and/or user, newest first."""
+    archives = ActivityLogArchive.objects.only('month', 'admin_owner_ids', 'user_ids')
+    return sorted(
+        {a.month for a in archives if _in_scope(a, admin_owner_id, user_id)},
+        reverse=True,
+    )
+
+
+def read_archive(month, admin_owner_id=None, user_id=None):
+    """
+    The archived rows of a month (dicts keyed by FIELDS, created_at parsed),
+    newest first, limited to a tenant and/or user.  Cached per (month's
+    files, tenant, user); archiving the month again adds a file and so
+    changes the key.
+    """
+    archives = [
+        archive for archive in
+        ActivityLogArchive.objects.filter(month=partitions.month_start(month)).order_by('id')
+        if _in_scope(archive, admin_owner_id, user_id)
+    ]
+    if not archives:
+        return []
+    key = 'activitylog:archive:{}:{}:{}'.format(
+        '-'.join(str(archive.pk) for archive in archives), admin_owner_id, user_id,
+    )
+    rows = cache.get(key)
+    if rows is None:
+        rows = _load_rows(archives, admin_owner_id, user_id)
+        cache.set(key, rows, getattr(settings, 'ACTIVITY_LOG_ARCHIVE_CACHE_SECONDS', 600))
+    return rows
+
+
+def _load_rows(archives, admin_owner_id, user_id):
+    rows = []
+    for archive in archives:
+        with archive_storage().open(archive.storage_name, 'rb') as fh:
+            rows.extend(
+                row for row in _read_rows(fh, archive.format)
+                if (admin_owner_id is None or row['admin_owner_id'] == admin_owner_id)
+                and (user_id is None or row['user_id'] == user_id)
+            )
+    for row in rows:
+        row['created_at'] = parse_datetime(row['created_at'])
+    rows.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+    return rows
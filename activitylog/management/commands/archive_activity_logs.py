@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from activitylog import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Export whole months of activity log older than the retention period to '
+        'compressed files in storage, then drop them from the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-months', type=int,
+            default=getattr(settings, 'ACTIVITY_LOG_RETENTION_MONTHS', 24),
+            help='Months kept in the database, counting back from this month.',
+        )
+        parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months that would be archived.')
+
+    def handle(self, *args, **options):
+        if options['retention_months'] < 1:
+            raise CommandError('--retention-months must be at least 1.')
+
+        months = archive.expired_months(options['retention_months'], timezone.now().date())
+        if not months:
+            self.stdout.write('Nothing to archive.')
+            return
+
+        for month in months:
+            if options['dry_run']:
+                self.stdout.write(f'  would archive {month:%Y-%m}')
+                continue
+            record = archive.archive_month(month, options['format'])
+            if record is None:
+                self.stdout.write(f'  {month:%Y-%m}  empty, dropped')
+            else:
+                self.stdout.write(f'  {month:%Y-%m}  {record.row_count} row(s) -> {record.storage_name}')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Archived {len(months)} month(s).'))
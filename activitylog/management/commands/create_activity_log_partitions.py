@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from activitylog import partitions
+
+
+class Command(BaseCommand):
+    help = 'Create the monthly ActivityLog partitions from this month to --months-ahead months ahead (PostgreSQL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int,
+            default=getattr(settings, 'ACTIVITY_LOG_PARTITIONS_AHEAD', 3),
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError('The activity-log table is not partitioned (PostgreSQL only, migration 0008).')
+
+        first = partitions.month_start(timezone.now())
+        last = partitions.add_months(first, max(0, options['months_ahead']))
+        created = partitions.ensure_partitions(first, last)
+        for month in created:
+            self.stdout.write(f'  created {partitions.partition_name(month)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(created)} partition(s) created; covered through {last:%Y-%m}.'
+        ))
@@ -0,0 +1,37 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from activitylog import writer
+
+
+class Command(BaseCommand):
+    help = 'Insert the ActivityLog entries the buffered writer spooled to disk, then remove the spool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Spool file. Default: ACTIVITY_LOG_SPOOL_PATH.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path'] or getattr(settings, 'ACTIVITY_LOG_SPOOL_PATH', None)
+        if not path:
+            raise CommandError('No spool file: pass --path or set ACTIVITY_LOG_SPOOL_PATH.')
+        if not os.path.exists(path):
+            self.stdout.write('Spool is empty.')
+            return
+
+        # Move the file aside first so writers append to a fresh spool meanwhile.
+        replaying = f'{path}.replaying'
+        if not os.path.exists(replaying):
+            os.replace(path, replaying)
+
+        entries = writer.read_spool(replaying)
+        size = max(1, options['batch_size'])
+        written = sum(
+            writer.write_entries(entries[i:i + size]) for i in range(0, len(entries), size)
+        )
+        os.remove(replaying)
+        self.stdout.write(self.style.SUCCESS(
+            f'Replayed {written} of {len(entries)} spooled entr{"y" if len(entries) == 1 else "ies"}.'
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activitylog', '0004_add_missing_action_types'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['admin_owner', '-created_at'], name='actlog_owner_created_idx'),
+        ),
+    ]
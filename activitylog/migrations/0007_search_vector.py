@@ -0,0 +1,73 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:57
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# PostgreSQL only: the tsvector is filled by a trigger so rows written with
+# bulk_create (activitylog/writer.py) are indexed too.  Other backends keep a
+# NULL column and the view falls back to icontains.
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION activitylog_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(
+            (SELECT username FROM {user_table} WHERE id = NEW.user_id), '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.module, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS activitylog_search_vector_trigger ON activitylog_activitylog;
+CREATE TRIGGER activitylog_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF user_id, module, description ON activitylog_activitylog
+    FOR EACH ROW EXECUTE FUNCTION activitylog_search_vector_update();
+
+UPDATE activitylog_activitylog AS log
+   SET search_vector =
+        setweight(to_tsvector('simple', coalesce(u.username, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(log.module, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(log.description, '')), 'C')
+  FROM {user_table} AS u
+ WHERE u.id = log.user_id;
+
+CREATE INDEX IF NOT EXISTS actlog_search_vector_gin
+    ON activitylog_activitylog USING gin (search_vector);
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS actlog_search_vector_gin;
+DROP TRIGGER IF EXISTS activitylog_search_vector_trigger ON activitylog_activitylog;
+DROP FUNCTION IF EXISTS activitylog_search_vector_update();
+"""
+
+
+def install_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    user_table = schema_editor.quote_name(apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table)
+    schema_editor.execute(TRIGGER_SQL.format(user_table=user_table))
+
+
+def remove_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activitylog', '0006_created_at_default_now'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_trigger, remove_search_trigger),
+    ]
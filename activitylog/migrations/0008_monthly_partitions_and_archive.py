@@ -0,0 +1,98 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:00
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations, models
+
+# PostgreSQL 13+ only (BEFORE row triggers on partitioned tables).  The
+# table is rebuilt as PARTITION BY RANGE (created_at): the primary key
+# becomes (id, created_at) as partitioning requires, ids keep coming from a
+# sequence, and every existing row is copied into its month's partition.
+# Other backends keep the plain table.
+TABLE = 'activitylog_activitylog'
+OLD_TABLE = 'activitylog_activitylog_unpartitioned'
+MONTHS_AHEAD = 3
+
+CONVERT_SQL = """
+LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE {table} RENAME TO {old};
+CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at);
+CREATE SEQUENCE {table}_id_part_seq OWNED BY {table}.id;
+SELECT setval('{table}_id_part_seq', COALESCE((SELECT max(id) FROM {old}), 0) + 1, false);
+ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_part_seq');
+ALTER TABLE {table} ADD CONSTRAINT {table}_pkey_part PRIMARY KEY (id, created_at);
+CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+"""
+
+FINISH_SQL = """
+INSERT INTO {table} SELECT * FROM {old};
+DROP TABLE {old};
+CREATE INDEX {table}_user_id_part ON {table} (user_id);
+CREATE INDEX {table}_admin_owner_id_part ON {table} (admin_owner_id);
+CREATE INDEX actlog_owner_created_idx ON {table} (admin_owner_id, created_at DESC);
+CREATE INDEX actlog_search_vector_gin ON {table} USING gin (search_vector);
+ALTER TABLE {table} ADD CONSTRAINT {table}_user_id_fk_part
+    FOREIGN KEY (user_id) REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE {table} ADD CONSTRAINT {table}_admin_owner_id_fk_part
+    FOREIGN KEY (admin_owner_id) REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE TRIGGER activitylog_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF user_id, module, description ON {table}
+    FOR EACH ROW EXECUTE FUNCTION activitylog_search_vector_update();
+"""
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_by_month(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    fmt = {'table': TABLE, 'old': OLD_TABLE, 'user_table': schema_editor.quote_name(user_table)}
+
+    schema_editor.execute(CONVERT_SQL.format(**fmt))
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(created_at)::date, CURRENT_DATE FROM {OLD_TABLE}')
+        first, today = cursor.fetchone()
+    month = date((first or today).year, (first or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        schema_editor.execute(
+            f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') "
+            f"TO ('{_add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+        )
+        month = _add_months(month, 1)
+    schema_editor.execute(FINISH_SQL.format(**fmt))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activitylog', '0007_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Not reversible in place; the partitioned table is schema-compatible
+        # with the old one, so going back leaves it partitioned.
+        migrations.RunPython(partition_by_month, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ActivityLogArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(db_index=True, help_text='First day of the archived month (UTC)')),
+                ('storage_name', models.CharField(help_text='File name in the archive storage', max_length=255)),
+                ('format', models.CharField(choices=[('jsonl', 'JSON Lines'), ('csv', 'CSV')], default='jsonl', max_length=10)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Activity Log Archives',
+                'ordering': ['-month'],
+            },
+        ),
+    ]
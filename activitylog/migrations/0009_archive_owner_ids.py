@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:48
+
+import csv
+import gzip
+import io
+import json
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import migrations, models
+
+
+def backfill_owner_ids(apps, schema_editor):
+    """Read each existing archive file once to record whose rows it holds."""
+    ActivityLogArchive = apps.get_model('activitylog', 'ActivityLogArchive')
+    storage = storages[getattr(settings, 'ACTIVITY_LOG_ARCHIVE_STORAGE', 'default')]
+    for archive in ActivityLogArchive.objects.all():
+        owners, users = set(), set()
+        with storage.open(archive.storage_name, 'rb') as fh:
+            text = io.TextIOWrapper(gzip.GzipFile(fileobj=fh, mode='rb'), encoding='utf-8', newline='')
+            records = csv.DictReader(text) if archive.format == 'csv' else (
+                json.loads(line) for line in text if line.strip()
+            )
+            for record in records:
+                if record['admin_owner_id'] not in (None, ''):
+                    owners.add(int(record['admin_owner_id']))
+                if record['user_id'] not in (None, ''):
+                    users.add(int(record['user_id']))
+        archive.admin_owner_ids = sorted(owners)
+        archive.user_ids = sorted(users)
+        archive.save(update_fields=['admin_owner_ids', 'user_ids'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activitylog', '0008_monthly_partitions_and_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylogarchive',
+            name='admin_owner_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='activitylogarchive',
+            name='user_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(backfill_owner_ids, migrations.RunPython.noop),
+    ]
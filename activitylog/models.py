@@ -1,8 +1,17 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from login.models import User
 
 
 class ActivityLog(models.Model):
+    """
+    On PostgreSQL the table is range-partitioned by month on created_at
+    (migration 0008; partitions are created ahead by
+    `manage.py create_activity_log_partitions`).  Months past the retention
+    period are exported and dropped by `manage.py archive_activity_logs`.
+    """
+
     # Action types
     ACTION_TYPE_CHOICES = (
         ('CREATE', 'Create'),
@@ -50,8 +59,9 @@ class ActivityLog(models.Model):
         help_text="User agent string of the user's browser/device"
     )
 
-    # Metadata
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Metadata — stamped when the action is logged, not when the buffered
+    # writer (activitylog/writer.py) inserts the row.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     # Tenant isolation (using user's admin owner)
     admin_owner = models.ForeignKey(
@@ -63,19 +73,51 @@ class ActivityLog(models.Model):
         help_text="Admin owner for tenant isolation (auto-filled from user)"
     )
 
+    # Full-text search over username, module and description.  On PostgreSQL
+    # a BEFORE INSERT/UPDATE trigger fills it (so bulk_create rows are
+    # covered) and a GIN index serves it — both created by migration 0007.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Activity Logs'
+        indexes = [
+            models.Index(fields=['admin_owner', '-created_at'], name='actlog_owner_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.action_type} - {self.created_at}"
 
     def save(self, *args, **kwargs):
-        # Auto-fill admin_owner based on user
-        if not self.admin_owner:
-            if self.user.admin_owner:
-                self.admin_owner = self.user.admin_owner
-            elif self.user.role in ('ADMIN', 'SUPER_ADMIN'):
-                self.admin_owner = self.user
+        # Auto-fill admin_owner based on user (by id: no extra query)
+        if not self.admin_owner_id:
+            from .writer import admin_owner_id_for
+            self.admin_owner_id = admin_owner_id_for(self.user)
         super().save(*args, **kwargs)
 
+
+
+class ActivityLogArchive(models.Model):
+    """One month of ActivityLog rows exported to storage and removed from the table."""
+
+    FORMAT_CHOICES = (
+        ('jsonl', 'JSON Lines'),
+        ('csv', 'CSV'),
+    )
+
+    month = models.DateField(db_index=True, help_text="First day of the archived month (UTC)")
+    storage_name = models.CharField(max_length=255, help_text="File name in the archive storage")
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='jsonl')
+    row_count = models.PositiveIntegerField(default=0)
+    # Whose rows the file holds, so the archived-month list can be scoped
+    # like the live log without opening the files.
+    admin_owner_ids = models.JSONField(default=list, blank=True)
+    user_ids = models.JSONField(default=list, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-month']
+        verbose_name_plural = 'Activity Log Archives'
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} ({self.row_count} rows, {self.format})"
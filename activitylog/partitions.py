@@ -0,0 +1,132 @@
+# activitylog/partitions.py
+"""
+Monthly range partitions of the ActivityLog table (PostgreSQL only).
+
+Migration 0008 turns activitylog_activitylog into a table partitioned by
+RANGE (created_at) with one partition per UTC month,
+
+    activitylog_activitylog_p202603   FOR VALUES FROM ('2026-03-01') TO ('2026-04-01')
+
+plus activitylog_activitylog_default for rows outside every partition.
+Queries with a created_at bound (the list view's date filters, the newest
+page of the cursor pagination) touch only the partitions they need.
+
+Partitions are created ahead of time by
+
+    python manage.py create_activity_log_partitions [--months-ahead N]
+
+(run it from cron / the deploy hook); archive.py detaches and drops the
+ones past retention.  On other backends is_partitioned() is False and the
+table stays a plain table.
+"""
+
+import re
+from datetime import date
+
+from django.db import connection, transaction
+
+from .models import ActivityLog
+
+TABLE = ActivityLog._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+_PARTITION_RE = re.compile(rf'^{re.escape(TABLE)}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def _bound(month):
+    # Literal, not a parameter: partition bounds are DDL.
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def is_partitioned():
+    """True when the ActivityLog table is a partitioned PostgreSQL table."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table pt '
+            'JOIN pg_class c ON c.oid = pt.partrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid)',
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    """{first day of month: partition table name} for the attached monthly partitions."""
+    if not is_partitioned():
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits i '
+            'JOIN pg_class child  ON child.oid  = i.inhrelid '
+            'JOIN pg_class parent ON parent.oid = i.inhparent '
+            'WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)',
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    found = {}
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            found[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return found
+
+
+def create_partition(month):
+    """
+    Create and attach the partition for month.  Rows of that month already
+    sitting in the default partition are moved into it first (ATTACH would
+    otherwise fail).
+    """
+    month = month_start(month)
+    name = connection.ops.quote_name(partition_name(month))
+    table = connection.ops.quote_name(TABLE)
+    default = connection.ops.quote_name(DEFAULT_PARTITION)
+    start, end = _bound(month), _bound(add_months(month, 1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS ('
+            f'  DELETE FROM {default} WHERE created_at >= {start} AND created_at < {end} RETURNING *'
+            f') INSERT INTO {name} SELECT * FROM moved'
+        )
+        cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})')
+
+
+def ensure_partitions(first_month, last_month):
+    """Create the missing partitions from first_month to last_month inclusive; returns the months created."""
+    if not is_partitioned():
+        return []
+    existing = partitions()
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            create_partition(month)
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partition(month):
+    """Detach and drop the partition of month (its rows are gone for good)."""
+    name = connection.ops.quote_name(partition_name(month_start(month)))
+    table = connection.ops.quote_name(TABLE)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+        cursor.execute(f'DROP TABLE {name}')
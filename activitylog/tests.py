@@ -1,3 +1,191 @@
-from django.test import TestCase
+import tempfile
+import unittest
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from login.models import User
+
+from . import archive, partitions
+from .models import ActivityLog
+
+
+def _log(user, admin_owner, day, description='Logged in', **fields):
+    return ActivityLog.objects.create(
+        user=user, admin_owner=admin_owner, action_type='LOGIN', module='Auth',
+        description=description, created_at=datetime.combine(day, datetime.min.time(), tzinfo=dt_timezone.utc),
+        **fields,
+    )
+
+
+class _ArchiveFixture(TestCase):
+    """Two tenants with activity in January and February 2024, archived to a temporary storage."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._storage_settings = override_settings(STORAGES={
+            'default': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': tempfile.mkdtemp()},
+            },
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        cls._storage_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._storage_settings.disable()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='acme', role='ADMIN', email='acme@example.com')
+        cls.user = User.objects.create(username='emp', role='USER', admin_owner=cls.admin, email='emp@example.com')
+        cls.colleague = User.objects.create(
+            username='emp2', role='USER', admin_owner=cls.admin, email='emp2@example.com',
+        )
+        cls.other_admin = User.objects.create(username='other', role='ADMIN', email='other@example.com')
+
+        for day in range(1, 31):
+            _log(cls.user, cls.admin, date(2024, 1, day), f'Punch {day}', ip_address='10.0.0.1')
+        _log(cls.colleague, cls.admin, date(2024, 1, 15), 'Exported payroll')
+        _log(cls.other_admin, cls.other_admin, date(2024, 1, 3), 'Other tenant')
+        _log(cls.other_admin, cls.other_admin, date(2024, 2, 3), 'Other tenant')
+
+    def setUp(self):
+        cache.clear()
+
+
+class ArchivedViewTests(_ArchiveFixture):
+
+    def setUp(self):
+        super().setUp()
+        archive.archive_month(date(2024, 1, 1))
+        archive.archive_month(date(2024, 2, 1))
+        self.client = APIClient()
+
+    def test_archived_months_are_scoped_like_the_live_log(self):
+        for user, months in [
+            (self.admin, ['2024-01']),
+            (self.other_admin, ['2024-02', '2024-01']),
+            (self.colleague, ['2024-01']),
+        ]:
+            self.client.force_authenticate(user)
+            resp = self.client.get('/api/activitylog/archived/')
+            self.assertEqual(resp.data['months'], months, user.username)
+
+        self.client.force_authenticate(User.objects.create(
+            username='new', role='USER', admin_owner=self.admin, email='new@example.com',
+        ))
+        self.assertEqual(self.client.get('/api/activitylog/archived/').data['months'], [])
+
+    def test_month_pages_read_the_archive_file_once(self):
+        self.client.force_authenticate(self.admin)
+        with mock.patch.object(FileSystemStorage, 'open', autospec=True, side_effect=FileSystemStorage.open) as opened:
+            first = self.client.get('/api/activitylog/archived/', {'month': '2024-01', 'page_size': 20})
+            second = self.client.get('/api/activitylog/archived/', {'month': '2024-01', 'page_size': 20, 'page': 2})
+            search = self.client.get('/api/activitylog/archived/', {'month': '2024-01', 'search': 'payroll'})
+
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(first.data['count'], 31)
+        self.assertEqual(len(first.data['results']) + len(second.data['results']), 31)
+        self.assertEqual(first.data['results'][0]['description'], 'Punch 30')
+        self.assertEqual([r['user_username'] for r in search.data['results']], ['emp2'])
+
+    def test_users_only_see_their_own_archived_entries(self):
+        self.client.force_authenticate(self.colleague)
+        resp = self.client.get('/api/activitylog/archived/', {'month': '2024-01'})
+        self.assertEqual([r['description'] for r in resp.data['results']], ['Exported payroll'])
+
+
+class ArchiveRoundTripTests(_ArchiveFixture):
+
+    def _expected(self, month, admin_owner_id):
+        start, end = archive.month_bounds(month)
+        rows = (
+            ActivityLog.objects
+            .filter(admin_owner_id=admin_owner_id, created_at__gte=start, created_at__lt=end)
+            .order_by('-created_at', '-id')
+            .values_list(*archive.FIELDS)
+        )
+        return [dict(zip(archive.FIELDS, row)) for row in rows]
+
+    def test_archive_and_read_back(self):
+        month = date(2024, 1, 1)
+        for fmt in ('jsonl', 'csv'):
+            with self.subTest(fmt=fmt):
+                expected = self._expected(month, self.admin.pk)
+                self.assertEqual(len(expected), 31)
+
+                record = archive.archive_month(month, fmt)
+
+                self.assertEqual((record.format, record.row_count), (fmt, 32))
+                self.assertTrue(record.storage_name.endswith(f'.{fmt}.gz'))
+                self.assertEqual(record.admin_owner_ids, sorted([self.admin.pk, self.other_admin.pk]))
+                self.assertFalse(ActivityLog.objects.filter(created_at__lt=archive.month_bounds(month)[1]).exists())
+                self.assertEqual(archive.read_archive(month, admin_owner_id=self.admin.pk), expected)
+                self.assertEqual(
+                    [r['description'] for r in archive.read_archive(month, user_id=self.colleague.pk)],
+                    ['Exported payroll'],
+                )
+                # Put the month back for the other format.
+                record.delete()
+                cache.clear()
+                ActivityLog.objects.bulk_create(ActivityLog(**row) for row in reversed(expected))
+                _log(self.other_admin, self.other_admin, date(2024, 1, 3), 'Other tenant')
+
+    def test_month_without_rows_is_not_recorded(self):
+        self.assertIsNone(archive.archive_month(date(2023, 6, 1)))
+        self.assertEqual(archive.archived_months(), [])
+
+    def test_expired_months(self):
+        today = date(2026, 3, 15)
+        self.assertEqual(archive.expired_months(24, today), [date(2024, 1, 1), date(2024, 2, 1)])
+        self.assertEqual(archive.expired_months(25, today), [date(2024, 1, 1)])
+        self.assertEqual(archive.expired_months(30, today), [])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'partitions exist on PostgreSQL only')
+class PartitionTests(TestCase):
+
+    MONTH = date(2031, 5, 1)     # beyond the partitions migration 0008 created
+
+    def setUp(self):
+        self.assertTrue(partitions.is_partitioned())
+        self.admin = User.objects.create(username='acme', role='ADMIN', email='acme@example.com')
+
+    def _count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
+
+    def test_create_partition_moves_rows_out_of_the_default_partition(self):
+        _log(self.admin, self.admin, date(2031, 5, 10))
+        _log(self.admin, self.admin, date(2031, 6, 10))
+        self.assertEqual(self._count(partitions.DEFAULT_PARTITION), 2)
+
+        self.assertEqual(partitions.ensure_partitions(self.MONTH, self.MONTH), [self.MONTH])
+
+        self.assertIn(self.MONTH, partitions.partitions())
+        self.assertEqual(self._count(partitions.partition_name(self.MONTH)), 1)
+        self.assertEqual(self._count(partitions.DEFAULT_PARTITION), 1)
+        self.assertEqual(ActivityLog.objects.filter(admin_owner=self.admin).count(), 2)
+        self.assertEqual(partitions.ensure_partitions(self.MONTH, self.MONTH), [])
+
+    def test_drop_partition_detaches_and_drops_it(self):
+        partitions.create_partition(self.MONTH)
+        _log(self.admin, self.admin, date(2031, 5, 10))
+
+        partitions.drop_partition(self.MONTH)
+
+        self.assertNotIn(self.MONTH, partitions.partitions())
+        self.assertFalse(ActivityLog.objects.exists())
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [partitions.partition_name(self.MONTH)])
+            self.assertIsNone(cursor.fetchone()[0])
@@ -1,4 +1,4 @@
-from .models import ActivityLog
+from . import writer
 
 
 def log_activity(
@@ -13,6 +13,9 @@ def log_activity(
     """
     Utility function to create an activity log entry quickly.
 
+    The entry is queued for the buffered writer (activitylog/writer.py) and
+    inserted in bulk by a background thread; nothing is returned.
+
     Args:
         user (User): User performing the action
         action_type (str): One of CREATE / UPDATE / DELETE / LOGIN / LOGOUT / OTHER
@@ -34,15 +37,14 @@ def log_activity(
         if not user_agent:
             user_agent = request.META.get('HTTP_USER_AGENT', '')
 
-    log = ActivityLog.objects.create(
-        user=user,
-        action_type=action_type,
-        module=module,
-        description=description,
+    writer.submit(
+        user,
+        action_type,
+        module,
+        description,
         ip_address=ip_address,
         user_agent=user_agent,
     )
-    return log
 
 
 class ActivityLogMixin:
@@ -1,8 +1,14 @@
+import re
+
 from rest_framework import viewsets, status, permissions
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
 from django.db.models import Q
-from datetime import datetime
+from django.utils import timezone
+from datetime import datetime, time, timedelta
 from .models import ActivityLog
 from .serializers import ActivityLogSerializer
 
@@ -16,9 +22,48 @@ def _is_admin(user):
 
 
 class ActivityLogPagination(PageNumberPagination):
+    """Legacy ?page=N pagination (OFFSET + COUNT(*)); kept for existing clients."""
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ActivityLogCursorPagination(CursorPagination):
+    """
+    Cursor pagination, newest first.  DRF positions the cursor on created_at
+    only (the first ordering field), plus a small offset past rows sharing
+    the boundary timestamp; `id` just makes the order stable.  Each page is
+    an index range scan on actlog_owner_created_idx, with no COUNT(*) and no
+    OFFSET over earlier pages.  Follow the `next` / `previous` links.
+    """
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+def _search_filter(search_query):
+    """
+    Filter for ?search=.  On PostgreSQL every word must prefix-match a word
+    of the username, module or description (tsvector + GIN index); other
+    backends keep the substring match.
+    """
+    if connection.vendor != 'postgresql':
+        return (
+            Q(user__username__icontains=search_query) |
+            Q(description__icontains=search_query) |
+            Q(module__icontains=search_query)
+        )
+    terms = re.findall(r'\w+', search_query)
+    if not terms:
+        return Q(pk__in=[])
+    raw = ' & '.join(f'{term}:*' for term in terms)
+    return Q(search_vector=SearchQuery(raw, search_type='raw', config='simple'))
+
+
+def _day_start(day):
+    """Midnight at the start of day in the current time zone (aware)."""
+    return timezone.make_aware(datetime.combine(day, time.min))
 
 
 class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -30,7 +75,17 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = ActivityLogSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = ActivityLogPagination
+    pagination_class = ActivityLogCursorPagination
+
+    @property
+    def paginator(self):
+        # Clients still sending ?page=N get the old page-number responses.
+        if not hasattr(self, '_paginator'):
+            if 'page' in self.request.query_params:
+                self._paginator = ActivityLogPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def get_queryset(self):
         user = self.request.user
@@ -48,11 +103,7 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
         # Search filter (search in username, description, module)
         search_query = self.request.query_params.get('search')
         if search_query:
-            queryset = queryset.filter(
-                Q(user__username__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(module__icontains=search_query)
-            )
+            queryset = queryset.filter(_search_filter(search_query))
 
         # Action type filter
         action_type = self.request.query_params.get('action_type')
@@ -64,24 +115,90 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
         if module:
             queryset = queryset.filter(module__icontains=module)
 
-        # Date range filters
+        # Date range filters (half-open created_at ranges, so the index is used)
         date_from = self.request.query_params.get('date_from')
         date_to = self.request.query_params.get('date_to')
 
         if date_from:
             try:
                 from_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-                queryset = queryset.filter(created_at__date__gte=from_date)
+                queryset = queryset.filter(created_at__gte=_day_start(from_date))
             except ValueError:
                 pass
 
         if date_to:
             try:
                 to_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-                queryset = queryset.filter(created_at__date__lte=to_date)
+                queryset = queryset.filter(created_at__lt=_day_start(to_date + timedelta(days=1)))
             except ValueError:
                 pass
 
         # Order by most recent first
-        return queryset.order_by('-created_at')
+        return queryset.select_related('user').order_by('-created_at', '-id')
+
+    @action(detail=False, methods=['get'], url_path='archived')
+    def archived(self, request):
+        """
+        Activity log of an archived month, read back from its storage file.
+          GET ?              → the archived months with entries in scope
+          GET ?month=YYYY-MM → that month's entries (page-number paginated),
+                               with the search / action_type / module filters
+        Scoped like the live list: tenant for admins, own entries otherwise.
+        """
+        from login.models import User
+        from .archive import archived_months, read_archive
+
+        user = request.user
+        if _is_admin(user):
+            scope = {'admin_owner_id': user.admin_owner_id or user.id}
+        else:
+            scope = {'user_id': user.id}
+
+        month_param = request.query_params.get('month')
+        if not month_param:
+            return Response({'months': [f'{m:%Y-%m}' for m in archived_months(**scope)]})
+
+        try:
+            month = datetime.strptime(month_param, '%Y-%m').date()
+        except ValueError:
+            return Response({'error': 'month must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = read_archive(month, **scope)
+
+        search_query = (request.query_params.get('search') or '').lower()
+        action_type = (request.query_params.get('action_type') or '').upper()
+        module = (request.query_params.get('module') or '').lower()
+        usernames = dict(User.objects.filter(
+            id__in={row['user_id'] for row in rows}
+        ).values_list('id', 'username')) if search_query else {}
+        rows = [
+            row for row in rows
+            if (not action_type or row['action_type'].upper() == action_type)
+            and (not module or module in row['module'].lower())
+            and (not search_query
+                 or search_query in row['description'].lower()
+                 or search_query in row['module'].lower()
+                 or search_query in usernames.get(row['user_id'], '').lower())
+        ]
 
+        paginator = ActivityLogPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        users = User.objects.in_bulk({row['user_id'] for row in page})
+        results = []
+        for row in page:
+            row_user = users.get(row['user_id'])
+            results.append({
+                'id':             row['id'],
+                'user':           row['user_id'],
+                'user_username':  row_user.username if row_user else None,
+                'user_full_name': row_user.full_name if row_user else None,
+                'user_role':      row_user.role if row_user else None,
+                'action_type':    row['action_type'],
+                'module':         row['module'],
+                'description':    row['description'],
+                'ip_address':     row['ip_address'],
+                'user_agent':     row['user_agent'],
+                'created_at':     row['created_at'],
+                'archived':       True,
+            })
+        return paginator.get_paginated_response(results)
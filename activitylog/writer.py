@@ -0,0 +1,260 @@
+# activitylog/writer.py
+"""
+Buffered ActivityLog writer.
+
+log_activity() used to INSERT one row synchronously on every check-in,
+check-out, device-list view and payroll action.  It now hands the entry to
+this module, which appends it to an in-process bounded queue; a background
+thread drains the queue and writes the rows with one bulk_create() per
+ACTIVITY_LOG_BATCH_SIZE entries or every ACTIVITY_LOG_FLUSH_INTERVAL_MS,
+whichever comes first.  The request pays for a dict and a queue put.
+
+    from activitylog.writer import submit
+
+    submit(user, 'UPDATE', 'Attendance', 'Checked in', ip_address=ip)
+
+Guarantees:
+
+  * created_at and admin_owner are resolved when the entry is submitted
+    (from user.admin_owner_id — no query), not when it is written.
+  * Inside a transaction the entry is queued on commit, so a rolled-back
+    action leaves no log, exactly as with the old synchronous INSERT.
+  * A full queue never drops entries: the submitting request writes its
+    entry itself.
+  * Queued entries are flushed at interpreter shutdown (atexit).
+  * With ACTIVITY_LOG_SPOOL_PATH set, batches that cannot be written (DB
+    down, shutdown without a database) are appended to that JSON-lines
+    file instead of being lost; `manage.py replay_activity_log_spool`
+    loads them back.
+
+Settings (all optional):
+    ACTIVITY_LOG_ASYNC              — False writes every entry inline
+                                      (tests, management commands; default True)
+    ACTIVITY_LOG_BATCH_SIZE         — rows per bulk_create (default 200)
+    ACTIVITY_LOG_FLUSH_INTERVAL_MS  — max age of a queued entry (default 1000)
+    ACTIVITY_LOG_QUEUE_SIZE         — queued entries before back-pressure (default 10000)
+    ACTIVITY_LOG_SPOOL_PATH         — spool file for unwritable batches (default none)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+ADMIN_ROLES = ('ADMIN', 'SUPER_ADMIN')
+
+_STOP = object()
+
+
+def admin_owner_id_for(user):
+    """Tenant of user, without touching the database (same rule as ActivityLog.save)."""
+    if user.admin_owner_id:
+        return user.admin_owner_id
+    if user.role in ADMIN_ROLES:
+        return user.pk
+    return None
+
+
+def make_entry(user, action_type, module, description, ip_address=None, user_agent=None):
+    """The column values of one ActivityLog row, as a plain dict."""
+    if user is None or user.pk is None:
+        raise ValueError('ActivityLog entries need a saved user.')
+    return {
+        'user_id':        user.pk,
+        'admin_owner_id': admin_owner_id_for(user),
+        'action_type':    action_type,
+        'module':         module or '',
+        'description':    description,
+        'ip_address':     ip_address or None,
+        'user_agent':     user_agent or '',
+        'created_at':     timezone.now(),
+    }
+
+
+def write_entries(entries):
+    """
+    INSERT entries with bulk_create.  Entries whose user was deleted in the
+    meantime are dropped rather than failing the whole batch.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db import IntegrityError
+    from .models import ActivityLog
+
+    if not entries:
+        return 0
+    rows = [ActivityLog(**entry) for entry in entries]
+    try:
+        with transaction.atomic():
+            ActivityLog.objects.bulk_create(rows)
+        return len(rows)
+    except IntegrityError:
+        referenced = {e['user_id'] for e in entries} | {e['admin_owner_id'] for e in entries}
+        existing = set(
+            get_user_model().objects.filter(pk__in=referenced).values_list('pk', flat=True)
+        )
+        rows = [
+            row for row in rows
+            if row.user_id in existing and row.admin_owner_id in existing | {None}
+        ]
+        ActivityLog.objects.bulk_create(rows)
+        return len(rows)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SPOOL
+# ─────────────────────────────────────────────────────────────────────────────
+
+def spool_entries(entries, path=None):
+    """Append entries to the spool file.  Returns False when no spool is configured."""
+    path = path or getattr(settings, 'ACTIVITY_LOG_SPOOL_PATH', None)
+    if not path or not entries:
+        return False
+    lines = ''.join(
+        json.dumps({**entry, 'created_at': entry['created_at'].isoformat()}) + '\n'
+        for entry in entries
+    )
+    # One O_APPEND write per batch keeps lines from different processes whole.
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+    try:
+        os.write(fd, lines.encode('utf-8'))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return True
+
+
+def read_spool(path):
+    """Entries stored in a spool file (unparseable lines are skipped)."""
+    entries = []
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+                entry['created_at'] = parse_datetime(entry['created_at'])
+            except (ValueError, KeyError, TypeError):
+                logger.warning('Skipping malformed activity-log spool line: %r', line[:200])
+                continue
+            entries.append(entry)
+    return entries
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BUFFER
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ActivityLogBuffer:
+    """Bounded queue of entries drained by one background flusher thread."""
+
+    def __init__(self, batch_size=200, flush_interval=1.0, max_queued=10000):
+        self.batch_size     = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self._queue         = queue.Queue(maxsize=max(1, max_queued))
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name='activity-log-flusher', daemon=True,
+        )
+        self._flusher.start()
+
+    def put(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Back-pressure instead of loss: this request pays for its own row.
+            self._write([entry])
+
+    def shutdown(self, timeout=10.0):
+        """Stop the flusher after it has written everything queued so far."""
+        if not self._flusher.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._flusher.join(timeout)
+
+    # ── internals ────────────────────────────────────────────────────────────
+
+    def _next_batch(self):
+        """Block for one entry, then collect more until the batch is full or stale."""
+        batch    = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush_loop(self):
+        while True:
+            batch = self._next_batch()
+            stop  = batch[-1] is _STOP
+            self._write([entry for entry in batch if entry is not _STOP])
+            if stop:
+                close_old_connections()
+                return
+
+    @staticmethod
+    def _write(entries):
+        if not entries:
+            return
+        close_old_connections()
+        try:
+            write_entries(entries)
+        except Exception:
+            if spool_entries(entries):
+                logger.exception('ActivityLog flush failed; %d entries spooled', len(entries))
+            else:
+                logger.exception('ActivityLog flush failed; %d entries lost', len(entries))
+
+
+_buffer      = None
+_buffer_pid  = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """
+    Return this process's ActivityLogBuffer, starting it on first use.
+    A forked worker gets its own (the parent's thread does not survive fork).
+    """
+    global _buffer, _buffer_pid
+    pid = os.getpid()
+    if _buffer is None or _buffer_pid != pid:
+        with _buffer_lock:
+            if _buffer is None or _buffer_pid != pid:
+                _buffer = ActivityLogBuffer(
+                    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 200),
+                    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL_MS', 1000) / 1000.0,
+                    max_queued=getattr(settings, 'ACTIVITY_LOG_QUEUE_SIZE', 10000),
+                )
+                _buffer_pid = pid
+                atexit.register(_buffer.shutdown)
+    return _buffer
+
+
+def flush(timeout=10.0):
+    """Write everything queued in this process and stop its flusher (tests, shutdown hooks)."""
+    global _buffer
+    with _buffer_lock:
+        buffer, _buffer = _buffer, None
+    if buffer is not None and _buffer_pid == os.getpid():
+        buffer.shutdown(timeout)
+
+
+def submit(user, action_type, module, description, ip_address=None, user_agent=None):
+    """Queue one ActivityLog entry (written inline when ACTIVITY_LOG_ASYNC is off)."""
+    entry = make_entry(user, action_type, module, description, ip_address, user_agent)
+    if not getattr(settings, 'ACTIVITY_LOG_ASYNC', True):
+        write_entries([entry])
+        return
+    transaction.on_commit(lambda: get_buffer().put(entry))
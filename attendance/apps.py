@@ -1,6 +1,16 @@
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance'
+
+    def ready(self):
+        # Opt-in: only processes designated to serve face punches set this.
+        # The face server itself loads the models on start.
+        if getattr(settings, 'FACE_WARMUP_ON_STARTUP', False) and 'run_face_server' not in sys.argv:
+            from .face import warm_up
+            warm_up()
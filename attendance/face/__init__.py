@@ -0,0 +1,40 @@
+# attendance/face/__init__.py
+"""
+Face-recognition subsystem (detection, embeddings, identification).
+
+Nothing heavy is imported with this package: the submodules load on first
+attribute access, and DeepFace / TensorFlow are only ever imported by the
+shared face server process (server.py, fed by worker.py).  Importing
+attendance.views (and therefore the URLconf, `manage.py migrate`, shells,
+...) costs no model load.
+
+    from . import face
+
+    reps  = face.worker.represent(img_bytes)          # worker.py
+    match = face.index.get_face_index(admin_owner)    # index.py
+    jpeg  = face.image.upright_jpeg(img_bytes)        # image.py
+
+Processes that serve face punches can pay the model load at start-up
+instead of on the first punch: set FACE_WARMUP_ON_STARTUP=1 for them
+(AttendanceConfig.ready() then calls warm_up()), or call
+attendance.face.warm_up() from a server hook such as gunicorn's
+post_worker_init.  `manage.py benchmark_startup` verifies that
+django.setup() stays free of TensorFlow.
+"""
+
+import importlib
+
+_SUBMODULES = ('image', 'index', 'server', 'worker')
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def warm_up():
+    """Connect to (or start) the face server and load the models in the background."""
+    from .worker import warm_up as _warm_up
+
+    return _warm_up()
@@ -0,0 +1,99 @@
+# attendance/face/image.py
+"""
+Single-decode image pipeline for face punches.
+
+An uploaded selfie is decoded exactly once, straight into the array the face
+model consumes:
+
+    raw bytes ─▶ PIL decode (JPEG draft-mode downscale) ─▶ EXIF transpose
+              ─▶ RGB ─▶ downscale to detector size ─▶ BGR uint8 ndarray
+
+There is no JPEG re-encode and no temp file; the array is handed to
+DeepFace directly by attendance/face/worker.py.
+
+FACE_DETECTOR_MAX_SIDE (default 640) caps the longest image side.  RetinaFace
+finds faces reliably at that size and Facenet512 works on a 160×160 crop, so
+decoding a 12 MP phone photo at full resolution only costs time.
+"""
+
+import io
+
+import numpy as np
+from django.conf import settings
+
+try:
+    from PIL import Image as _PilImage, ImageOps as _PilImageOps
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
+
+def _max_side():
+    return int(getattr(settings, 'FACE_DETECTOR_MAX_SIDE', 640))
+
+
+def decode_image(raw_bytes, max_side=None):
+    """
+    Decode raw image bytes into an upright, downscaled BGR uint8 array.
+
+    Raises ValueError if the bytes are not a readable image.
+    """
+    if not raw_bytes:
+        raise ValueError('Empty image data.')
+    if max_side is None:
+        max_side = _max_side()
+
+    if not _PIL_AVAILABLE:
+        return _decode_with_cv2(raw_bytes, max_side)
+
+    try:
+        img = _PilImage.open(io.BytesIO(raw_bytes))
+        # JPEG only: let libjpeg decode at 1/2, 1/4 or 1/8 scale directly.
+        # The EXIF tag survives draft(), so the transpose below still applies.
+        img.draft('RGB', (max_side, max_side))
+        # Rotate pixels to match what the phone showed (mobile cameras store
+        # landscape sensor data plus an orientation flag OpenCV ignores).
+        img = _PilImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_side, max_side), _PilImage.BILINEAR)
+        rgb = np.asarray(img)
+    except Exception as e:
+        raise ValueError(f'Could not decode image data: {e}')
+
+    return np.ascontiguousarray(rgb[:, :, ::-1])   # RGB → BGR for DeepFace
+
+
+def _decode_with_cv2(raw_bytes, max_side):
+    """Fallback without Pillow — no EXIF handling, same output contract."""
+    import cv2
+
+    img = cv2.imdecode(np.frombuffer(raw_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError('Could not decode image data.')
+    h, w = img.shape[:2]
+    scale = max_side / float(max(h, w))
+    if scale < 1.0:
+        img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return img
+
+
+def upright_jpeg(raw_bytes, quality=95):
+    """
+    Return raw_bytes re-encoded as an upright RGB JPEG (EXIF orientation baked
+    in), or the original bytes if Pillow is missing or decoding fails.
+
+    Only used for images we *store* (register-face reference photos) so they
+    display correctly everywhere; the punch path never calls this.
+    """
+    if not _PIL_AVAILABLE or not raw_bytes:
+        return raw_bytes
+    try:
+        img = _PilImageOps.exif_transpose(_PilImage.open(io.BytesIO(raw_bytes)))
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        buf = io.BytesIO()
+        img.save(buf, format='JPEG', quality=quality)
+        return buf.getvalue()
+    except Exception:
+        return raw_bytes
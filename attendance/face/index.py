@@ -0,0 +1,170 @@
+# attendance/face/index.py
+"""
+In-process, per-tenant face identification index.
+
+kiosk-punch and auto-punch have to find which registered employee a live
+Facenet512 embedding belongs to.  Instead of parsing every stored embedding
+and computing cosine distances one by one, each tenant's embeddings are kept
+as a contiguous, L2-normalised float32 matrix; a single matrix-vector
+product then gives the cosine similarity against every employee at once.
+
+Usage inside FaceRecognitionViewSet:
+
+    from .face.index import get_face_index, update_face_index
+
+    index = get_face_index(admin_owner)
+    user_id, distance = index.best_match(live_embedding, threshold)
+
+    # after register-face stores / replaces an embedding
+    update_face_index(face_obj)
+
+The index is rebuilt lazily when it goes stale.  Staleness is detected with
+a cheap (count, max(updated_at)) aggregate over the tenant's face rows, so
+registrations handled by another worker process are picked up on the next
+punch; updates made in this process are patched in place.
+"""
+
+import threading
+
+import numpy as np
+from django.db.models import Count, Max
+
+from ..models import EmployeeFaceData
+
+EMBEDDING_DIM = 512
+
+
+def _normalise_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0    # zero vectors stay zero → distance 1.0
+    return matrix / norms
+
+
+def _registered_faces(admin_owner_id):
+    return (
+        EmployeeFaceData.objects
+        .filter(admin_owner_id=admin_owner_id, reference_image__isnull=False)
+        .exclude(reference_image='')
+    )
+
+
+def _signature(admin_owner_id):
+    agg = _registered_faces(admin_owner_id).aggregate(n=Count('id'), latest=Max('updated_at'))
+    return agg['n'], agg['latest']
+
+
+class FaceIndex:
+    """Normalised embedding matrix + parallel user-id array for one tenant."""
+
+    def __init__(self, user_ids, matrix, signature=None):
+        self.user_ids  = np.asarray(user_ids, dtype=np.int64)
+        self.matrix    = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.signature = signature
+
+    @classmethod
+    def build(cls, admin_owner_id):
+        signature = _signature(admin_owner_id)
+        user_ids, vectors = [], []
+        rows = (
+            _registered_faces(admin_owner_id)
+            .exclude(face_embedding__isnull=True)
+            .values_list('user_id', 'face_embedding')
+        )
+        for user_id, raw in rows:
+            vec = EmployeeFaceData.decode_embedding(raw)
+            if vec is None or vec.shape != (EMBEDDING_DIM,):
+                continue   # skip missing / truncated embedding silently
+            user_ids.append(user_id)
+            vectors.append(vec)
+
+        if vectors:
+            matrix = _normalise_rows(np.vstack(vectors).astype(np.float32))
+        else:
+            matrix = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        return cls(user_ids, matrix, signature)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def best_match(self, embedding, threshold):
+        """
+        Return (user_id, cosine_distance) of the closest registered face, or
+        (None, best_distance) when nothing is within threshold.
+        """
+        if not len(self):
+            return None, 1.0
+        live = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(live)
+        if norm == 0:
+            return None, 1.0
+        distances = 1.0 - self.matrix @ (live / norm)
+        best = int(np.argmin(distances))
+        distance = float(distances[best])
+        if distance <= threshold:
+            return int(self.user_ids[best]), distance
+        return None, distance
+
+    def upsert(self, user_id, embedding):
+        """Return a new index with user_id's row added or replaced."""
+        vec = _normalise_rows(np.asarray(embedding, dtype=np.float32).reshape(1, -1))
+        hits = np.flatnonzero(self.user_ids == user_id)
+        if hits.size:
+            matrix = self.matrix.copy()
+            matrix[hits[0]] = vec[0]
+            return FaceIndex(self.user_ids, matrix)
+        return FaceIndex(
+            np.append(self.user_ids, user_id),
+            np.vstack([self.matrix, vec]),
+        )
+
+    def remove(self, user_id):
+        """Return a new index without user_id's row."""
+        keep = self.user_ids != user_id
+        return FaceIndex(self.user_ids[keep], self.matrix[keep])
+
+
+# ── Process-wide registry ────────────────────────────────────────────────────
+# Indexes are replaced wholesale (never mutated) so readers can use one
+# without holding the lock.
+_indexes = {}
+_lock    = threading.Lock()
+
+
+def get_face_index(admin_owner):
+    """Return an up-to-date FaceIndex for the tenant, rebuilding if stale."""
+    admin_owner_id = getattr(admin_owner, 'pk', admin_owner)
+    index = _indexes.get(admin_owner_id)
+    if index is not None and index.signature == _signature(admin_owner_id):
+        return index
+    index = FaceIndex.build(admin_owner_id)
+    with _lock:
+        _indexes[admin_owner_id] = index
+    return index
+
+
+def update_face_index(face_obj):
+    """
+    Patch the owning tenant's index after face_obj was saved.  If the index
+    is not loaded yet nothing happens — the next get_face_index() builds it.
+    """
+    admin_owner_id = face_obj.admin_owner_id
+    with _lock:
+        index = _indexes.get(admin_owner_id)
+        if index is None:
+            return
+        vec = face_obj.embedding
+        if vec is None or vec.shape != (EMBEDDING_DIM,):
+            index = index.remove(face_obj.user_id)
+        else:
+            index = index.upsert(face_obj.user_id, vec)
+        index.signature = _signature(admin_owner_id)
+        _indexes[admin_owner_id] = index
+
+
+def invalidate_face_index(admin_owner=None):
+    """Drop one tenant's index (or every index when admin_owner is None)."""
+    with _lock:
+        if admin_owner is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(getattr(admin_owner, 'pk', admin_owner), None)
@@ -0,0 +1,156 @@
+# attendance/face/server.py
+"""
+The shared face-inference server.
+
+One process per host loads RetinaFace and Facenet512 and serves every web
+worker over FACE_SERVER_SOCKET (see attendance/face/worker.py for the
+client side and the batching):
+
+    python manage.py run_face_server
+
+Connections are multiprocessing.connection sockets authenticated with a key
+derived from SECRET_KEY.  Each connection sends (job_id, op, args) and gets
+(job_id, ok, value) back; jobs from all connections share one batcher, so
+concurrent punches from different Gunicorn workers land in the same batch.
+
+Only one server runs per socket: it holds an exclusive lock on
+`<socket>.lock` for its lifetime, so with FACE_SERVER_AUTOSTART several web
+workers may race to start one and all but the first exit straight away.
+"""
+
+import hashlib
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener, address_type
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# How long a web worker waits for an auto-started server to start listening.
+START_TIMEOUT = 10
+
+
+def _authkey():
+    return hashlib.sha256(f'face-server:{settings.SECRET_KEY}'.encode()).digest()
+
+
+def _acquire_lock(address):
+    """Hold an exclusive lock for this server's lifetime; None if another server has it."""
+    try:
+        import fcntl
+    except ImportError:
+        return True   # no flock (Windows): run the command from one process manager only
+    lock_file = open(f'{address}.lock', 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class FaceServer:
+    """Accepts client connections and feeds their jobs to one shared batcher."""
+
+    def __init__(self, address, batch_size=8, batch_window=0.01):
+        from .worker import _Batcher
+
+        self.address   = address
+        self._listener = Listener(address, authkey=_authkey())
+        self._batcher  = _Batcher(batch_size, batch_window)
+
+    def serve_forever(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                logger.exception('Face server rejected a connection')
+                continue
+            threading.Thread(
+                target=self._handle, args=(conn,), name='face-server-conn', daemon=True,
+            ).start()
+
+    def close(self):
+        self._listener.close()
+
+    def load_models(self):
+        """Queue a ping so the models load now rather than with the first punch."""
+        self._batcher.put('ping', (), lambda ok, value: None)
+
+    def _handle(self, conn):
+        send_lock = threading.Lock()
+
+        def reply_to(job_id):
+            def reply(ok, value):
+                with send_lock:
+                    try:
+                        conn.send((job_id, ok, value))
+                    except OSError:
+                        pass   # the web worker went away; nobody is waiting
+            return reply
+
+        while True:
+            try:
+                job_id, op, args = conn.recv()
+            except Exception:
+                conn.close()
+                return
+            self._batcher.put(op, args, reply_to(job_id))
+
+
+def serve(address=None):
+    """
+    Run the face server in this process until it is killed.
+    Returns False at once if another server already owns the socket.
+    """
+    address = address or settings.FACE_SERVER_SOCKET
+    lock = _acquire_lock(address)
+    if lock is None:
+        return False
+    if address_type(address) == 'AF_UNIX' and os.path.exists(address):
+        os.unlink(address)   # left behind by a server that was killed
+
+    server = FaceServer(
+        address,
+        batch_size=int(getattr(settings, 'FACE_WORKER_BATCH_SIZE', 8)),
+        batch_window=int(getattr(settings, 'FACE_WORKER_BATCH_WINDOW_MS', 10)) / 1000.0,
+    )
+    # Listen first, load second: clients can queue jobs while the models load.
+    server.load_models()
+    logger.info('Face server listening on %s', address)
+    server.serve_forever()
+
+
+def start_server():
+    """Start `manage.py run_face_server` in the background, detached from this process."""
+    proc = subprocess.Popen(
+        [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'run_face_server'],
+        stdin=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    # Reap it if it exits while we live (e.g. it lost the lock to another starter).
+    threading.Thread(target=proc.wait, name='face-server-reaper', daemon=True).start()
+
+
+def connect(address, autostart=False):
+    """Connect to the face server at address, starting one first if allowed and needed."""
+    try:
+        return Client(address, authkey=_authkey())
+    except (FileNotFoundError, ConnectionRefusedError):
+        if not autostart:
+            raise
+    logger.info('No face server on %s; starting one', address)
+    start_server()
+    deadline = time.monotonic() + START_TIMEOUT
+    while True:
+        try:
+            return Client(address, authkey=_authkey())
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
@@ -0,0 +1,409 @@
+# attendance/face/worker.py
+"""
+Face inference: one shared model process, batched across all web workers.
+
+All RetinaFace / Facenet512 work (detection, embeddings, verification) runs
+in ONE face server process (attendance/face/server.py) that loads the models
+once for the whole host.  Every Gunicorn worker keeps a single connection to
+it over a Unix socket; request handlers hand over the raw upload bytes — no
+temp files, no re-encode; the server decodes them once via
+attendance/face/image.py — and block on a Future:
+
+    from .face.worker import FaceInferenceError, represent
+
+    try:
+        reps = represent(img_bytes)          # [{'embedding': [...512 floats], ...}]
+    except FaceInferenceError as e:
+        ...                                  # str(e) is DeepFace's message
+
+The server groups jobs from every connection that arrive within
+FACE_WORKER_BATCH_WINDOW_MS of each other (up to FACE_WORKER_BATCH_SIZE).
+RetinaFace still detects image by image, but every face crop of the batch
+goes through Facenet512 in a single predict() call, so a burst of punches at
+9:00 AM costs one forward pass per batch instead of one per punch.
+
+Settings (all optional):
+    FACE_SERVER_SOCKET           — the server's socket path; empty runs the
+                                   models in a background thread of each
+                                   process instead (development, tests)
+    FACE_SERVER_AUTOSTART        — let the first web worker that finds no
+                                   server start `manage.py run_face_server`
+                                   (default on; turn off when a process
+                                   manager runs the command)
+    FACE_WORKER_BATCH_SIZE       — max jobs per batch (default 8)
+    FACE_WORKER_BATCH_WINDOW_MS  — how long to wait for more jobs (default 10)
+    FACE_WORKER_TIMEOUT          — seconds a request waits on its job (default 60)
+
+If the server dies (crash, OOM kill), the jobs in flight fail with
+FaceInferenceError and the next job reconnects, starting a new server when
+autostart is on.  get_pool() opens a new connection in a forked process —
+e.g. a gunicorn --preload worker forked after FACE_WARMUP_ON_STARTUP — since
+the parent's socket and reader thread must not be shared.
+"""
+
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME       = 'Facenet512'
+DETECTOR_BACKEND = 'retinaface'
+
+# DeepFace.verify's cosine-distance threshold for Facenet512.
+VERIFY_THRESHOLD = 0.30
+
+
+class FaceInferenceError(Exception):
+    """A face job failed; the message is the underlying DeepFace error text."""
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MODEL SIDE (runs in the face server, or inline when FACE_SERVER_SOCKET='')
+# ─────────────────────────────────────────────────────────────────────────────
+
+_DeepFace = None
+_facenet  = None
+
+
+def _load_models():
+    """Import DeepFace and build both models once per process."""
+    global _DeepFace, _facenet
+    from deepface import DeepFace
+
+    _facenet = DeepFace.build_model(MODEL_NAME)
+    try:
+        DeepFace.build_model(DETECTOR_BACKEND, task='face_detector')
+    except Exception:
+        pass   # older DeepFace builds the detector on first extract_faces()
+    _DeepFace = DeepFace
+
+
+def _decode(img_bytes):
+    """Single decode of the raw upload into the BGR array DeepFace expects."""
+    from .image import decode_image
+
+    return decode_image(img_bytes)
+
+
+def _detect(img_bytes):
+    """RetinaFace faces of one image: dicts with 'face' (aligned RGB crop), 'facial_area', 'confidence'."""
+    return _DeepFace.extract_faces(
+        img_path=_decode(img_bytes),
+        detector_backend=DETECTOR_BACKEND,
+        enforce_detection=True,
+        align=True,
+    )
+
+
+def _preprocess(face):
+    """One extract_faces() crop → a (1, h, w, 3) Facenet512 input, as DeepFace.represent builds it."""
+    from deepface.modules import preprocessing
+
+    height, width = _facenet.input_shape
+    img = face[:, :, ::-1]     # extract_faces returns RGB; represent() feeds the model BGR
+    img = preprocessing.resize_image(img=img, target_size=(width, height))
+    return preprocessing.normalize_input(img=img, normalization='base')
+
+
+def _embed(crops):
+    """Facenet512 embeddings of all crops, from a single predict() call."""
+    batch = np.concatenate([_preprocess(crop) for crop in crops])
+    return np.asarray(_facenet.model.predict(batch, verbose=0), dtype=np.float64)
+
+
+def _cosine_distance(a, b):
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(1.0 - np.dot(a, b) / norm) if norm > 0 else 1.0
+
+
+def _run_batch(jobs):
+    """
+    Run [(op, args), ...] and return [(ok, result_or_message), ...].
+
+    ops: 'ping' (), 'extract_faces' (img,), 'represent' (img,), 'verify' (img1, img2).
+    Each image is detected on its own; the crops of every represent/verify
+    job are then embedded together.
+    """
+    if _facenet is None:
+        try:
+            _load_models()
+        except Exception as e:
+            return [(False, f'Face models unavailable: {e}')] * len(jobs)
+
+    results = [None] * len(jobs)
+    crops   = []
+    spans   = []     # (job index, op, [(faces, first crop index), ...] per image)
+    for i, (op, args) in enumerate(jobs):
+        try:
+            if op == 'ping':
+                results[i] = (True, True)
+                continue
+            if op not in ('extract_faces', 'represent', 'verify'):
+                raise ValueError(f'Unknown face operation {op!r}.')
+            detected = [_detect(img_bytes) for img_bytes in args]
+        except Exception as e:
+            results[i] = (False, str(e))
+            continue
+        per_image = []
+        for faces in detected:
+            per_image.append((faces, len(crops)))
+            if op != 'extract_faces':
+                crops.extend(f['face'] for f in faces)
+        spans.append((i, op, per_image))
+
+    embeddings = None
+    if crops:
+        try:
+            embeddings = _embed(crops)
+        except Exception as e:
+            for i, op, _ in spans:
+                if op != 'extract_faces':
+                    results[i] = (False, str(e))
+
+    for i, op, per_image in spans:
+        if results[i] is not None:
+            continue
+        if op == 'extract_faces':
+            faces, _ = per_image[0]
+            # The cropped face arrays are not needed by callers — keep IPC small.
+            results[i] = (True, [
+                {'facial_area': f.get('facial_area'), 'confidence': f.get('confidence', 1.0)}
+                for f in faces
+            ])
+        elif op == 'represent':
+            faces, start = per_image[0]
+            results[i] = (True, [
+                {
+                    'embedding':       [float(v) for v in embeddings[start + k]],
+                    'facial_area':     f.get('facial_area'),
+                    'face_confidence': f.get('confidence'),
+                }
+                for k, f in enumerate(faces)
+            ])
+        else:
+            # Like DeepFace.verify: the closest pair of faces across both images.
+            (faces1, start1), (faces2, start2) = per_image
+            distance = min(
+                _cosine_distance(embeddings[start1 + a], embeddings[start2 + b])
+                for a in range(len(faces1)) for b in range(len(faces2))
+            )
+            results[i] = (True, {'verified': distance <= VERIFY_THRESHOLD, 'distance': distance})
+    return results
+
+
+class _Batcher:
+    """
+    Collects jobs into micro-batches and runs each batch with _run_batch on
+    one background thread.  reply(ok, value) is called once per job.
+    """
+
+    def __init__(self, batch_size=8, batch_window=0.01):
+        self.batch_size   = max(1, batch_size)
+        self.batch_window = max(0.0, batch_window)
+        self._queue       = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name='face-batcher', daemon=True)
+        self._thread.start()
+
+    def put(self, op, args, reply):
+        self._queue.put((op, args, reply))
+
+    def _next_batch(self):
+        batch    = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = _run_batch([(op, args) for op, args, _ in batch])
+            except Exception as e:
+                results = [(False, str(e))] * len(batch)
+            for (_, _, reply), (ok, value) in zip(batch, results):
+                try:
+                    reply(ok, value)
+                except Exception:
+                    logger.exception('Could not deliver a face job result')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# REQUEST-PROCESS SIDE
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _resolve(future, ok, value):
+    try:
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(FaceInferenceError(value))
+    except InvalidStateError:
+        pass   # already failed by a disconnect
+
+
+class InlineFacePool:
+    """Runs the models in this process (FACE_SERVER_SOCKET='')."""
+
+    def __init__(self, batch_size=8, batch_window=0.01):
+        self._batcher = _Batcher(batch_size, batch_window)
+
+    def submit(self, op, *args):
+        future = Future()
+        self._batcher.put(op, args, lambda ok, value: _resolve(future, ok, value))
+        return future
+
+
+class FaceServerClient:
+    """
+    This process's connection to the shared face server.  Jobs are sent as
+    (job_id, op, args); a reader thread resolves the Futures as the server's
+    (job_id, ok, value) replies come back, in whatever order.
+    """
+
+    def __init__(self, address, autostart=True):
+        self.address   = address
+        self.autostart = autostart
+        self._lock     = threading.Lock()
+        self._ids      = itertools.count()
+        self._conn     = None
+        self._pending  = None     # job_id → Future, for the current connection
+
+    def submit(self, op, *args):
+        future = Future()
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._connect()
+                job_id = next(self._ids)
+                self._pending[job_id] = future
+                self._conn.send((job_id, op, args))
+            except Exception as e:
+                self._disconnect(self._conn, e)
+                _resolve(future, False, f'Face server unavailable: {e}')
+        return future
+
+    def _connect(self):
+        from .server import connect
+
+        conn    = connect(self.address, autostart=self.autostart)
+        pending = {}
+        self._conn, self._pending = conn, pending
+        threading.Thread(
+            target=self._read_loop, args=(conn, pending), name='face-client-reader', daemon=True,
+        ).start()
+
+    def _read_loop(self, conn, pending):
+        while True:
+            try:
+                job_id, ok, value = conn.recv()
+            except Exception as e:
+                with self._lock:
+                    self._disconnect(conn, e)
+                return
+            future = pending.pop(job_id, None)
+            if future is not None:
+                _resolve(future, ok, value)
+
+    def _disconnect(self, conn, exc):
+        """Drop conn (caller holds the lock) and fail whatever was waiting on it."""
+        if conn is None or conn is not self._conn:
+            return
+        pending, self._conn, self._pending = self._pending, None, None
+        try:
+            conn.close()
+        except OSError:
+            pass
+        for future in list(pending.values()):
+            _resolve(future, False, f'Face server unavailable: {exc}')
+
+
+_pool      = None
+_pool_pid  = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return this process's face client (or inline pool), creating it on first use.
+    A forked worker gets its own: the parent's connection and threads do not survive fork.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                address = getattr(settings, 'FACE_SERVER_SOCKET', '')
+                if address:
+                    _pool = FaceServerClient(
+                        address, autostart=getattr(settings, 'FACE_SERVER_AUTOSTART', True),
+                    )
+                else:
+                    _pool = InlineFacePool(
+                        batch_size=int(getattr(settings, 'FACE_WORKER_BATCH_SIZE', 8)),
+                        batch_window=int(getattr(settings, 'FACE_WORKER_BATCH_WINDOW_MS', 10)) / 1000.0,
+                    )
+                _pool_pid = pid
+    return _pool
+
+
+def wait(future, timeout=None):
+    """Block on a job submitted via get_pool().submit() and return its result."""
+    if timeout is None:
+        timeout = getattr(settings, 'FACE_WORKER_TIMEOUT', 60)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise FaceInferenceError('Face processing timed out. Please try again.')
+
+
+def warm_up():
+    """
+    Connect to (or start) the face server and have it load both models now
+    instead of on the first punch.  Runs in the background and returns a
+    Future for the ping; nothing waits on it.
+    """
+    future = Future()
+
+    def _ping():
+        try:
+            future.set_result(wait(get_pool().submit('ping')))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_ping, name='face-warm-up', daemon=True).start()
+    return future
+
+
+def _call(op, *args, timeout=None):
+    return wait(get_pool().submit(op, *args), timeout=timeout)
+
+
+def represent(img_bytes, timeout=None):
+    """Facenet512 embeddings for every face in the image (RetinaFace detector)."""
+    return _call('represent', img_bytes, timeout=timeout)
+
+
+def extract_faces(img_bytes, timeout=None):
+    """Detected faces with 'facial_area' and 'confidence' (no pixel data)."""
+    return _call('extract_faces', img_bytes, timeout=timeout)
+
+
+def verify(img1_bytes, img2_bytes, timeout=None):
+    """{'verified': bool, 'distance': float} for two images (cosine metric)."""
+    return _call('verify', img1_bytes, img2_bytes, timeout=timeout)
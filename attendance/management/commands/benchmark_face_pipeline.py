@@ -0,0 +1,119 @@
+import io
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _legacy_prepare(raw_bytes):
+    """
+    The pre-pipeline punch path: EXIF-normalise and re-encode to a q95 JPEG,
+    write it to a temp file, and let the model decode it again from disk.
+    """
+    from PIL import Image, ImageOps
+
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(raw_bytes)))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=95)
+
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
+    try:
+        tmp.write(buf.getvalue())
+    finally:
+        tmp.close()
+    try:
+        try:
+            import cv2
+            arr = cv2.imread(tmp.name)              # what DeepFace does with a path
+        except ImportError:
+            arr = np.asarray(Image.open(tmp.name).convert('RGB'))[:, :, ::-1]
+    finally:
+        os.remove(tmp.name)
+    return tmp.name, arr
+
+
+def _pipeline_prepare(raw_bytes):
+    from attendance.face.image import decode_image
+
+    return decode_image(raw_bytes)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare face-punch image preparation latency: legacy re-encode + temp '
+        'file path vs the single-decode in-memory pipeline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('images', nargs='+', help='Sample selfie files (JPEG/PNG).')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--with-model', action='store_true',
+            help='Also run Facenet512/RetinaFace on each prepared image (needs deepface).',
+        )
+
+    def handle(self, *args, **options):
+        samples = []
+        for path in options['images']:
+            try:
+                with open(path, 'rb') as f:
+                    samples.append(f.read())
+            except OSError as e:
+                raise CommandError(f'Cannot read {path}: {e}')
+
+        represent = None
+        if options['with_model']:
+            from deepface import DeepFace
+
+            DeepFace.build_model('Facenet512')
+
+            def represent(img):
+                return DeepFace.represent(
+                    img_path=img,
+                    model_name='Facenet512',
+                    detector_backend='retinaface',
+                    enforce_detection=False,
+                    align=True,
+                )
+
+        def legacy(raw):
+            path, arr = _legacy_prepare(raw)
+            if represent:
+                represent(arr)
+
+        def pipeline(raw):
+            arr = _pipeline_prepare(raw)
+            if represent:
+                represent(arr)
+
+        # Warm-up (model build, allocator, page cache)
+        for raw in samples:
+            legacy(raw)
+            pipeline(raw)
+
+        results = {}
+        for name, fn in (('legacy', legacy), ('pipeline', pipeline)):
+            timings = []
+            for _ in range(options['iterations']):
+                for raw in samples:
+                    start = time.perf_counter()
+                    fn(raw)
+                    timings.append((time.perf_counter() - start) * 1000)
+            results[name] = timings
+
+        scope = 'end-to-end (prepare + model)' if represent else 'image preparation only'
+        self.stdout.write(f'Face punch latency, {scope}, {len(samples)} image(s) × {options["iterations"]} runs')
+        for name, timings in results.items():
+            timings.sort()
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            self.stdout.write(
+                f'  {name:<9} mean {statistics.mean(timings):8.2f} ms   '
+                f'p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms'
+            )
+        speedup = statistics.mean(results['legacy']) / max(statistics.mean(results['pipeline']), 1e-9)
+        self.stdout.write(self.style.SUCCESS(f'Pipeline speed-up: {speedup:.2f}×'))
@@ -0,0 +1,89 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Top-level packages that must never be imported by django.setup() + URLconf.
+HEAVY_MODULES = ('tensorflow', 'keras', 'tf_keras', 'deepface', 'retinaface', 'torch', 'cv2')
+
+# Runs in a fresh interpreter so nothing is already imported.
+_PROBE = r'''
+import json, resource, sys, time
+
+heavy = set(sys.argv[1].split(','))
+start = time.perf_counter()
+
+import django
+django.setup()
+from django.conf import settings
+from django.urls import get_resolver
+get_resolver(settings.ROOT_URLCONF).url_patterns    # imports every app's views
+setup_ms = (time.perf_counter() - start) * 1000
+
+if sys.argv[2] == '1':
+    from deepface import DeepFace
+    DeepFace.build_model('Facenet512')
+
+print(json.dumps({
+    'setup_ms': setup_ms,
+    'total_ms': (time.perf_counter() - start) * 1000,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    'heavy': sorted(m for m in sys.modules if m.split('.')[0] in heavy),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure django.setup() + URLconf import time and memory in a fresh '
+        'interpreter, and fail if it imports TensorFlow / DeepFace / OpenCV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument(
+            '--with-model', action='store_true',
+            help='Also import DeepFace and build Facenet512, to show the cost being avoided.',
+        )
+
+    def _probe(self, with_model):
+        # manage.py has already put DJANGO_SETTINGS_MODULE in the environment.
+        proc = subprocess.run(
+            [sys.executable, '-c', _PROBE, ','.join(HEAVY_MODULES), '1' if with_model else '0'],
+            cwd=str(settings.BASE_DIR), env=dict(os.environ), capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f'Probe interpreter failed:\n{proc.stderr.strip()}')
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        runs = [self._probe(False) for _ in range(max(1, options['iterations']))]
+
+        setup_ms = [r['setup_ms'] for r in runs]
+        rss_mb   = [r['max_rss_mb'] for r in runs]
+        self.stdout.write(f'django.setup() + URLconf, {len(runs)} fresh interpreter(s)')
+        self.stdout.write(
+            f'  time  median {statistics.median(setup_ms):8.1f} ms   '
+            f'min {min(setup_ms):8.1f} ms   max {max(setup_ms):8.1f} ms'
+        )
+        self.stdout.write(f'  RSS   median {statistics.median(rss_mb):8.1f} MB')
+
+        if options['with_model']:
+            run = self._probe(True)
+            self.stdout.write(
+                f'  with DeepFace + Facenet512: {run["total_ms"]:8.1f} ms, '
+                f'{run["max_rss_mb"]:.1f} MB RSS'
+            )
+
+        heavy = sorted({m for r in runs for m in r['heavy']})
+        if heavy:
+            raise CommandError(
+                'django.setup() imported face/ML modules: ' + ', '.join(heavy[:20])
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'OK: no TensorFlow / DeepFace / OpenCV modules imported at start-up.'
+        ))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance import rollups
+
+from .rebuild_attendance_rollups import add_range_arguments, parse_range
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare AttendanceDailyRollup rows with the raw Attendance table and '
+        'report (or, with --fix, repair) every tenant-day that disagrees.'
+    )
+
+    def add_arguments(self, parser):
+        add_range_arguments(parser)
+        parser.add_argument('--fix', action='store_true', help='Recompute the drifted days.')
+
+    def handle(self, *args, **options):
+        start, end = parse_range(options)
+        drift = rollups.find_drift(start, end, admin_owner_id=options['tenant'])
+
+        for admin_owner_id, day, stored, actual in drift[:50]:
+            self.stdout.write(f'  tenant {admin_owner_id}  {day}  stored={stored}  actual={actual}')
+        if len(drift) > 50:
+            self.stdout.write(f'  … and {len(drift) - 50} more')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f'OK: rollups match attendance for {start} … {end}.'))
+            return
+
+        if options['fix']:
+            by_owner = {}
+            for admin_owner_id, day, _, _ in drift:
+                by_owner.setdefault(admin_owner_id, []).append(day)
+            for admin_owner_id, days in by_owner.items():
+                rollups.refresh(admin_owner_id, days)
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} tenant-day(s).'))
+            return
+
+        raise CommandError(f'{len(drift)} tenant-day(s) out of sync; re-run with --fix.')
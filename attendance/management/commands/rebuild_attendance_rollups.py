@@ -0,0 +1,45 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from attendance import rollups
+from attendance.models import Attendance
+
+
+def parse_range(options):
+    """(start, end) from --from / --to, defaulting to the span of Attendance rows."""
+    try:
+        start = date.fromisoformat(options['from']) if options['from'] else None
+        end   = date.fromisoformat(options['to'])   if options['to']   else None
+    except ValueError:
+        raise CommandError('Dates must be YYYY-MM-DD.')
+
+    if start is None or end is None:
+        span = Attendance.objects.aggregate(first=Min('date'), last=Max('date'))
+        start = start or span['first'] or timezone.localdate()
+        end   = end   or max(span['last'] or start, timezone.localdate())
+    if end < start:
+        raise CommandError('--to is before --from.')
+    return start, end
+
+
+def add_range_arguments(parser):
+    parser.add_argument('--from', dest='from', help='First day (YYYY-MM-DD). Default: earliest attendance.')
+    parser.add_argument('--to', dest='to', help='Last day (YYYY-MM-DD). Default: today.')
+    parser.add_argument('--tenant', type=int, help='Only this admin_owner id.')
+
+
+class Command(BaseCommand):
+    help = 'Recompute AttendanceDailyRollup rows from the raw Attendance table.'
+
+    def add_arguments(self, parser):
+        add_range_arguments(parser)
+
+    def handle(self, *args, **options):
+        start, end = parse_range(options)
+        written = rollups.rebuild(start, end, admin_owner_id=options['tenant'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} rollup row(s) for {start} … {end}.'
+        ))
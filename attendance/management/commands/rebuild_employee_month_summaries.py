@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from attendance import rollups
+
+from .rebuild_attendance_rollups import add_range_arguments, parse_range
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute EmployeeMonthSummary rows for every month overlapping the '
+        'range from the raw Attendance and LeaveRequest tables.'
+    )
+
+    def add_arguments(self, parser):
+        add_range_arguments(parser)
+
+    def handle(self, *args, **options):
+        start, end = parse_range(options)
+        for year, month in rollups.months_between(start, end):
+            written = rollups.rebuild_month_summaries(year, month, admin_owner_id=options['tenant'])
+            self.stdout.write(f'  {year}-{month:02d}  {written} summary row(s)')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt month summaries for {start} … {end}.'))
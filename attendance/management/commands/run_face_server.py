@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the shared face-inference server (RetinaFace + Facenet512) that '
+        'every web worker sends its face jobs to; see attendance/face/server.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket', default=None,
+            help='Socket path to listen on (default: FACE_SERVER_SOCKET).',
+        )
+
+    def handle(self, *args, **options):
+        from attendance.face.server import serve
+
+        address = options['socket'] or getattr(settings, 'FACE_SERVER_SOCKET', '')
+        if not address:
+            raise CommandError('FACE_SERVER_SOCKET is empty: face inference runs inside each web worker.')
+        if serve(address) is False:
+            self.stdout.write(f'A face server is already running on {address}.')
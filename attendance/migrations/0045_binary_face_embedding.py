@@ -0,0 +1,50 @@
+import json
+import struct
+
+from django.db import migrations, models
+
+
+def json_to_float32(apps, schema_editor):
+    EmployeeFaceData = apps.get_model('attendance', 'EmployeeFaceData')
+    rows = EmployeeFaceData.objects.exclude(face_embedding__isnull=True).exclude(face_embedding='')
+    for row in rows.iterator():
+        try:
+            values = [float(v) for v in json.loads(row.face_embedding)]
+        except (TypeError, ValueError):
+            continue   # corrupt JSON — left empty, re-computed on next punch
+        row.face_embedding_bin = struct.pack(f'<{len(values)}f', *values)
+        row.save(update_fields=['face_embedding_bin'])
+
+
+def float32_to_json(apps, schema_editor):
+    EmployeeFaceData = apps.get_model('attendance', 'EmployeeFaceData')
+    for row in EmployeeFaceData.objects.exclude(face_embedding_bin__isnull=True).iterator():
+        raw = bytes(row.face_embedding_bin)
+        values = struct.unpack(f'<{len(raw) // 4}f', raw)
+        row.face_embedding = json.dumps(list(values))
+        row.save(update_fields=['face_embedding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0044_add_net_working_hours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeefacedata',
+            name='face_embedding_bin',
+            field=models.BinaryField(blank=True, help_text='Facenet512 embedding vector as raw float32 bytes (512 × 4).', null=True),
+        ),
+        migrations.RunPython(json_to_float32, float32_to_json),
+        migrations.RemoveField(
+            model_name='employeefacedata',
+            name='face_embedding',
+        ),
+        migrations.RenameField(
+            model_name='employeefacedata',
+            old_name='face_embedding_bin',
+            new_name='face_embedding',
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0045_binary_face_embedding'),
+        ('master', '0015_announcement_duration_days'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['admin_owner', 'date', 'status'], name='att_owner_date_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='earlydeparturerequest',
+            index=models.Index(fields=['admin_owner', 'date'], name='early_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='earlydeparturerequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['admin_owner', '-created_at'], name='early_owner_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='latearrivalrequest',
+            index=models.Index(fields=['admin_owner', 'date'], name='late_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='latearrivalrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['admin_owner', '-created_at'], name='late_owner_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['user', 'status', 'start_date', 'end_date'], name='leave_user_status_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['admin_owner', '-created_at'], name='leave_owner_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryadvancerequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['admin_owner', '-created_at'], name='advance_owner_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wfhrequest',
+            index=models.Index(fields=['admin_owner', 'date'], name='wfh_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wfhrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['admin_owner', '-created_at'], name='wfh_owner_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceDailyRollup = apps.get_model('attendance', 'AttendanceDailyRollup')
+
+    counts = {s: models.Count('id', filter=models.Q(status=s))
+              for s in ('present', 'absent', 'late', 'half_day', 'leave')}
+    rows = (
+        Attendance.objects
+        .filter(admin_owner__isnull=False)
+        .order_by()
+        .values('admin_owner_id', 'date')
+        .annotate(
+            wfh=models.Count('id', filter=models.Q(is_wfh=True)),
+            total=models.Count('id'),
+            total_hours=models.Sum('total_hours'),
+            **counts,
+        )
+    )
+    AttendanceDailyRollup.objects.bulk_create(
+        (AttendanceDailyRollup(**{**row, 'total_hours': row['total_hours'] or 0}) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0046_tenant_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('half_day', models.PositiveIntegerField(default=0)),
+                ('leave', models.PositiveIntegerField(default=0)),
+                ('wfh', models.PositiveIntegerField(default=0, help_text='Rows with is_wfh set, any status.')),
+                ('total', models.PositiveIntegerField(default=0, help_text='All attendance rows for the day.')),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('admin_owner', models.ForeignKey(help_text='The admin/tenant these counts belong to.', on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Attendance Daily Rollup',
+                'verbose_name_plural': 'Attendance Daily Rollups',
+                'ordering': ['-date'],
+                'unique_together': {('admin_owner', 'date')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
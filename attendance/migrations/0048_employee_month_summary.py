@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0047_attendance_daily_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeMonthSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('half_day', models.PositiveIntegerField(default=0)),
+                ('leave', models.PositiveIntegerField(default=0)),
+                ('wfh', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0, help_text='Attendance rows in the month.')),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0.0, max_digits=8)),
+                ('net_hours', models.DecimalField(decimal_places=2, default=0.0, max_digits=8)),
+                ('break_days', models.PositiveIntegerField(default=0, help_text='Days with any break recorded.')),
+                ('break_minutes', models.PositiveIntegerField(default=0)),
+                ('leave_by_type', models.JSONField(blank=True, default=dict, help_text='{leave_type: {"count", "days"}} for approved leave overlapping the month.')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When these figures were last recomputed.')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_month_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Employee Month Summary',
+                'verbose_name_plural': 'Employee Month Summaries',
+                'ordering': ['-year', '-month'],
+                'unique_together': {('user', 'year', 'month')},
+            },
+        ),
+    ]
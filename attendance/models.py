@@ -87,10 +87,25 @@ class Attendance(models.Model):
         ordering = ['-date', '-check_in_time']
         unique_together = ['user', 'date']
         verbose_name_plural = 'Attendances'
+        indexes = [
+            # Tenant dashboards: one day / a date range, counted by status.
+            # Per-user month queries are served by the (user, date) unique index.
+            models.Index(fields=['admin_owner', 'date', 'status'], name='att_owner_date_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.date} - {self.status}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from .rollups import loaded_state
+
+        instance = super().from_db(db, field_names, values)
+        # The aggregated fields as loaded — lets the rollup signal apply
+        # just this row's difference when it is saved or deleted.
+        instance._rollup_state = loaded_state(instance)
+        return instance
+
     def get_check_in_map_url(self):
         if self.check_in_latitude and self.check_in_longitude:
             return f"https://www.google.com/maps?q={self.check_in_latitude},{self.check_in_longitude}"
@@ -211,6 +226,13 @@ class LateArrivalRequest(models.Model):
         verbose_name = 'Late Arrival Request'
         verbose_name_plural = 'Late Arrival Requests'
         unique_together = ['user', 'date']
+        indexes = [
+            models.Index(fields=['admin_owner', 'date'], name='late_owner_date_idx'),
+            models.Index(
+                fields=['admin_owner', '-created_at'], name='late_owner_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.date} @ {self.expected_arrival_time} ({self.status})"
@@ -274,10 +296,30 @@ class LeaveRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Leave Request'
         verbose_name_plural = 'Leave Requests'
+        indexes = [
+            # Approved leave overlapping a date / month for a user
+            models.Index(fields=['user', 'status', 'start_date', 'end_date'], name='leave_user_status_dates_idx'),
+            models.Index(
+                fields=['admin_owner', '-created_at'], name='leave_owner_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.leave_type} - {self.start_date} to {self.end_date} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # (user, start, end) as loaded — the month summaries of the old range
+        # are refreshed too when a leave is moved.
+        instance._loaded_summary_key = (
+            instance.__dict__.get('user_id'),
+            instance.__dict__.get('start_date'),
+            instance.__dict__.get('end_date'),
+        )
+        return instance
+
     @property
     def total_days(self):
         if self.start_date and self.end_date:
@@ -401,6 +443,13 @@ class EarlyDepartureRequest(models.Model):
         verbose_name = 'Early Departure Request'
         verbose_name_plural = 'Early Departure Requests'
         unique_together = ['user', 'date']
+        indexes = [
+            models.Index(fields=['admin_owner', 'date'], name='early_owner_date_idx'),
+            models.Index(
+                fields=['admin_owner', '-created_at'], name='early_owner_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -419,13 +468,15 @@ class EmployeeFaceData(models.Model):
     )
     reference_image = models.ImageField(upload_to='face_data/')
 
-    # Pre-computed Facenet512 embedding stored as a JSON array of 512 floats.
-    # Populated automatically when a face is registered via register-face.
-    # At punch time we do a single cosine-distance calculation instead of
-    # running DeepFace.verify() (which reloads the model on every request).
-    face_embedding = models.TextField(
+    # Pre-computed Facenet512 embedding stored as raw little-endian float32
+    # bytes (512 × 4 = 2 KB).  Populated automatically when a face is
+    # registered via register-face.  At punch time we do a single
+    # cosine-distance calculation instead of running DeepFace.verify()
+    # (which reloads the model on every request).  Use the `embedding`
+    # property rather than touching the bytes directly.
+    face_embedding = models.BinaryField(
         null=True, blank=True,
-        help_text="JSON-serialised Facenet512 embedding vector (512 floats).",
+        help_text="Facenet512 embedding vector as raw float32 bytes (512 × 4).",
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -433,7 +484,38 @@ class EmployeeFaceData(models.Model):
 
     def __str__(self):
         return f"Face Data for {self.user.username}"
-    
+
+    EMBEDDING_DTYPE = '<f4'
+
+    @classmethod
+    def decode_embedding(cls, raw):
+        """
+        Return a zero-copy, read-only float32 view over stored embedding
+        bytes, or None when nothing is stored.
+        """
+        import numpy as np
+
+        if not raw:
+            return None
+        return np.frombuffer(raw, dtype=cls.EMBEDDING_DTYPE)
+
+    @classmethod
+    def encode_embedding(cls, vector):
+        """Serialise a sequence of floats to the stored float32 byte format."""
+        import numpy as np
+
+        if vector is None:
+            return None
+        return np.asarray(vector, dtype=cls.EMBEDDING_DTYPE).tobytes()
+
+    @property
+    def embedding(self):
+        return self.decode_embedding(self.face_embedding)
+
+    @embedding.setter
+    def embedding(self, vector):
+        self.face_embedding = self.encode_embedding(vector)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # ADD THIS CLASS to the bottom of your existing models.py
 # ─────────────────────────────────────────────────────────────────────────────
@@ -491,6 +573,12 @@ class SalaryAdvanceRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Salary Advance Request'
         verbose_name_plural = 'Salary Advance Requests'
+        indexes = [
+            models.Index(
+                fields=['admin_owner', '-created_at'], name='advance_owner_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -545,6 +633,153 @@ class WFHRequest(models.Model):
         verbose_name = 'WFH Request'
         verbose_name_plural = 'WFH Requests'
         unique_together = ['user', 'date']
+        indexes = [
+            models.Index(fields=['admin_owner', 'date'], name='wfh_owner_date_idx'),
+            models.Index(
+                fields=['admin_owner', '-created_at'], name='wfh_owner_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} – WFH {self.date} ({self.status})"
+
+
+class AttendanceDailyRollup(models.Model):
+    """
+    Attendance counts for one tenant and one day, read by the admin
+    dashboards instead of the raw Attendance rows.
+
+    Maintained by attendance/rollups.py from the Attendance signals below —
+    never edit rows by hand; use the rebuild_attendance_rollups command.
+    """
+    admin_owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='attendance_rollups',
+        help_text="The admin/tenant these counts belong to.",
+    )
+    date = models.DateField()
+
+    present  = models.PositiveIntegerField(default=0)
+    absent   = models.PositiveIntegerField(default=0)
+    late     = models.PositiveIntegerField(default=0)
+    half_day = models.PositiveIntegerField(default=0)
+    leave    = models.PositiveIntegerField(default=0)
+    wfh      = models.PositiveIntegerField(default=0, help_text='Rows with is_wfh set, any status.')
+    total    = models.PositiveIntegerField(default=0, help_text='All attendance rows for the day.')
+    total_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['admin_owner', 'date']
+        verbose_name = 'Attendance Daily Rollup'
+        verbose_name_plural = 'Attendance Daily Rollups'
+
+    def __str__(self):
+        return f"{self.admin_owner_id} – {self.date} ({self.total})"
+
+
+class EmployeeMonthSummary(models.Model):
+    """
+    One login account's attendance for one month, read by payroll and the
+    policy scanner instead of re-aggregating Attendance / LeaveRequest rows.
+
+    Maintained by attendance/rollups.py from the Attendance and LeaveRequest
+    signals below; missing rows are computed on first read.  Recompute with
+    the rebuild_employee_month_summaries command.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='attendance_month_summaries',
+    )
+    year  = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+
+    present  = models.PositiveIntegerField(default=0)
+    absent   = models.PositiveIntegerField(default=0)
+    late     = models.PositiveIntegerField(default=0)
+    half_day = models.PositiveIntegerField(default=0)
+    leave    = models.PositiveIntegerField(default=0)
+    wfh      = models.PositiveIntegerField(default=0)
+    total    = models.PositiveIntegerField(default=0, help_text='Attendance rows in the month.')
+
+    total_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    net_hours   = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+
+    break_days    = models.PositiveIntegerField(default=0, help_text='Days with any break recorded.')
+    break_minutes = models.PositiveIntegerField(default=0)
+
+    leave_by_type = models.JSONField(
+        default=dict, blank=True,
+        help_text='{leave_type: {"count", "days"}} for approved leave overlapping the month.',
+    )
+
+    updated_at = models.DateTimeField(auto_now=True, help_text='When these figures were last recomputed.')
+
+    class Meta:
+        ordering = ['-year', '-month']
+        unique_together = ['user', 'year', 'month']
+        verbose_name = 'Employee Month Summary'
+        verbose_name_plural = 'Employee Month Summaries'
+
+    def __str__(self):
+        return f"{self.user_id} – {self.year}-{self.month:02d}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SIGNALS — keep the cached total-requests counters, tenant config and
+# attendance rollups fresh
+# ─────────────────────────────────────────────────────────────────────────────
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+def refresh_leave_month_summaries(sender, instance, **kwargs):
+    """Recompute the month summaries a leave request's date range covers."""
+    from . import rollups
+    rollups.leave_changed(instance, kwargs.get('update_fields'))
+
+
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+@receiver(post_save, sender=LateArrivalRequest)
+@receiver(post_delete, sender=LateArrivalRequest)
+@receiver(post_save, sender=EarlyDepartureRequest)
+@receiver(post_delete, sender=EarlyDepartureRequest)
+@receiver(post_save, sender=WFHRequest)
+@receiver(post_delete, sender=WFHRequest)
+@receiver(post_save, sender=SalaryAdvanceRequest)
+@receiver(post_delete, sender=SalaryAdvanceRequest)
+def invalidate_request_counters(sender, instance, **kwargs):
+    """Drop the tenant's cached request counts whenever a request changes."""
+    from .stats import invalidate_request_counts
+    invalidate_request_counts(instance.admin_owner_id)
+
+
+@receiver(post_save, sender=AttendanceSettings)
+@receiver(post_delete, sender=AttendanceSettings)
+def invalidate_attendance_settings_cache(sender, instance, **kwargs):
+    """Drop the tenant's cached configuration when its settings change."""
+    from login.tenant_cache import invalidate_tenant_config
+    invalidate_tenant_config(instance.admin_owner_id)
+
+
+@receiver(post_save, sender=Attendance)
+def refresh_attendance_rollups(sender, instance, created=False, **kwargs):
+    """Apply the save to the tenant-day rollup(s) and month summary the row touches."""
+    from . import rollups
+    rollups.attendance_changed(instance, kwargs.get('update_fields'), created)
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_from_attendance_rollups(sender, instance, **kwargs):
+    """Take a deleted row out of its tenant-day rollup and month summary."""
+    from . import rollups
+    rollups.attendance_deleted(instance)
@@ -0,0 +1,648 @@
+# attendance/rollups.py
+"""
+Incrementally maintained attendance aggregates.
+
+AttendanceDailyRollup — per tenant, per day
+    The admin dashboards (attendance-trend, today-summary,
+    attendance-percentage) used to aggregate raw Attendance rows on every
+    load — O(employees × days).  They now read O(days) rollup rows.
+
+EmployeeMonthSummary — per login account, per month
+    Status counts, hours, break days and approved leave by type, read by
+    payroll (_get_attendance_summary, PayrollBatchCalculator) and the
+    policy scanner instead of re-aggregating the month per employee.
+    month_summaries() computes and stores any that are missing.
+
+Maintenance:
+
+  * Attendance.from_db() snapshots the fields the aggregates read
+    (SNAPSHOT_FIELDS).  The post_save / post_delete receivers (models.py)
+    call attendance_changed() / attendance_deleted(), which subtract the
+    row as loaded, add the row as saved and apply the difference with one
+    `UPDATE … SET present = present + 1, …` per touched tenant-day and
+    user-month — no aggregate query and no SELECT … FOR UPDATE on the
+    punch path.  A status change or a moved date is just a different
+    difference.  Break records reach the summaries through the
+    Attendance.total_break_minutes save that follows every break change.
+  * The first row of a tenant-day has no rollup to update; that day is
+    recomputed from the raw rows (refresh()).  A missing month summary is
+    left alone — month_summaries() computes it on first read.
+  * A save with nothing to diff against (a row loaded with .only() /
+    .defer() on these fields) falls back to recomputing the day and month.
+    LeaveRequest saves recompute the month summaries (leave_changed()).
+  * Paths that write many rows in one go (leave approval, manual marking)
+    wrap the writes in `with rollups.deferred():` so the differences are
+    summed and each day / month is written once at the end.
+  * QuerySet.update() / bulk_create() bypass signals; callers using them
+    must call refresh() / refresh_month_summaries() for what they touched.
+    Anything that slips through is found and repaired by
+    check_attendance_rollups --fix.
+
+Repair / audit:
+
+    python manage.py rebuild_attendance_rollups [--from YYYY-MM-DD] [--to ...]
+    python manage.py check_attendance_rollups  [--from ...] [--fix]
+    python manage.py rebuild_employee_month_summaries [--from ...] [--to ...]
+
+Rows without an admin_owner are not rolled up daily; the dashboards read the
+raw table for them.
+"""
+
+import calendar
+import contextvars
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .stats import STATUSES
+
+COUNT_FIELDS = STATUSES + ('wfh', 'total')
+VALUE_FIELDS = COUNT_FIELDS + ('total_hours',)
+
+MONTH_VALUE_FIELDS = COUNT_FIELDS + (
+    'total_hours', 'net_hours', 'break_days', 'break_minutes', 'leave_by_type',
+)
+
+# Attendance columns the rollups and month summaries are built from.
+SNAPSHOT_FIELDS = (
+    'admin_owner_id', 'user_id', 'date', 'status', 'is_wfh',
+    'total_hours', 'net_working_hours', 'total_break_minutes',
+)
+LEAVE_SOURCE_FIELDS = frozenset({
+    'status', 'leave_type', 'start_date', 'end_date', 'user', 'user_id',
+})
+
+_pending = contextvars.ContextVar('attendance_rollups_pending', default=None)
+
+
+def _empty_values():
+    values = dict.fromkeys(COUNT_FIELDS, 0)
+    values['total_hours'] = Decimal('0.00')
+    return values
+
+
+def compute(admin_owner_id, start, end):
+    """
+    {date: {present, absent, late, half_day, leave, wfh, total, total_hours}}
+    aggregated from raw Attendance rows of the tenant in [start, end].
+    Days without rows are absent.
+    """
+    from .models import Attendance
+
+    aggregates = {s: Count('id', filter=Q(status=s)) for s in STATUSES}
+    aggregates['wfh']         = Count('id', filter=Q(is_wfh=True))
+    aggregates['total']       = Count('id')
+    aggregates['total_hours'] = Sum('total_hours')
+
+    rows = (
+        Attendance.objects
+        .filter(admin_owner_id=admin_owner_id, date__gte=start, date__lte=end)
+        .order_by()
+        .values('date')
+        .annotate(**aggregates)
+    )
+    result = {}
+    for row in rows:
+        day = row.pop('date')
+        row['total_hours'] = Decimal(row['total_hours'] or 0).quantize(Decimal('0.01'))
+        result[day] = row
+    return result
+
+
+def refresh(admin_owner_id, dates):
+    """Recompute the tenant's rollup rows for the given dates."""
+    from .models import AttendanceDailyRollup
+
+    dates = sorted(set(dates))
+    if admin_owner_id is None or not dates:
+        return
+
+    with transaction.atomic():
+        # Create missing rows, then lock them all before aggregating: two
+        # requests refreshing the same tenant-day queue on the lock, and the
+        # second one's aggregate sees the first one's committed writes.
+        AttendanceDailyRollup.objects.bulk_create(
+            [AttendanceDailyRollup(admin_owner_id=admin_owner_id, date=d) for d in dates],
+            ignore_conflicts=True,
+        )
+        rollups = list(
+            AttendanceDailyRollup.objects
+            .select_for_update()
+            .filter(admin_owner_id=admin_owner_id, date__in=dates)
+        )
+        values = compute(admin_owner_id, dates[0], dates[-1])
+
+        # Days left without attendance lose their rollup (this is also what
+        # a cascade delete of the tenant needs).
+        empty = [r.pk for r in rollups if r.date not in values]
+        if empty:
+            AttendanceDailyRollup.objects.filter(pk__in=empty).delete()
+
+        now = timezone.now()
+        rollups = [r for r in rollups if r.date in values]
+        for rollup in rollups:
+            rollup.updated_at = now
+            for field, value in values[rollup.date].items():
+                setattr(rollup, field, value)
+        AttendanceDailyRollup.objects.bulk_update(rollups, VALUE_FIELDS + ('updated_at',))
+
+
+def _refresh_days(keys):
+    by_owner = {}
+    for admin_owner_id, day in keys:
+        if admin_owner_id is not None and day is not None:
+            by_owner.setdefault(admin_owner_id, set()).add(day)
+    for admin_owner_id, days in by_owner.items():
+        refresh(admin_owner_id, days)
+
+
+def _refresh_months(keys):
+    by_month = {}
+    for user_id, year, month in keys:
+        if user_id is not None:
+            by_month.setdefault((year, month), set()).add(user_id)
+    for (year, month), user_ids in sorted(by_month.items()):
+        refresh_month_summaries(user_ids, year, month)
+
+
+def _schedule(days=(), months=()):
+    pending = _pending.get()
+    if pending is not None:
+        pending['days'].update(days)
+        pending['months'].update(months)
+    else:
+        _refresh_days(days)
+        _refresh_months(months)
+
+
+def _schedule_deltas(day_deltas, month_deltas):
+    pending = _pending.get()
+    if pending is not None:
+        _merge(pending['day_deltas'], day_deltas)
+        _merge(pending['month_deltas'], month_deltas)
+    else:
+        _apply_day_deltas(day_deltas)
+        _apply_month_deltas(month_deltas)
+
+
+@contextmanager
+def deferred():
+    """
+    Collect rollup / month-summary refreshes triggered inside the block and
+    run them once, per tenant and per month, when it exits.  Nested blocks
+    join the outermost one.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+
+    pending = {'days': set(), 'months': set(), 'day_deltas': {}, 'month_deltas': {}}
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+        # A failed statement leaves the transaction unusable; it is about to
+        # be rolled back anyway, together with the writes that dirtied these keys.
+        if not connection.needs_rollback:
+            # Differences first: a recompute of the same key then overrides them.
+            _apply_day_deltas(pending['day_deltas'])
+            _apply_month_deltas(pending['month_deltas'])
+            _refresh_days(pending['days'])
+            _refresh_months(pending['months'])
+
+
+def _as_date(value):
+    # Attendance.date defaults to timezone.now, so an unsaved-then-saved row
+    # can still hold a datetime.
+    from .models import Attendance
+
+    if isinstance(value, datetime) or (value is not None and not isinstance(value, date)):
+        return Attendance._meta.get_field('date').to_python(value)
+    return value
+
+
+def loaded_state(attendance):
+    """SNAPSHOT_FIELDS of a row just loaded from the database, or None if any was deferred."""
+    values = attendance.__dict__
+    if any(field not in values for field in SNAPSHOT_FIELDS):
+        return None
+    return _normalize({field: values[field] for field in SNAPSHOT_FIELDS})
+
+
+def _normalize(state):
+    state['date'] = _as_date(state['date'])
+    state['is_wfh'] = bool(state['is_wfh'])
+    for field in ('total_hours', 'net_working_hours'):
+        state[field] = Decimal(str(state[field] or 0)).quantize(Decimal('0.01'))
+    state['total_break_minutes'] = int(state['total_break_minutes'] or 0)
+    return state
+
+
+def _saved_state(attendance, loaded, update_fields):
+    """The row as it now is in the database: all fields, or only update_fields over `loaded`."""
+    values = attendance.__dict__
+    if loaded is None or update_fields is None:
+        return _normalize({field: values.get(field) for field in SNAPSHOT_FIELDS})
+    state = dict(loaded)
+    for name in update_fields:
+        attname = type(attendance)._meta.get_field(name).attname
+        if attname in SNAPSHOT_FIELDS:
+            state[attname] = values.get(attname)
+    return _normalize(state)
+
+
+def _counts(state):
+    values = {s: int(state['status'] == s) for s in STATUSES}
+    values['wfh'] = int(state['is_wfh'])
+    values['total'] = 1
+    values['total_hours'] = state['total_hours']
+    return values
+
+
+def _add(deltas, key, values, sign):
+    delta = deltas.setdefault(key, {})
+    for field, value in values.items():
+        delta[field] = delta.get(field, 0) + sign * value
+
+
+def _merge(into, deltas):
+    for key, values in deltas.items():
+        _add(into, key, values, 1)
+
+
+def _diff(before, after):
+    """({(owner, date): delta}, {(user, year, month): delta}) taking the row from before to after."""
+    day_deltas, month_deltas = {}, {}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None or state['date'] is None:
+            continue
+        counts = _counts(state)
+        if state['admin_owner_id'] is not None:
+            _add(day_deltas, (state['admin_owner_id'], state['date']), counts, sign)
+        if state['user_id'] is not None:
+            minutes = state['total_break_minutes']
+            _add(month_deltas, (state['user_id'], state['date'].year, state['date'].month), dict(
+                counts,
+                net_hours=state['net_working_hours'],
+                break_days=int(minutes > 0),
+                break_minutes=minutes,
+            ), sign)
+    return day_deltas, month_deltas
+
+
+def _recompute(state):
+    if state['date'] is not None:
+        _schedule(
+            days={(state['admin_owner_id'], state['date'])},
+            months={(state['user_id'], state['date'].year, state['date'].month)},
+        )
+
+
+def attendance_changed(attendance, update_fields=None, created=False):
+    """
+    Apply an Attendance save to the tenant-day rollup and user-month
+    summary: minus the row as loaded, plus the row as saved.
+    """
+    loaded = None if created else getattr(attendance, '_rollup_state', None)
+    saved = _saved_state(attendance, loaded, update_fields)
+    attendance._rollup_state = saved
+    if loaded is None and not created:
+        _recompute(saved)       # nothing to diff against
+        return
+    _schedule_deltas(*_diff(loaded, saved))
+
+
+def attendance_deleted(attendance):
+    """Take a deleted Attendance row back out of its rollup and month summary."""
+    loaded = getattr(attendance, '_rollup_state', None)
+    if loaded is None:
+        _recompute(_saved_state(attendance, None, None))
+        return
+    _schedule_deltas(*_diff(loaded, None))
+
+
+def _increments(delta):
+    """{field: F(field) + change} for the non-zero changes; counts never drop below 0."""
+    updates = {}
+    for field, change in delta.items():
+        if not change:
+            continue
+        expression = F(field) + change
+        updates[field] = Greatest(expression, 0) if change < 0 else expression
+    return updates
+
+
+def _apply_day_deltas(deltas):
+    from .models import AttendanceDailyRollup
+
+    missing = []
+    now = timezone.now()
+    for (admin_owner_id, day), delta in deltas.items():
+        updates = _increments(delta)
+        if not updates:
+            continue
+        rollup = AttendanceDailyRollup.objects.filter(admin_owner_id=admin_owner_id, date=day)
+        if not rollup.update(updated_at=now, **updates):
+            missing.append((admin_owner_id, day))
+        elif delta.get('total', 0) < 0:
+            rollup.filter(total=0).delete()     # the day's last row is gone
+    _refresh_days(missing)
+
+
+def _apply_month_deltas(deltas):
+    from .models import EmployeeMonthSummary
+
+    now = timezone.now()
+    for (user_id, year, month), delta in deltas.items():
+        updates = _increments(delta)
+        if updates:
+            EmployeeMonthSummary.objects.filter(
+                user_id=user_id, year=year, month=month,
+            ).update(updated_at=now, **updates)
+
+
+def months_between(start, end):
+    if not start or not end or end < start:
+        return []
+    months, (year, month) = [], (start.year, start.month)
+    while (year, month) <= (end.year, end.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def leave_changed(leave_request, update_fields=None):
+    """Refresh the month summaries a leave request covers (now and as loaded)."""
+    if update_fields is not None and LEAVE_SOURCE_FIELDS.isdisjoint(update_fields):
+        return
+    current = (leave_request.user_id, leave_request.start_date, leave_request.end_date)
+    loaded = getattr(leave_request, '_loaded_summary_key', None)
+    leave_request._loaded_summary_key = current
+
+    months = set()
+    for user_id, start, end in {current, loaded or current}:
+        months.update((user_id, y, m) for y, m in months_between(start, end))
+    _schedule(months=months)
+
+
+def rebuild(start, end, admin_owner_id=None):
+    """
+    Recompute every rollup in [start, end] (optionally one tenant) from the
+    raw rows, deleting rollups for days that no longer have attendance.
+    Returns the number of rollup rows written.
+    """
+    from .models import Attendance, AttendanceDailyRollup
+
+    owners = Attendance.objects.filter(
+        date__gte=start, date__lte=end, admin_owner_id__isnull=False,
+    )
+    if admin_owner_id is not None:
+        owners = owners.filter(admin_owner_id=admin_owner_id)
+    owner_ids = sorted(set(owners.order_by().values_list('admin_owner_id', flat=True).distinct()))
+
+    written = 0
+    with transaction.atomic():
+        stale = AttendanceDailyRollup.objects.filter(date__gte=start, date__lte=end)
+        if admin_owner_id is not None:
+            stale = stale.filter(admin_owner_id=admin_owner_id)
+        stale.delete()
+
+        for owner_id in owner_ids:
+            rows = [
+                AttendanceDailyRollup(admin_owner_id=owner_id, date=day, **values)
+                for day, values in sorted(compute(owner_id, start, end).items())
+            ]
+            AttendanceDailyRollup.objects.bulk_create(rows, batch_size=1000)
+            written += len(rows)
+    return written
+
+
+def find_drift(start, end, admin_owner_id=None):
+    """
+    Compare stored rollups in [start, end] with the raw rows.  Returns a list
+    of (admin_owner_id, date, stored values or None, actual values) for every
+    tenant-day that disagrees.  A day without attendance should have no
+    rollup; a missing rollup reads as all zeros.
+    """
+    from .models import Attendance, AttendanceDailyRollup
+
+    stored_qs = AttendanceDailyRollup.objects.filter(date__gte=start, date__lte=end)
+    owners_qs = Attendance.objects.filter(
+        date__gte=start, date__lte=end, admin_owner_id__isnull=False,
+    )
+    if admin_owner_id is not None:
+        stored_qs = stored_qs.filter(admin_owner_id=admin_owner_id)
+        owners_qs = owners_qs.filter(admin_owner_id=admin_owner_id)
+
+    stored = {
+        (r['admin_owner_id'], r['date']): {f: r[f] for f in VALUE_FIELDS}
+        for r in stored_qs.values('admin_owner_id', 'date', *VALUE_FIELDS)
+    }
+    owner_ids = set(owners_qs.order_by().values_list('admin_owner_id', flat=True).distinct())
+    owner_ids.update(owner for owner, _ in stored)
+
+    drift = []
+    empty = _empty_values()
+    for owner_id in sorted(owner_ids):
+        actual = compute(owner_id, start, end)
+        days = {d for (o, d) in stored if o == owner_id} | set(actual)
+        for day in sorted(days):
+            have = stored.get((owner_id, day))
+            want = actual.get(day, empty)
+            if (have or empty) != want:
+                drift.append((owner_id, day, have, want))
+    return drift
+
+
+def daily(admin_owner_id, start, end):
+    """{date: values} from the rollup table for the tenant in [start, end]."""
+    from .models import AttendanceDailyRollup
+
+    rows = (
+        AttendanceDailyRollup.objects
+        .filter(admin_owner_id=admin_owner_id, date__gte=start, date__lte=end)
+        .values('date', *VALUE_FIELDS)
+    )
+    return {row.pop('date'): row for row in rows}
+
+
+def totals(admin_owner_id, start, end):
+    """Summed rollup values for the tenant in [start, end] — one query."""
+    from .models import AttendanceDailyRollup
+
+    row = (
+        AttendanceDailyRollup.objects
+        .filter(admin_owner_id=admin_owner_id, date__gte=start, date__lte=end)
+        .aggregate(**{f: Sum(f) for f in VALUE_FIELDS})
+    )
+    values = _empty_values()
+    values.update({f: v for f, v in row.items() if v is not None})
+    return values
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# EMPLOYEE MONTH SUMMARIES
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _month_bounds(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def compute_month_summaries(user_ids, year, month):
+    """
+    {user_id: values} for every user in user_ids, aggregated from Attendance
+    and approved LeaveRequests overlapping the month — two queries.
+    """
+    from .models import Attendance, LeaveRequest
+
+    user_ids = set(user_ids)
+    first_day, last_day = _month_bounds(year, month)
+
+    aggregates = {s: Count('id', filter=Q(status=s)) for s in STATUSES}
+    aggregates.update(
+        wfh=Count('id', filter=Q(is_wfh=True)),
+        total=Count('id'),
+        total_hours=Sum('total_hours'),
+        net_hours=Sum('net_working_hours'),
+        break_days=Count('id', filter=Q(total_break_minutes__gt=0)),
+        break_minutes=Sum('total_break_minutes'),
+    )
+    rows = (
+        Attendance.objects
+        .filter(user_id__in=user_ids, date__gte=first_day, date__lte=last_day)
+        .order_by()
+        .values('user_id')
+        .annotate(**aggregates)
+    )
+
+    result = {}
+    for user_id in user_ids:
+        values = dict.fromkeys(COUNT_FIELDS + ('break_days', 'break_minutes'), 0)
+        values.update(total_hours=Decimal('0.00'), net_hours=Decimal('0.00'), leave_by_type={})
+        result[user_id] = values
+    for row in rows:
+        values = result[row.pop('user_id')]
+        values.update(row)
+        for field in ('total_hours', 'net_hours'):
+            values[field] = Decimal(values[field] or 0).quantize(Decimal('0.01'))
+        values['break_minutes'] = values['break_minutes'] or 0
+
+    leaves = LeaveRequest.objects.filter(
+        user_id__in=user_ids,
+        status='approved',
+        start_date__lte=last_day,
+        end_date__gte=first_day,
+    ).values_list('user_id', 'leave_type', 'start_date', 'end_date')
+    for user_id, leave_type, start, end in leaves:
+        days = (min(end, last_day) - max(start, first_day)).days + 1
+        by_type = result[user_id]['leave_by_type'].setdefault(leave_type, {'count': 0, 'days': 0})
+        by_type['count'] += 1
+        by_type['days']  += days
+    return result
+
+
+def _is_empty(values):
+    return not values['total'] and not values['leave_by_type']
+
+
+def refresh_month_summaries(user_ids, year, month):
+    """Recompute the stored summaries of user_ids for the month."""
+    from .models import EmployeeMonthSummary
+
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+
+    with transaction.atomic():
+        # Same create-then-lock sequence as refresh() for the daily rollups.
+        EmployeeMonthSummary.objects.bulk_create(
+            [EmployeeMonthSummary(user_id=u, year=year, month=month) for u in user_ids],
+            ignore_conflicts=True,
+        )
+        summaries = list(
+            EmployeeMonthSummary.objects
+            .select_for_update()
+            .filter(user_id__in=user_ids, year=year, month=month)
+        )
+        values = compute_month_summaries(user_ids, year, month)
+
+        # A month with no attendance and no leave needs no row (and a user
+        # being cascade-deleted must not get a new one); reads recreate it.
+        empty = [s.pk for s in summaries if _is_empty(values[s.user_id])]
+        if empty:
+            EmployeeMonthSummary.objects.filter(pk__in=empty).delete()
+
+        now = timezone.now()
+        summaries = [s for s in summaries if not _is_empty(values[s.user_id])]
+        for summary in summaries:
+            summary.updated_at = now
+            for field, value in values[summary.user_id].items():
+                setattr(summary, field, value)
+        EmployeeMonthSummary.objects.bulk_update(summaries, MONTH_VALUE_FIELDS + ('updated_at',))
+
+
+def month_summaries(user_ids, year, month):
+    """
+    {user_id: EmployeeMonthSummary} for the month, computing and storing the
+    ones that don't exist yet.  Two queries when all are stored.
+    """
+    from .models import EmployeeMonthSummary
+
+    user_ids = {u for u in user_ids if u is not None}
+    if not user_ids:
+        return {}
+
+    summaries = {
+        s.user_id: s
+        for s in EmployeeMonthSummary.objects.filter(user_id__in=user_ids, year=year, month=month)
+    }
+    missing = user_ids - set(summaries)
+    if missing:
+        values = compute_month_summaries(missing, year, month)
+        EmployeeMonthSummary.objects.bulk_create(
+            [EmployeeMonthSummary(user_id=u, year=year, month=month, **values[u]) for u in missing],
+            ignore_conflicts=True,
+        )
+        # Re-read: with ignore_conflicts the pks aren't returned, and a
+        # concurrent refresh may have stored fresher figures first.
+        summaries.update({
+            s.user_id: s
+            for s in EmployeeMonthSummary.objects.filter(user_id__in=missing, year=year, month=month)
+        })
+    return summaries
+
+
+def rebuild_month_summaries(year, month, admin_owner_id=None):
+    """
+    Drop and recompute the month's summaries (optionally for one tenant's
+    users).  Returns the number of summaries written.
+    """
+    from django.contrib.auth import get_user_model
+    from .models import Attendance, EmployeeMonthSummary, LeaveRequest
+
+    first_day, last_day = _month_bounds(year, month)
+    attendance = Attendance.objects.filter(date__gte=first_day, date__lte=last_day)
+    leaves = LeaveRequest.objects.filter(
+        status='approved', start_date__lte=last_day, end_date__gte=first_day,
+    )
+    stale = EmployeeMonthSummary.objects.filter(year=year, month=month)
+    if admin_owner_id is not None:
+        tenant_users = get_user_model().objects.filter(
+            Q(admin_owner_id=admin_owner_id) | Q(pk=admin_owner_id)
+        ).values('pk')
+        attendance = attendance.filter(user_id__in=tenant_users)
+        leaves = leaves.filter(user_id__in=tenant_users)
+        stale = stale.filter(user_id__in=tenant_users)
+
+    user_ids = set(attendance.order_by().values_list('user_id', flat=True).distinct())
+    user_ids.update(leaves.order_by().values_list('user_id', flat=True).distinct())
+
+    with transaction.atomic():
+        stale.delete()
+        return len(month_summaries(user_ids, year, month))
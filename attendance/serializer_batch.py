@@ -0,0 +1,119 @@
+# attendance/serializer_batch.py
+"""
+DataLoader-style batch context for the attendance list serializers.
+
+Serializing N rows used to cost several queries *per row*: the employee
+record for the profile image, the approved leave covering an attendance
+date, the break records, and every `obj.user` / `obj.reviewed_by` FK.
+A 500-row admin list meant thousands of queries.
+
+Serializers that use BatchedSerializerMixin declare BatchListSerializer as
+their `many=True` serializer (Meta.list_serializer_class).  Before any row
+is rendered it collects the row keys and hands the child serializer a
+SerializerBatch:
+
+  * the FKs / reverse relations named in `batch_prefetch` are loaded with
+    prefetch_related_objects() — one query per relation;
+  * employees for all row users, and approved leaves overlapping the rows'
+    dates, are fetched on first use — one query each.
+
+The method fields read from `self.batch`; a serializer used on a single
+instance has no batch and falls back to the per-row lookup.
+"""
+
+from collections import defaultdict
+
+from django.db import models
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers
+
+
+class SerializerBatch:
+    """Lookups shared by every row of one list serialization."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._employees = None
+        self._leaves = None
+
+    def employee_for(self, user_id):
+        """The Employee linked to user_id (one query for all rows)."""
+        if self._employees is None:
+            from employee_management.identity import employees_for_users
+
+            self._employees = employees_for_users({row.user_id for row in self.rows})
+        return self._employees.get(user_id)
+
+    def approved_leave_on(self, user_id, day):
+        """
+        The approved LeaveRequest of user_id covering day, picked the same
+        way as the per-row `.first()` (LeaveRequest default ordering).
+        Only rows with status 'leave' are looked up.
+        """
+        if self._leaves is None:
+            self._leaves = self._load_leaves()
+        for leave in self._leaves.get(user_id, ()):
+            if leave.start_date <= day <= leave.end_date:
+                return leave
+        return None
+
+    def _load_leaves(self):
+        from .models import LeaveRequest
+
+        leave_rows = [row for row in self.rows if row.status == 'leave']
+        if not leave_rows:
+            return {}
+        leaves = LeaveRequest.objects.filter(
+            user_id__in={row.user_id for row in leave_rows},
+            status='approved',
+            start_date__lte=max(row.date for row in leave_rows),
+            end_date__gte=min(row.date for row in leave_rows),
+        )
+        by_user = defaultdict(list)
+        for leave in leaves:
+            by_user[leave.user_id].append(leave)
+        return by_user
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    """Builds a SerializerBatch for the child before rendering the rows."""
+
+    def to_representation(self, data):
+        rows = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if rows:
+            prefetch_related_objects(rows, *self.child.batch_prefetch)
+        self.child.batch = SerializerBatch(rows)
+        try:
+            return [self.child.to_representation(row) for row in rows]
+        finally:
+            self.child.batch = None
+
+
+class BatchedSerializerMixin:
+    """
+    For ModelSerializers of rows with a `user` FK.  Subclasses set
+    `Meta.list_serializer_class = BatchListSerializer` and list the
+    relations to prefetch in `batch_prefetch`.
+    """
+
+    batch = None
+    batch_prefetch = ('user',)
+
+    def _employee_for(self, obj):
+        if self.batch is not None:
+            return self.batch.employee_for(obj.user_id)
+        from employee_management.identity import employee_for_user
+
+        return employee_for_user(obj.user)
+
+    def get_user_profile_image(self, obj):
+        """Return employee profile image (R2) falling back to user profile image."""
+        try:
+            employee = self._employee_for(obj)
+            if employee and employee.profile_image:
+                return employee.profile_image.url
+        except Exception:
+            pass
+        if obj.user.profile_image:
+            return obj.user.profile_image.url
+        return None
@@ -5,6 +5,8 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 import pytz
 
+from .serializer_batch import BatchedSerializerMixin, BatchListSerializer
+
 User = get_user_model()
 
 
@@ -14,7 +16,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(BatchedSerializerMixin, serializers.ModelSerializer):
     user_name = serializers.SerializerMethodField()
     user_username = serializers.CharField(source='user.username', read_only=True)
     user_profile_image = serializers.SerializerMethodField()
@@ -31,8 +33,11 @@ class AttendanceSerializer(serializers.ModelSerializer):
     check_in_method_display = serializers.SerializerMethodField()
     check_out_method_display = serializers.SerializerMethodField()
 
+    batch_prefetch = ('user', 'late_approved_by', 'verified_by', 'breaks__user')
+
     class Meta:
         model = Attendance
+        list_serializer_class = BatchListSerializer
         fields = [
             'id', 'user', 'user_name', 'user_username', 'user_profile_image',
             'date', 'date_formatted',
@@ -67,19 +72,6 @@ class AttendanceSerializer(serializers.ModelSerializer):
         full_name = (obj.user.full_name or "").strip()
         return full_name if full_name else obj.user.username
 
-    def get_user_profile_image(self, obj):
-        """Return employee profile image (R2) falling back to user profile image."""
-        try:
-            from employee_management.models import Employee
-            employee = Employee.objects.filter(email=obj.user.email).first()
-            if employee and employee.profile_image:
-                return employee.profile_image.url
-        except Exception:
-            pass
-        if obj.user.profile_image:
-            return obj.user.profile_image.url
-        return None
-
     def get_check_in_time_formatted(self, obj):
         if obj.check_in_time:
             ist = pytz.timezone('Asia/Kolkata')
@@ -107,6 +99,8 @@ class AttendanceSerializer(serializers.ModelSerializer):
         """Return the approved LeaveRequest covering this attendance date, if any."""
         if obj.status != 'leave':
             return None
+        if self.batch is not None:
+            return self.batch.approved_leave_on(obj.user_id, obj.date)
         return LeaveRequest.objects.filter(
             user=obj.user,
             status='approved',
@@ -264,7 +258,7 @@ class VerifyAttendanceSerializer(serializers.Serializer):
 # LATE ARRIVAL REQUEST SERIALIZERS
 # ─────────────────────────────────────────────────────────────────────────────
 
-class LateArrivalRequestSerializer(serializers.ModelSerializer):
+class LateArrivalRequestSerializer(BatchedSerializerMixin, serializers.ModelSerializer):
     """Full read serializer – used in list/detail views."""
     user_name = serializers.SerializerMethodField()
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -276,8 +270,11 @@ class LateArrivalRequestSerializer(serializers.ModelSerializer):
     arrival_time_formatted = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
 
+    batch_prefetch = ('user', 'reviewed_by')
+
     class Meta:
         model = LateArrivalRequest
+        list_serializer_class = BatchListSerializer
         fields = [
             'id', 'user', 'user_name', 'user_username', 'user_profile_image',
             'date', 'date_formatted',
@@ -299,18 +296,6 @@ class LateArrivalRequestSerializer(serializers.ModelSerializer):
         full_name = (obj.user.full_name or "").strip()
         return full_name if full_name else obj.user.username
 
-    def get_user_profile_image(self, obj):
-        try:
-            from employee_management.models import Employee
-            employee = Employee.objects.filter(email=obj.user.email).first()
-            if employee and employee.profile_image:
-                return employee.profile_image.url
-        except Exception:
-            pass
-        if obj.user.profile_image:
-            return obj.user.profile_image.url
-        return None
-
     def get_date_formatted(self, obj):
         return obj.date.strftime('%d %b %Y') if obj.date else None
 
@@ -377,7 +362,20 @@ class LateArrivalApprovalSerializer(serializers.Serializer):
 # LEAVE REQUEST SERIALIZERS
 # ─────────────────────────────────────────────────────────────────────────────
 
-class LeaveRequestSerializer(serializers.ModelSerializer):
+def _cached_leave_type(leave_request):
+    """
+    leave_request.leave_type_obj from the tenant's cached LeaveType rows,
+    so listing leave requests doesn't fetch the leave type once per row.
+    """
+    if not leave_request.leave_type_obj_id:
+        return None
+    from login.tenant import tenant_config
+
+    leave_type = tenant_config(leave_request.admin_owner_id).leave_types.get(leave_request.leave_type_obj_id)
+    return leave_type if leave_type is not None else leave_request.leave_type_obj
+
+
+class LeaveRequestSerializer(BatchedSerializerMixin, serializers.ModelSerializer):
     """Full serializer for LeaveRequest - used for list/detail views"""
     user_name = serializers.SerializerMethodField()
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -390,11 +388,14 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
     start_date_formatted = serializers.SerializerMethodField()
     end_date_formatted = serializers.SerializerMethodField()
     # Dynamic leave type info
-    leave_type_obj_name = serializers.CharField(source='leave_type_obj.name', read_only=True, allow_null=True)
-    leave_type_payment_status = serializers.CharField(source='leave_type_obj.payment_status', read_only=True, allow_null=True)
+    leave_type_obj_name = serializers.SerializerMethodField()
+    leave_type_payment_status = serializers.SerializerMethodField()
+
+    batch_prefetch = ('user', 'reviewed_by')
 
     class Meta:
         model = LeaveRequest
+        list_serializer_class = BatchListSerializer
         fields = [
             'id', 'user', 'user_name', 'user_username', 'user_profile_image',
             'leave_type', 'leave_type_display',
@@ -416,26 +417,23 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
 
     def get_leave_type_display(self, obj):
         # Prefer the dynamic leave type name, fall back to the enum display
-        if obj.leave_type_obj:
-            return obj.leave_type_obj.name
+        leave_type = _cached_leave_type(obj)
+        if leave_type:
+            return leave_type.name
         return obj.get_leave_type_display()
 
+    def get_leave_type_obj_name(self, obj):
+        leave_type = _cached_leave_type(obj)
+        return leave_type.name if leave_type else None
+
+    def get_leave_type_payment_status(self, obj):
+        leave_type = _cached_leave_type(obj)
+        return leave_type.payment_status if leave_type else None
+
     def get_user_name(self, obj):
         full_name = (obj.user.full_name or "").strip()
         return full_name if full_name else obj.user.username
 
-    def get_user_profile_image(self, obj):
-        try:
-            from employee_management.models import Employee
-            employee = Employee.objects.filter(email=obj.user.email).first()
-            if employee and employee.profile_image:
-                return employee.profile_image.url
-        except Exception:
-            pass
-        if obj.user.profile_image:
-            return obj.user.profile_image.url
-        return None
-
     def get_start_date_formatted(self, obj):
         return obj.start_date.strftime('%d %b %Y') if obj.start_date else None
 
@@ -579,7 +577,7 @@ class AttendanceSettingsSerializer(serializers.ModelSerializer):
 # EARLY DEPARTURE REQUEST SERIALIZERS
 # ─────────────────────────────────────────────────────────────────────────────
 
-class EarlyDepartureRequestSerializer(serializers.ModelSerializer):
+class EarlyDepartureRequestSerializer(BatchedSerializerMixin, serializers.ModelSerializer):
     """Full read serializer – used in list / detail views."""
     user_name = serializers.SerializerMethodField()
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -591,8 +589,11 @@ class EarlyDepartureRequestSerializer(serializers.ModelSerializer):
     date_formatted = serializers.SerializerMethodField()
     departure_time_formatted = serializers.SerializerMethodField()
 
+    batch_prefetch = ('user', 'reviewed_by')
+
     class Meta:
         model = EarlyDepartureRequest
+        list_serializer_class = BatchListSerializer
         fields = [
             'id', 'user', 'user_name', 'user_username', 'user_profile_image',
             'date', 'date_formatted',
@@ -616,18 +617,6 @@ class EarlyDepartureRequestSerializer(serializers.ModelSerializer):
         full_name = (obj.user.full_name or "").strip()
         return full_name if full_name else obj.user.username
 
-    def get_user_profile_image(self, obj):
-        try:
-            from employee_management.models import Employee
-            employee = Employee.objects.filter(email=obj.user.email).first()
-            if employee and employee.profile_image:
-                return employee.profile_image.url
-        except Exception:
-            pass
-        if obj.user.profile_image:
-            return obj.user.profile_image.url
-        return None
-
     def get_date_formatted(self, obj):
         return obj.date.strftime('%d %b %Y') if obj.date else None
 
@@ -710,7 +699,7 @@ class EmployeeFaceDataSerializer(serializers.ModelSerializer):
 # 2. Paste the three classes below at the bottom of serializers.py
 # ─────────────────────────────────────────────────────────────────────────────
 
-class SalaryAdvanceRequestSerializer(serializers.ModelSerializer):
+class SalaryAdvanceRequestSerializer(BatchedSerializerMixin, serializers.ModelSerializer):
     """Full read serializer – used in list / detail views."""
     user_name     = serializers.SerializerMethodField()
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -721,8 +710,11 @@ class SalaryAdvanceRequestSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     amount_display = serializers.SerializerMethodField()
 
+    batch_prefetch = ('user', 'reviewed_by')
+
     class Meta:
         model = SalaryAdvanceRequest
+        list_serializer_class = BatchListSerializer
         fields = [
             'id', 'user', 'user_name', 'user_username', 'user_profile_image',
             'amount', 'amount_display',
@@ -746,18 +738,6 @@ class SalaryAdvanceRequestSerializer(serializers.ModelSerializer):
         full_name = (obj.user.full_name or "").strip()
         return full_name if full_name else obj.user.username
 
-    def get_user_profile_image(self, obj):
-        try:
-            from employee_management.models import Employee
-            employee = Employee.objects.filter(email=obj.user.email).first()
-            if employee and employee.profile_image:
-                return employee.profile_image.url
-        except Exception:
-            pass
-        if obj.user.profile_image:
-            return obj.user.profile_image.url
-        return None
-
     def get_amount_display(self, obj):
         """Return a formatted currency string, e.g. ₹10,000.00"""
         try:
@@ -0,0 +1,187 @@
+# attendance/stats.py
+"""
+Aggregated attendance statistics for the dashboard endpoints.
+
+Every helper here answers its question with ONE conditional-aggregation
+query over the Attendance queryset it is given, instead of a separate
+`.filter(status=...).count()` per status.  The admin dashboard fires
+monthly-stats, today-summary and attendance-percentage together on every
+login, so round trips matter more than anything else.
+
+Usage inside AttendanceViewSet:
+
+    from . import stats as attendance_stats
+
+    counts = attendance_stats.status_counts(qs)
+    # {'present': 3, 'absent': 1, 'late': 0, 'half_day': 0, 'leave': 0, 'total': 4}
+"""
+
+from django.db.models import Avg, Count, Q, Sum
+
+STATUSES = ('present', 'absent', 'late', 'half_day', 'leave')
+
+# Statuses that count as "attended" for the attendance-percentage KPI.
+ATTENDED_STATUSES = ('present', 'late', 'half_day')
+
+
+def _status_aggregates():
+    aggregates = {s: Count('id', filter=Q(status=s)) for s in STATUSES}
+    aggregates['total'] = Count('id')
+    return aggregates
+
+
+def status_counts(queryset):
+    """Per-status counts plus 'total' for queryset, in a single query."""
+    return queryset.aggregate(**_status_aggregates())
+
+
+def monthly_stats(queryset):
+    """
+    Status counts, total and average hours for one user's month.
+
+    'total_days' is the number of attendance rows; callers fall back to the
+    month's working-day count when it is 0.
+    """
+    aggregates = _status_aggregates()
+    # Aliases must not shadow the field: Avg('total_hours') would then
+    # refer to the Sum aggregate and raise FieldError.
+    aggregates['hours_sum'] = Sum('total_hours')
+    aggregates['hours_avg'] = Avg('total_hours')
+    row = queryset.aggregate(**aggregates)
+
+    return {
+        'present':       row['present'],
+        'absent':        row['absent'],
+        'late':          row['late'],
+        'half_day':      row['half_day'],
+        'leave':         row['leave'],
+        'total_days':    row['total'],
+        'total_hours':   round(row['hours_sum'] or 0, 2),
+        'average_hours': round(row['hours_avg'] or 0, 2),
+    }
+
+
+def today_summary(queryset):
+    """Status counts and total for a single day's attendance rows."""
+    counts = status_counts(queryset)
+    return {
+        'present':  counts['present'],
+        'absent':   counts['absent'],
+        'late':     counts['late'],
+        'half_day': counts['half_day'],
+        'leave':    counts['leave'],
+        'total':    counts['total'],
+    }
+
+
+def attendance_percentage(queryset, total_employees, working_days):
+    """
+    Tenant attendance KPI: attended rows / (employees × working days).
+    """
+    row = queryset.aggregate(
+        present=Count('id', filter=Q(status__in=ATTENDED_STATUSES)),
+        absent=Count('id', filter=Q(status='absent')),
+        leave=Count('id', filter=Q(status='leave')),
+    )
+    return attendance_percentage_from_counts(
+        row['present'], row['absent'], row['leave'], total_employees, working_days,
+    )
+
+
+def attendance_percentage_from_counts(attended, absent, leave, total_employees, working_days):
+    """attendance_percentage() payload from already-aggregated counts."""
+    expected = total_employees * working_days
+    percentage = round((attended / expected) * 100, 2) if expected > 0 else 0.0
+    return {
+        'total_employees':       total_employees,
+        'working_days':          working_days,
+        'expected':              expected,
+        'present':               attended,
+        'absent':                absent,
+        'leave':                 leave,
+        'attendance_percentage': percentage,
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# REQUEST COUNTERS (admin sidebar badge)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Response key → model name in this app.  Order is the response order.
+REQUEST_COUNTER_MODELS = (
+    ('leave_requests',           'LeaveRequest'),
+    ('late_arrival_requests',    'LateArrivalRequest'),
+    ('early_departure_requests', 'EarlyDepartureRequest'),
+    ('wfh_requests',             'WFHRequest'),
+    ('salary_advance_requests',  'SalaryAdvanceRequest'),
+)
+
+# Seconds the counters are cached.  The save/delete signals drop them at
+# once, but only in the process that made the change: with the default
+# per-process cache (no REDIS_URL) login.tenant_cache.cache_ttl() cuts this
+# to LOCAL_CACHE_MAX_TTL so the other workers' badges catch up within seconds.
+REQUEST_COUNTS_TTL = 300
+
+
+def _request_counts_cache_key(admin_owner_id):
+    return f'attendance:request_counts:{admin_owner_id}'
+
+
+def _query_request_counts(admin_owner_id):
+    """
+    Total and pending counts for all five request types in ONE query:
+    a UNION ALL of one conditional aggregate per table.
+    """
+    from django.apps import apps
+    from django.db.models import CharField, Value
+
+    parts = []
+    for key, model_name in REQUEST_COUNTER_MODELS:
+        model = apps.get_model('attendance', model_name)
+        parts.append(
+            model.objects
+            .filter(admin_owner_id=admin_owner_id)
+            .order_by()
+            .annotate(kind=Value(key, output_field=CharField()))
+            .values('kind')
+            .annotate(
+                total=Count('id'),
+                pending=Count('id', filter=Q(status='pending')),
+            )
+            .values('kind', 'total', 'pending')
+        )
+    rows = parts[0].union(*parts[1:], all=True)
+
+    counts = {key: {'total': 0, 'pending': 0} for key, _ in REQUEST_COUNTER_MODELS}
+    for row in rows:
+        counts[row['kind']] = {'total': row['total'], 'pending': row['pending']}
+    return counts
+
+
+def request_counts(admin_owner):
+    """
+    Per-type and overall {'total', 'pending'} request counts for a tenant,
+    served from the cache when possible.
+    """
+    from django.core.cache import cache
+    from login.tenant_cache import cache_ttl
+
+    admin_owner_id = getattr(admin_owner, 'pk', admin_owner)
+    key = _request_counts_cache_key(admin_owner_id)
+    counts = cache.get(key)
+    if counts is None:
+        counts = _query_request_counts(admin_owner_id)
+        cache.set(key, counts, cache_ttl(REQUEST_COUNTS_TTL))
+
+    data = dict(counts)
+    data['overall'] = {
+        'total':   sum(c['total'] for c in counts.values()),
+        'pending': sum(c['pending'] for c in counts.values()),
+    }
+    return data
+
+
+def invalidate_request_counts(admin_owner_id):
+    from django.core.cache import cache
+
+    cache.delete(_request_counts_cache_key(admin_owner_id))
@@ -1,3 +1,620 @@
-from django.test import TestCase
+import datetime
+import io
+import os
+import random
+import re
+import tempfile
+import threading
+import unittest
+from calendar import monthrange
+from datetime import date, timedelta
+from decimal import Decimal
+from multiprocessing.connection import Listener
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from login.models import User
+
+from . import rollups, stats
+from .face import server as face_server, worker
+from .face.server import FaceServer
+from .models import (
+    Attendance, EarlyDepartureRequest, EmployeeMonthSummary, LateArrivalRequest, LeaveRequest,
+    SalaryAdvanceRequest, WFHRequest,
+)
+
+
+def _make_tenant(prefix='t'):
+    admin = User.objects.create(username=f'{prefix}-admin', role='ADMIN', email=f'{prefix}-admin@example.com')
+    user = User.objects.create(
+        username=f'{prefix}-user', role='USER', admin_owner=admin, email=f'{prefix}-user@example.com',
+    )
+    return admin, user
+
+
+class MonthlyStatsTests(TestCase):
+
+    def setUp(self):
+        self.admin, self.user = _make_tenant()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_monthly_stats_sums_and_averages_hours(self):
+        for day, status_value, hours in [(2, 'present', '8.00'), (3, 'late', '6.50'), (4, 'absent', '0.00')]:
+            attendance = Attendance.objects.create(
+                admin_owner=self.admin, user=self.user, date=date(2026, 3, day),
+            )
+            Attendance.objects.filter(pk=attendance.pk).update(
+                status=status_value, total_hours=Decimal(hours),
+            )
+
+        resp = self.client.get('/api/attendance/monthly-stats/', {'year': 2026, 'month': 3})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['present'], 1)
+        self.assertEqual(resp.data['late'], 1)
+        self.assertEqual(resp.data['absent'], 1)
+        self.assertEqual(resp.data['total_days'], 3)
+        self.assertEqual(Decimal(str(resp.data['total_hours'])), Decimal('14.50'))
+        self.assertEqual(Decimal(str(resp.data['average_hours'])), Decimal('4.83'))
+
+    def test_monthly_stats_without_rows_falls_back_to_working_days(self):
+        resp = self.client.get('/api/attendance/monthly-stats/', {'year': 2026, 'month': 3})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['total_days'], 26)    # March 2026: 31 days, 5 Sundays
+        self.assertEqual(Decimal(str(resp.data['total_hours'])), Decimal('0'))
+
+
+
+class RequestCountsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin, self.user = _make_tenant()
+
+    def _create_requests(self):
+        common = {'admin_owner': self.admin, 'user': self.user, 'reason': 'x'}
+        return [
+            LeaveRequest.objects.create(start_date=date(2026, 3, 2), end_date=date(2026, 3, 3), **common),
+            LateArrivalRequest.objects.create(date=date(2026, 3, 2), expected_arrival_time=datetime.time(9, 30), **common),
+            EarlyDepartureRequest.objects.create(
+                date=date(2026, 3, 2), expected_departure_time=datetime.time(16, 30), **common,
+            ),
+            WFHRequest.objects.create(date=date(2026, 3, 4), **common),
+            SalaryAdvanceRequest.objects.create(amount=Decimal('5000'), **common),
+        ]
+
+    def test_saving_and_deleting_requests_invalidates_cached_counts(self):
+        self.assertEqual(stats.request_counts(self.admin)['overall'], {'total': 0, 'pending': 0})
+
+        requests = self._create_requests()
+        counts = stats.request_counts(self.admin)
+        for key, _ in stats.REQUEST_COUNTER_MODELS:
+            self.assertEqual(counts[key], {'total': 1, 'pending': 1}, key)
+        self.assertEqual(counts['overall'], {'total': 5, 'pending': 5})
+
+        requests[0].status = 'approved'
+        requests[0].save()
+        counts = stats.request_counts(self.admin)
+        self.assertEqual(counts['leave_requests'], {'total': 1, 'pending': 0})
+
+        requests[1].delete()
+        counts = stats.request_counts(self.admin)
+        self.assertEqual(counts['late_arrival_requests'], {'total': 0, 'pending': 0})
+        self.assertEqual(counts['overall'], {'total': 4, 'pending': 3})
+
+    def test_counts_are_served_from_cache_between_changes(self):
+        self._create_requests()
+        stats.request_counts(self.admin)
+        with self.assertNumQueries(0):
+            stats.request_counts(self.admin)
+
+    @override_settings(LOCAL_CACHE_MAX_TTL=5)
+    def test_per_process_cache_keeps_counts_for_seconds_only(self):
+        # Other workers' LocMemCache never sees this worker's invalidation.
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            stats.request_counts(self.admin)
+        self.assertEqual(cache_set.call_args.args[2], 5)
+
+
+class RollupDeltaTests(TestCase):
+
+    def setUp(self):
+        self.admin, self.user = _make_tenant()
+        self.other = User.objects.create(
+            username='t-user2', role='USER', admin_owner=self.admin, email='t-user2@example.com',
+        )
+        self.first_day = date(2026, 3, 28)
+        self.last_day = date(2026, 4, 4)     # spans a month boundary
+
+    def _assert_in_sync(self):
+        self.assertEqual(rollups.find_drift(self.first_day, self.last_day, self.admin.pk), [])
+        for year, month in ((2026, 3), (2026, 4)):
+            expected = rollups.compute_month_summaries([self.user.pk, self.other.pk], year, month)
+            for summary in EmployeeMonthSummary.objects.filter(year=year, month=month):
+                for field in rollups.MONTH_VALUE_FIELDS:
+                    if field != 'leave_by_type':
+                        self.assertEqual(
+                            getattr(summary, field), expected[summary.user_id][field],
+                            f'{field} of user {summary.user_id} in {year}-{month}',
+                        )
+
+    def test_saves_moves_and_deletes_keep_rollups_in_sync(self):
+        rng = random.Random(7)
+        days = [self.first_day + timedelta(days=i) for i in range(8)]
+        rollups.month_summaries([self.user.pk, self.other.pk], 2026, 3)
+        rollups.month_summaries([self.user.pk, self.other.pk], 2026, 4)
+
+        for _ in range(60):
+            rows = list(Attendance.objects.filter(admin_owner=self.admin))
+            action = rng.choice(['create', 'update', 'update_fields', 'move', 'delete'])
+            if action == 'create' or not rows:
+                user = rng.choice([self.user, self.other])
+                taken = {r.date for r in rows if r.user_id == user.pk}
+                free = [d for d in days if d not in taken]
+                if free:
+                    Attendance.objects.create(
+                        admin_owner=self.admin, user=user, date=rng.choice(free),
+                        status=rng.choice(['present', 'late', 'absent']), is_wfh=rng.random() < 0.3,
+                        total_hours=Decimal(rng.randint(0, 900)) / 100,
+                    )
+                continue
+            row = rng.choice(rows)
+            if action == 'update':
+                row.status = rng.choice(['present', 'late', 'half_day', 'leave'])
+                row.total_break_minutes = rng.choice([0, 15, 45])
+                row.net_working_hours = Decimal('7.25')
+                row.save()
+            elif action == 'update_fields':
+                row.status = 'half_day'
+                row.total_hours = Decimal('99.00')     # changed in memory, not saved
+                row.save(update_fields=['status'])
+            elif action == 'move':
+                taken = {r.date for r in rows if r.user_id == row.user_id}
+                free = [d for d in days if d not in taken]
+                if free:
+                    row.date = rng.choice(free)
+                    row.save()
+            else:
+                row.delete()
+            self._assert_in_sync()
+
+    def test_punch_updates_rollups_without_recomputing(self):
+        Attendance.objects.create(admin_owner=self.admin, user=self.other, date=self.first_day, status='present')
+        rollups.month_summaries([self.user.pk], 2026, 3)
+
+        with self.assertNumQueries(3):     # INSERT + one UPDATE per aggregate
+            Attendance.objects.create(
+                admin_owner=self.admin, user=self.user, date=self.first_day, status='late', is_verified=True,
+            )
+        attendance = Attendance.objects.get(user=self.user, date=self.first_day)
+        attendance.status = 'present'
+        with self.assertNumQueries(3):
+            attendance.save(update_fields=['status'])
+        self._assert_in_sync()
+
+    def test_deferred_block_writes_each_day_once(self):
+        with rollups.deferred():
+            for user in (self.user, self.other):
+                for offset in range(3):
+                    Attendance.objects.create(
+                        admin_owner=self.admin, user=user, date=self.first_day + timedelta(days=offset),
+                        status='leave', is_verified=True,
+                    )
+            Attendance.objects.filter(user=self.other, date=self.first_day).delete()
+        self._assert_in_sync()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# QUERY PLANS — the hot tenant/date/status queries must be index-backed
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _hot_queries(ctx):
+    """
+    (label, table, queryset) for the tenant/date/status queries the list
+    views, payroll and the daily dashboards run on every request.  Each one
+    must be answered from an index, never a full scan of `table`.
+    """
+    from activitylog.models import ActivityLog
+    from master.models import Deduction, Holiday
+    from attendance.models import (
+        Attendance, EarlyDepartureRequest, LateArrivalRequest, LeaveRequest,
+        SalaryAdvanceRequest, WFHRequest,
+    )
+
+    admin, user, employee, day = ctx['admin'], ctx['user'], ctx['employee'], ctx['day']
+    first = day.replace(day=1)
+    return [
+        ('attendance: tenant day by status', 'attendance_attendance',
+         Attendance.objects.filter(admin_owner=admin, date=day, status='present')),
+        ('attendance: tenant date range', 'attendance_attendance',
+         Attendance.objects.filter(admin_owner=admin, date__range=(first, day))),
+        ('attendance: user month', 'attendance_attendance',
+         Attendance.objects.filter(user=user, date__year=day.year, date__month=day.month)),
+        ('leave: pending for tenant', 'attendance_leaverequest',
+         LeaveRequest.objects.filter(admin_owner=admin, status='pending').order_by('-created_at')[:50]),
+        ('leave: approved overlapping a day', 'attendance_leaverequest',
+         LeaveRequest.objects.filter(user=user, status='approved', start_date__lte=day, end_date__gte=day)),
+        ('late arrival: pending for tenant', 'attendance_latearrivalrequest',
+         LateArrivalRequest.objects.filter(admin_owner=admin, status='pending').order_by('-created_at')[:50]),
+        ('late arrival: tenant day', 'attendance_latearrivalrequest',
+         LateArrivalRequest.objects.filter(admin_owner=admin, date=day)),
+        ('early departure: pending for tenant', 'attendance_earlydeparturerequest',
+         EarlyDepartureRequest.objects.filter(admin_owner=admin, status='pending').order_by('-created_at')[:50]),
+        ('wfh: pending for tenant', 'attendance_wfhrequest',
+         WFHRequest.objects.filter(admin_owner=admin, status='pending').order_by('-created_at')[:50]),
+        ('salary advance: pending for tenant', 'attendance_salaryadvancerequest',
+         SalaryAdvanceRequest.objects.filter(admin_owner=admin, status='pending').order_by('-created_at')[:50]),
+        ('activity log: tenant latest', 'activitylog_activitylog',
+         ActivityLog.objects.filter(admin_owner=admin).order_by('-created_at')[:50]),
+        ('holidays: tenant year', 'master_holidays',
+         Holiday.objects.filter(admin_owner=admin, date__year=day.year, is_active=True)),
+        ('deductions: policy prefix for a month', 'master_deductions',
+         Deduction.objects.filter(employee=employee, year=day.year, month=day.month,
+                                  deduction_name__startswith='Policy ')),
+    ]
+
+
+def _full_scans(plan, table):
+    """Plan lines that read every row of table."""
+    pattern = re.compile(rf'Seq Scan on {re.escape(table)}\b')
+    return [line.strip() for line in plan.splitlines() if pattern.search(line)]
+
+
+def _load_synthetic_data(tenants=5, per_tenant=40, day_count=90):
+    from activitylog.models import ActivityLog
+    from employee_management.models import Employee
+    from master.models import Deduction, Holiday
+    from attendance.models import (
+        Attendance, EarlyDepartureRequest, LateArrivalRequest, LeaveRequest,
+        SalaryAdvanceRequest, WFHRequest,
+    )
+
+    User = get_user_model()
+    rng = random.Random(1)
+    today = timezone.localdate()
+    days = [today - datetime.timedelta(days=n) for n in range(day_count)]
+
+    admins = User.objects.bulk_create([
+        User(username=f'qp-admin-{t}', role='ADMIN') for t in range(tenants)
+    ])
+    if not admins[0].pk:   # backends that don't return bulk-inserted pks
+        admins = list(User.objects.filter(username__startswith='qp-admin-').order_by('id'))
+
+    User.objects.bulk_create([
+        User(username=f'qp-user-{a.pk}-{n}', email=f'qp-{a.pk}-{n}@example.invalid',
+             role='USER', admin_owner=a)
+        for a in admins for n in range(per_tenant)
+    ])
+    users = list(User.objects.filter(username__startswith='qp-user-').order_by('id'))
+
+    Employee.objects.bulk_create([
+        Employee(employee_id=f'QP{n:06d}', first_name=u.username, email=u.email, user=u,
+                 position='Staff', employment_type='full_time', date_of_joining=days[-1],
+                 salary=Decimal('30000'), admin_owner_id=u.admin_owner_id)
+        for n, u in enumerate(users)
+    ])
+    employees = list(Employee.objects.filter(employee_id__startswith='QP').order_by('id'))
+
+    statuses = ['present'] * 7 + ['late', 'half_day', 'absent', 'leave']
+    Attendance.objects.bulk_create([
+        Attendance(user=u, admin_owner_id=u.admin_owner_id, date=d, status=rng.choice(statuses))
+        for u in users for d in days
+    ], batch_size=2000)
+
+    def review_status():
+        # Mostly settled history with a small pending tail, as in production.
+        return 'pending' if rng.random() < 0.05 else rng.choice(['approved', 'rejected'])
+
+    request_days = days[::3]
+    LateArrivalRequest.objects.bulk_create([
+        LateArrivalRequest(user=u, admin_owner_id=u.admin_owner_id, date=d,
+                           expected_arrival_time=datetime.time(10, 0), reason='-',
+                           status=review_status())
+        for u in users for d in request_days
+    ], batch_size=2000)
+    EarlyDepartureRequest.objects.bulk_create([
+        EarlyDepartureRequest(user=u, admin_owner_id=u.admin_owner_id, date=d,
+                              expected_departure_time=datetime.time(16, 0), reason='-',
+                              status=review_status())
+        for u in users for d in request_days
+    ], batch_size=2000)
+    WFHRequest.objects.bulk_create([
+        WFHRequest(user=u, admin_owner_id=u.admin_owner_id, date=d, reason='-',
+                   status=review_status())
+        for u in users for d in request_days
+    ], batch_size=2000)
+    LeaveRequest.objects.bulk_create([
+        LeaveRequest(user=u, admin_owner_id=u.admin_owner_id, start_date=d,
+                     end_date=d + datetime.timedelta(days=rng.randint(0, 2)), reason='-',
+                     status=review_status())
+        for u in users for d in request_days
+    ], batch_size=2000)
+    SalaryAdvanceRequest.objects.bulk_create([
+        SalaryAdvanceRequest(user=u, admin_owner_id=u.admin_owner_id, amount=Decimal('1000'),
+                             reason='-', status=review_status())
+        for u in users for _ in range(6)
+    ], batch_size=2000)
+    ActivityLog.objects.bulk_create([
+        ActivityLog(user=u, admin_owner_id=u.admin_owner_id, action_type='UPDATE',
+                    module='attendance', description='synthetic')
+        for u in users for _ in range(20)
+    ], batch_size=2000)
+    Holiday.objects.bulk_create([
+        Holiday(name=f'Holiday {n}', date=d, admin_owner=a)
+        for a in admins for n, d in enumerate(days[::15])
+    ])
+
+    periods = sorted({(d.year, d.month) for d in days})
+    names = ['Policy Late Deduction', 'Policy Absent Deduction',
+             'Request Deduction - Leave', 'Loan', 'Insurance']
+    Deduction.objects.bulk_create([
+        Deduction(employee=e, admin_owner_id=e.admin_owner_id, deduction_name=name,
+                  year=y, month=m, amount=Decimal('100'))
+        for e in employees for (y, m) in periods for name in names
+    ], batch_size=2000)
+
+    return {'admin': admins[0], 'user': users[0], 'employee': employees[0], 'day': today}
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'query plans are checked on PostgreSQL')
+class QueryPlanTests(TestCase):
+    """
+    Load synthetic tenants and EXPLAIN the hot queries; none may fall back
+    to a full scan of its table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ctx = _load_synthetic_data()
+        with connection.cursor() as cursor:
+            # Planner statistics for the synthetic volume.
+            cursor.execute('ANALYZE')
+
+    def test_hot_queries_use_an_index(self):
+        for label, table, queryset in _hot_queries(self.ctx):
+            with self.subTest(label):
+                plan = queryset.explain()
+                self.assertEqual(_full_scans(plan, table), [], f'{label}:\n{plan}')
+
+
+def _jpeg(shade):
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new('RGB', (32, 32), (shade, shade, shade)).save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+class _FakeDeepFace:
+    """RetinaFace stand-in: one face per image whose pixels keep the image's shade."""
+
+    @staticmethod
+    def extract_faces(img_path, **kwargs):
+        shade = float(img_path.mean())
+        if shade < 5:
+            raise ValueError('Face could not be detected in numpy array.')
+        return [{'face': np.full((4, 4, 3), shade / 255.0), 'facial_area': {'x': 0}, 'confidence': 0.9}]
+
+
+class _FakeFacenet:
+    """Facenet512 stand-in that records every predict() batch."""
+
+    input_shape = (4, 4)
+
+    def __init__(self):
+        self.model = self
+        self.batches = []
+
+    def predict(self, batch, verbose=0):
+        self.batches.append(batch.shape[0])
+        return np.stack([batch[:, 0, 0, 0], 1 - batch[:, 0, 0, 0]], axis=1)
+
+
+class FaceServerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.address = os.path.join(tempfile.mkdtemp(), 'face.sock')
+        self.facenet = _FakeFacenet()
+        for name, value in [
+            ('_DeepFace', _FakeDeepFace), ('_facenet', self.facenet), ('_preprocess', lambda face: face[None]),
+        ]:
+            patcher = mock.patch.object(worker, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _start_server(self, **kwargs):
+        server = FaceServer(self.address, **kwargs)
+        self.addCleanup(server.close)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def test_concurrent_jobs_from_separate_workers_share_one_predict_call(self):
+        self._start_server(batch_size=16, batch_window=0.5)
+        workers = [worker.FaceServerClient(self.address, autostart=False) for _ in range(6)]
+        barrier = threading.Barrier(len(workers))
+        futures = [None] * len(workers)
+
+        def punch(i):
+            barrier.wait()
+            futures[i] = workers[i].submit('represent', _jpeg(40 + 20 * i))
+
+        threads = [threading.Thread(target=punch, args=(i,)) for i in range(len(workers))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        results = [worker.wait(f, timeout=10) for f in futures]
+        self.assertEqual(self.facenet.batches, [6])
+        for i, reps in enumerate(results):
+            self.assertEqual(len(reps), 1)
+            self.assertAlmostEqual(reps[0]['embedding'][0], (40 + 20 * i) / 255.0, places=1)
+            self.assertEqual(reps[0]['face_confidence'], 0.9)
+
+    def test_failed_detection_only_fails_its_own_job(self):
+        self._start_server(batch_size=16, batch_window=0.3)
+        client = worker.FaceServerClient(self.address, autostart=False)
+
+        same  = client.submit('verify', _jpeg(120), _jpeg(120))
+        other = client.submit('verify', _jpeg(20), _jpeg(250))
+        blank = client.submit('represent', _jpeg(0))
+        faces = client.submit('extract_faces', _jpeg(90))
+
+        self.assertTrue(worker.wait(same, timeout=10)['verified'])
+        self.assertFalse(worker.wait(other, timeout=10)['verified'])
+        with self.assertRaisesRegex(worker.FaceInferenceError, 'could not be detected'):
+            worker.wait(blank, timeout=10)
+        self.assertEqual(worker.wait(faces, timeout=10), [{'facial_area': {'x': 0}, 'confidence': 0.9}])
+        self.assertEqual(self.facenet.batches, [4])     # both images of both verify jobs
+
+    def test_lost_server_fails_pending_jobs_and_reconnects(self):
+        listener = Listener(self.address, authkey=face_server._authkey())
+        client = worker.FaceServerClient(self.address, autostart=False)
+        accepted = []
+        acceptor = threading.Thread(target=lambda: accepted.append(listener.accept()))
+        acceptor.start()
+
+        future = client.submit('represent', _jpeg(100))
+        acceptor.join(10)
+        conn = accepted[0]
+        conn.recv()
+        conn.close()        # the server died mid-job
+        listener.close()
+        with self.assertRaisesRegex(worker.FaceInferenceError, 'Face server unavailable'):
+            worker.wait(future, timeout=10)
+
+        self._start_server()
+        self.assertEqual(len(worker.wait(client.submit('represent', _jpeg(100)), timeout=10)), 1)
+
+    def test_only_one_server_holds_the_socket_lock(self):
+        first = face_server._acquire_lock(self.address)
+        self.addCleanup(first.close)
+        self.assertIsNone(face_server._acquire_lock(self.address))
+
+
+def _day_by_day_is_working(day, sunday_working):
+    """The per-day rule WorkCalendar replaced: Mon–Sat, plus Sunday when sundayWorking."""
+    return sunday_working or day.weekday() < 6
+
+
+def _day_by_day_count(first_day, last_day, sunday_working):
+    return sum(
+        1 for d in range((last_day - first_day).days + 1)
+        if _day_by_day_is_working(first_day + timedelta(days=d), sunday_working)
+    )
+
+
+def _queried_holiday_breakdown(admin_owner, year, month):
+    """payroll's _get_holiday_breakdown as it was before the calendar: one query per month."""
+    from master.models import Holiday
+    from payroll.views import _split_holidays
+
+    return _split_holidays(Holiday.objects.filter(
+        admin_owner=admin_owner, date__year=year, date__month=month, is_active=True,
+    ))
+
+
+class WorkCalendarTests(TestCase):
+
+    def setUp(self):
+        from master.models import Holiday, PayrollPolicy
+
+        cache.clear()
+        self.admin, _ = _make_tenant()
+        self.other_admin, _ = _make_tenant('o')
+        self.policy = PayrollPolicy.objects.create(admin_owner=self.admin, policy_data={})
+        for day, paid, active in [
+            (date(2024, 1, 1), True, True),      # Monday, paid
+            (date(2024, 1, 7), True, True),      # Sunday
+            (date(2024, 2, 29), False, True),    # leap day, unpaid
+            (date(2024, 3, 5), True, False),     # inactive
+            (date(2024, 12, 25), True, True),
+            (date(2025, 1, 1), False, True),
+        ]:
+            Holiday.objects.create(admin_owner=self.admin, name=f'H {day}', date=day, is_paid=paid, is_active=active)
+        Holiday.objects.create(admin_owner=self.other_admin, name='Elsewhere', date=date(2024, 1, 2))
+
+    def _set_sunday_working(self, value):
+        self.policy.policy_data = {'salaryCalculation': {'sundayWorking': value}}
+        self.policy.save()
+
+    def test_matches_the_day_by_day_rule(self):
+        from .work_calendar import work_calendar
+
+        for sunday_working in (False, True):
+            self._set_sunday_working(sunday_working)
+            for year in (2024, 2025):
+                cal = work_calendar(self.admin, year)
+                with self.subTest(sunday_working=sunday_working, year=year):
+                    self.assertEqual(cal.sunday_working, sunday_working)
+                    day = date(year, 1, 1)
+                    while day.year == year:
+                        self.assertEqual(cal.is_working_day(day), _day_by_day_is_working(day, sunday_working), day)
+                        day += timedelta(days=1)
+                    for month in range(1, 13):
+                        first, last = date(year, month, 1), date(year, month, monthrange(year, month)[1])
+                        self.assertEqual(cal.working_days(first, last), _day_by_day_count(first, last, sunday_working))
+                        self.assertEqual(cal.working_days(last, first), 0)
+
+    def test_leap_year(self):
+        from .work_calendar import work_calendar
+
+        cal = work_calendar(self.admin, 2024)
+        self.assertTrue(cal.is_working_day(date(2024, 2, 29)))
+        self.assertEqual(cal.working_days(date(2024, 2, 1), date(2024, 2, 29)), 25)    # 4 Sundays
+        self.assertEqual(cal.working_days(date(2024, 1, 1), date(2024, 12, 31)), 314)  # 366 days, 52 Sundays
+        self.assertEqual(cal.working_days(date(2024, 3, 1), date(2024, 12, 31)), 262)  # 306 days, 44 Sundays
+
+        self._set_sunday_working(True)
+        self.assertEqual(work_calendar(self.admin, 2024).working_days(date(2024, 1, 1), date(2024, 12, 31)), 366)
+
+    def test_working_days_across_a_year_boundary(self):
+        from .work_calendar import working_days_between, working_days_by_month
+
+        first, last = date(2024, 12, 20), date(2025, 1, 10)
+        for sunday_working in (False, True):
+            self._set_sunday_working(sunday_working)
+            with self.subTest(sunday_working=sunday_working):
+                self.assertEqual(
+                    working_days_between(self.admin, first, last), _day_by_day_count(first, last, sunday_working),
+                )
+                self.assertEqual(working_days_by_month(self.admin, first, last), {
+                    (2024, 12): _day_by_day_count(first, date(2024, 12, 31), sunday_working),
+                    (2025, 1): _day_by_day_count(date(2025, 1, 1), last, sunday_working),
+                })
+
+    def test_holidays_match_payrolls_breakdown(self):
+        from payroll.views import _get_holiday_breakdown
+        from .work_calendar import HOLIDAY_NONE, HOLIDAY_PAID, HOLIDAY_SUNDAY, HOLIDAY_UNPAID, work_calendar
+
+        def names(breakdown):
+            return {key: [h.name for h in value] if isinstance(value, list) else value
+                    for key, value in breakdown.items()}
+
+        for year in (2024, 2025):
+            cal = work_calendar(self.admin, year)
+            for month in range(1, 13):
+                with self.subTest(year=year, month=month):
+                    expected = names(_queried_holiday_breakdown(self.admin, year, month))
+                    self.assertEqual(names(cal.holiday_breakdown(month)), expected)
+                    self.assertEqual(names(_get_holiday_breakdown(year, month, self.admin)), expected)
+
+        cal = work_calendar(self.admin, 2024)
+        self.assertEqual(cal.holiday_class(date(2024, 1, 1)), HOLIDAY_PAID)
+        self.assertEqual(cal.holiday_class(date(2024, 1, 7)), HOLIDAY_SUNDAY)
+        self.assertEqual(cal.holiday_class(date(2024, 2, 29)), HOLIDAY_UNPAID)
+        self.assertEqual(cal.holiday_class(date(2024, 3, 5)), HOLIDAY_NONE)     # inactive
+        self.assertEqual(cal.holiday_class(date(2024, 1, 2)), HOLIDAY_NONE)     # another tenant's
+        self.assertTrue(cal.is_working_day(date(2024, 1, 1)))                   # holidays stay working days
+        with self.assertRaises(ValueError):
+            cal.holiday_class(date(2025, 1, 1))
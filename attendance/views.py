@@ -25,38 +25,20 @@ except ImportError:
         return {'access': '', 'refresh': ''}
 # ─────────────────────────────────────────────────────────────────────────────
 
-import tempfile
-import os
 import base64
 import json
 import requests
 import numpy as np
-import io
 from django.core.files.base import ContentFile
-from deepface import DeepFace
-
-# ── Pillow import (used for EXIF-rotation normalisation) ─────────────────────
-try:
-    from PIL import Image as _PilImage, ImageOps as _PilImageOps
-    _PIL_AVAILABLE = True
-except ImportError:
-    _PIL_AVAILABLE = False
-# ─────────────────────────────────────────────────────────────────────────────
-
-# ── Fix 1: Pre-load Facenet512 model at server startup ────────────────────────
-# DeepFace loads the neural network from disk on the first call (~10-25s).
-# Building it here means that cost is paid once when Django starts, not on
-# every employee punch.  Subsequent calls reuse the in-memory model instantly.
-try:
-    DeepFace.build_model('Facenet512')
-except Exception:
-    pass  # Non-fatal — model will lazy-load on first use if this fails
-# ─────────────────────────────────────────────────────────────────────────────
-
 
 from .models import Attendance, AttendanceSettings, LeaveRequest, LateArrivalRequest, EarlyDepartureRequest, EmployeeFaceData, BreakRecord, SalaryAdvanceRequest, WFHRequest
 from .geofence import validate_geofence
+from . import face
+from . import stats as attendance_stats
+from . import rollups as attendance_rollups
+from . import work_calendar
 from activitylog.utils import log_activity
+from login.tenant import tenant_config
 
 # ── WhatsApp notifications (fire-and-forget, never raises) ───────────────────
 try:
@@ -93,37 +75,6 @@ def _is_admin(user):
     )
 
 
-def _is_sunday_working(admin_owner):
-    """
-    Return True if the PayrollPolicy for this tenant has
-    salaryCalculation.sundayWorking = True, meaning Sunday is a regular
-    working day and should be included in all day-count calculations.
-    """
-    try:
-        from master.models import PayrollPolicy
-        policy_obj = PayrollPolicy.objects.filter(admin_owner=admin_owner).first()
-        if policy_obj and policy_obj.policy_data:
-            return bool(
-                policy_obj.policy_data
-                .get('salaryCalculation', {})
-                .get('sundayWorking', False)
-            )
-    except Exception:
-        pass
-    return False
-
-
-def _is_working_day(date_obj, sunday_working=False):
-    """
-    Return True if the given date should count as a working day.
-    Normally Mon–Sat (weekday 0–5); also includes Sunday when sunday_working=True.
-    """
-    wd = date_obj.weekday()
-    if sunday_working:
-        return True   # all 7 days are working days
-    return wd < 6     # Mon–Sat (exclude Sunday = weekday 6)
-
-
 def _get_admin_owner(user):
     """
     Return the admin_owner for tenant-scoped writes.
@@ -171,14 +122,14 @@ def _get_employee_duty_times(user, admin_owner):
     """
     start = end = None
     try:
-        from employee_management.models import Employee
-        emp = Employee.objects.filter(email=user.email, admin_owner=admin_owner).first()
+        from employee_management.identity import employee_for_user
+        emp = employee_for_user(user, admin_owner)
         if emp:
             start = emp.duty_start_time
             end   = emp.duty_end_time
     except Exception:
         pass
-    settings_obj = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+    settings_obj = tenant_config(admin_owner).attendance_settings
     if settings_obj:
         start = start or settings_obj.office_start_time
         end   = end   or settings_obj.office_end_time
@@ -191,11 +142,8 @@ def _get_payroll_policy_late_early(admin_owner):
     Each is a dict (or empty dict if not configured).
     """
     try:
-        from master.models import PayrollPolicy
-        policy_obj = PayrollPolicy.objects.filter(admin_owner=admin_owner).first()
-        if policy_obj and policy_obj.policy_data:
-            att = policy_obj.policy_data.get('attendance', {})
-            return att.get('lateArrival', {}), att.get('earlyDeparture', {})
+        att = tenant_config(admin_owner).policy_data.get('attendance', {})
+        return att.get('lateArrival', {}), att.get('earlyDeparture', {})
     except Exception:
         pass
     return {}, {}
@@ -439,57 +387,59 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             except Exception:
                 return Response({'error': 'Invalid check_out_time. Use HH:MM.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        attendance, created = Attendance.objects.get_or_create(
-            user=target_user,
-            date=att_date,
-            admin_owner=admin_owner,
-            defaults={
-                'status': att_status,
-                'check_in_time': check_in_dt,
-                'check_out_time': check_out_dt,
-                'check_in_method': 'manual' if check_in_dt else None,
-                'check_out_method': 'manual' if check_out_dt else None,
-                'notes': notes,
-                'is_verified': True,
-                'verified_by': admin,
-                'verified_at': timezone.now(),
-            }
-        )
-        if not created:
-            attendance.status = att_status
-            attendance.is_verified = True
-            attendance.verified_by = admin
-            attendance.verified_at = timezone.now()
-            attendance.notes = notes
-            if check_in_dt is not None:
-                # Only overwrite check_in_method when the check-in time is actually
-                # being changed (admin explicitly set a new time).  If the submitted
-                # time matches what is already stored, the original method (phone /
-                # face / normal) must be preserved so a manual checkout does not
-                # silently flip the check-in badge to "manual".
-                existing_ci = attendance.check_in_time
-                ci_changed = (
-                    existing_ci is None or
-                    # Compare at-minute precision to ignore sub-second drift
-                    existing_ci.astimezone(pytz.timezone('Asia/Kolkata')).replace(second=0, microsecond=0)
-                    != check_in_dt.replace(second=0, microsecond=0)
-                )
-                attendance.check_in_time = check_in_dt
-                if ci_changed:
-                    attendance.check_in_method = 'manual'
-                # else: leave check_in_method untouched (phone / face / normal)
-            if check_out_dt is not None:
-                attendance.check_out_time = check_out_dt
-                attendance.check_out_method = 'manual'
-            attendance.save(update_fields=[
-                'status', 'is_verified', 'verified_by', 'verified_at',
-                'notes', 'check_in_time', 'check_out_time',
-                'check_in_method', 'check_out_method', 'updated_at'
-            ])
-
-        if attendance.check_in_time and attendance.check_out_time:
-            attendance.calculate_hours()
-            attendance.save(update_fields=['total_hours'])
+        # Up to two saves below — refresh the day's rollup once
+        with attendance_rollups.deferred():
+            attendance, created = Attendance.objects.get_or_create(
+                user=target_user,
+                date=att_date,
+                admin_owner=admin_owner,
+                defaults={
+                    'status': att_status,
+                    'check_in_time': check_in_dt,
+                    'check_out_time': check_out_dt,
+                    'check_in_method': 'manual' if check_in_dt else None,
+                    'check_out_method': 'manual' if check_out_dt else None,
+                    'notes': notes,
+                    'is_verified': True,
+                    'verified_by': admin,
+                    'verified_at': timezone.now(),
+                }
+            )
+            if not created:
+                attendance.status = att_status
+                attendance.is_verified = True
+                attendance.verified_by = admin
+                attendance.verified_at = timezone.now()
+                attendance.notes = notes
+                if check_in_dt is not None:
+                    # Only overwrite check_in_method when the check-in time is actually
+                    # being changed (admin explicitly set a new time).  If the submitted
+                    # time matches what is already stored, the original method (phone /
+                    # face / normal) must be preserved so a manual checkout does not
+                    # silently flip the check-in badge to "manual".
+                    existing_ci = attendance.check_in_time
+                    ci_changed = (
+                        existing_ci is None or
+                        # Compare at-minute precision to ignore sub-second drift
+                        existing_ci.astimezone(pytz.timezone('Asia/Kolkata')).replace(second=0, microsecond=0)
+                        != check_in_dt.replace(second=0, microsecond=0)
+                    )
+                    attendance.check_in_time = check_in_dt
+                    if ci_changed:
+                        attendance.check_in_method = 'manual'
+                    # else: leave check_in_method untouched (phone / face / normal)
+                if check_out_dt is not None:
+                    attendance.check_out_time = check_out_dt
+                    attendance.check_out_method = 'manual'
+                attendance.save(update_fields=[
+                    'status', 'is_verified', 'verified_by', 'verified_at',
+                    'notes', 'check_in_time', 'check_out_time',
+                    'check_in_method', 'check_out_method', 'updated_at'
+                ])
+
+            if attendance.check_in_time and attendance.check_out_time:
+                attendance.calculate_hours()
+                attendance.save(update_fields=['total_hours'])
 
         return Response({
             'message': f'Attendance {"created" if created else "updated"} successfully.',
@@ -511,7 +461,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
 
         # ── Punch-method toggle gate ──────────────────────────────────────────
         admin_owner = _get_admin_owner(user)
-        settings_obj = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        settings_obj = request.tenant.for_owner(admin_owner).attendance_settings
         if settings_obj and not settings_obj.normal_checkin_enabled:
             return Response(
                 {'error': 'Normal check-in is currently disabled. Please use the face-recognition kiosk to punch in.'},
@@ -598,7 +548,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
 
         # ── Punch-method toggle gate ──────────────────────────────────────────
         admin_owner = _get_admin_owner(user)
-        settings_obj = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        settings_obj = request.tenant.for_owner(admin_owner).attendance_settings
         if settings_obj and not settings_obj.normal_checkin_enabled:
             return Response(
                 {'error': 'Normal check-out is currently disabled. Please use the face-recognition kiosk to punch out.'},
@@ -903,36 +853,9 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             date__lte=last_day,
         )
 
-        present_count = attendances.filter(status='present').count()
-        absent_count = attendances.filter(status='absent').count()
-        late_count = attendances.filter(status='late').count()
-        half_day_count = attendances.filter(status='half_day').count()
-        leave_count = attendances.filter(status='leave').count()
-
-        total_hours = attendances.aggregate(Sum('total_hours'))['total_hours__sum'] or 0
-        avg_hours = attendances.aggregate(Avg('total_hours'))['total_hours__avg'] or 0
-
-        total_days = attendances.count()
-        if total_days == 0:
-            admin_owner = _get_admin_owner(user)
-            sunday_working = _is_sunday_working(admin_owner)
-            current_date = first_day
-            total_days = 0
-            while current_date <= last_day:
-                if _is_working_day(current_date, sunday_working):
-                    total_days += 1
-                current_date += timedelta(days=1)
-
-        data = {
-            'present': present_count,
-            'absent': absent_count,
-            'late': late_count,
-            'half_day': half_day_count,
-            'leave': leave_count,
-            'total_days': total_days,
-            'total_hours': round(total_hours, 2),
-            'average_hours': round(avg_hours, 2),
-        }
+        data = attendance_stats.monthly_stats(attendances)
+        if data['total_days'] == 0:
+            data['total_days'] = work_calendar.working_days_between(admin_owner, first_day, last_day)
 
         serializer = MonthlyStatsSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1007,10 +930,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         last_day_of_month = today.replace(year=year, month=month, day=monthrange(year, month)[1])
         count_until = min(today, last_day_of_month)
 
-        working_days = sum(
-            1 for d in range((count_until - first_day).days + 1)
-            if _is_working_day(first_day + timedelta(days=d), _is_sunday_working(admin_owner))
-        )
+        working_days = work_calendar.working_days_between(admin_owner, first_day, count_until)
 
         if working_days == 0:
             return Response({
@@ -1078,19 +998,26 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         today = timezone.now().date()
         start_date = today - timedelta(days=days - 1)
 
-        records = Attendance.objects.filter(
-            admin_owner=admin_owner,
-            date__gte=start_date,
-            date__lte=today,
-        ).values('date', 'status')
+        if admin_owner is not None:
+            # One rollup row per day instead of every attendance row
+            day_map = {
+                d: {'present': row['present'] + row['late'], 'total': row['total']}
+                for d, row in attendance_rollups.daily(admin_owner.pk, start_date, today).items()
+            }
+        else:
+            records = Attendance.objects.filter(
+                admin_owner=admin_owner,
+                date__gte=start_date,
+                date__lte=today,
+            ).values('date', 'status')
 
-        from collections import defaultdict
-        day_map = defaultdict(lambda: {'present': 0, 'total': 0})
-        for rec in records:
-            d = rec['date']
-            day_map[d]['total'] += 1
-            if rec['status'] in ('present', 'late'):
-                day_map[d]['present'] += 1
+            from collections import defaultdict
+            day_map = defaultdict(lambda: {'present': 0, 'total': 0})
+            for rec in records:
+                d = rec['date']
+                day_map[d]['total'] += 1
+                if rec['status'] in ('present', 'late'):
+                    day_map[d]['present'] += 1
 
         result = []
         for i in range(days):
@@ -1119,20 +1046,14 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         today = timezone.now().date()
         admin_owner = _get_admin_owner(request.user)
 
-        qs = Attendance.objects.filter(
-            admin_owner=admin_owner,
-            date=today,
-        )
-
-        data = {
-            'date': str(today),
-            'present':  qs.filter(status='present').count(),
-            'absent':   qs.filter(status='absent').count(),
-            'late':     qs.filter(status='late').count(),
-            'half_day': qs.filter(status='half_day').count(),
-            'leave':    qs.filter(status='leave').count(),
-            'total':    qs.count(),
-        }
+        data = {'date': str(today)}
+        if admin_owner is not None:
+            counts = attendance_rollups.totals(admin_owner.pk, today, today)
+            data.update({s: counts[s] for s in attendance_stats.STATUSES})
+            data['total'] = counts['total']
+        else:
+            qs = Attendance.objects.filter(admin_owner=admin_owner, date=today)
+            data.update(attendance_stats.today_summary(qs))
 
         return Response(data, status=status.HTTP_200_OK)
     
@@ -1141,51 +1062,15 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         """
         Admin: returns total and pending count of all request types.
         GET /api/attendance/total-requests/
+
+        Counts are cached per tenant and invalidated by the request models'
+        post_save / post_delete signals (see attendance/models.py).
         """
         if not _is_admin(request.user):
             return Response({'error': 'Admin access required.'}, status=status.HTTP_403_FORBIDDEN)
 
         admin_owner = _get_admin_owner(request.user)
-
-        leave_qs           = LeaveRequest.objects.filter(admin_owner=admin_owner)
-        late_arrival_qs    = LateArrivalRequest.objects.filter(admin_owner=admin_owner)
-        early_departure_qs = EarlyDepartureRequest.objects.filter(admin_owner=admin_owner)
-        wfh_qs             = WFHRequest.objects.filter(admin_owner=admin_owner)
-        salary_advance_qs  = SalaryAdvanceRequest.objects.filter(admin_owner=admin_owner)
-
-        return Response({
-            'leave_requests':            {'total': leave_qs.count(),           'pending': leave_qs.filter(status='pending').count()},
-            'late_arrival_requests':     {'total': late_arrival_qs.count(),    'pending': late_arrival_qs.filter(status='pending').count()},
-            'early_departure_requests':  {'total': early_departure_qs.count(), 'pending': early_departure_qs.filter(status='pending').count()},
-            'wfh_requests':              {'total': wfh_qs.count(),             'pending': wfh_qs.filter(status='pending').count()},
-            'salary_advance_requests':   {'total': salary_advance_qs.count(),  'pending': salary_advance_qs.filter(status='pending').count()},
-            'overall': {
-                'total':   leave_qs.count() + late_arrival_qs.count() + early_departure_qs.count() + wfh_qs.count() + salary_advance_qs.count(),
-                'pending': leave_qs.filter(status='pending').count() + late_arrival_qs.filter(status='pending').count() + early_departure_qs.filter(status='pending').count() + wfh_qs.filter(status='pending').count() + salary_advance_qs.filter(status='pending').count(),
-            }
-        }, status=status.HTTP_200_OK)
-
-    @action(detail=False, methods=['get'], url_path='total-requests')
-    def total_requests(self, request):
-        if not _is_admin(request.user):
-            return Response({'error': 'Admin access required.'}, status=status.HTTP_403_FORBIDDEN)
-        admin_owner = _get_admin_owner(request.user)
-        leave_qs            = LeaveRequest.objects.filter(admin_owner=admin_owner)
-        late_arrival_qs     = LateArrivalRequest.objects.filter(admin_owner=admin_owner)
-        early_departure_qs  = EarlyDepartureRequest.objects.filter(admin_owner=admin_owner)
-        wfh_qs              = WFHRequest.objects.filter(admin_owner=admin_owner)
-        salary_advance_qs   = SalaryAdvanceRequest.objects.filter(admin_owner=admin_owner)
-        return Response({
-            'leave_requests':           {'total': leave_qs.count(),           'pending': leave_qs.filter(status='pending').count()},
-            'late_arrival_requests':    {'total': late_arrival_qs.count(),    'pending': late_arrival_qs.filter(status='pending').count()},
-            'early_departure_requests': {'total': early_departure_qs.count(), 'pending': early_departure_qs.filter(status='pending').count()},
-            'wfh_requests':             {'total': wfh_qs.count(),             'pending': wfh_qs.filter(status='pending').count()},
-            'salary_advance_requests':  {'total': salary_advance_qs.count(),  'pending': salary_advance_qs.filter(status='pending').count()},
-            'overall': {
-                'total':   leave_qs.count() + late_arrival_qs.count() + early_departure_qs.count() + wfh_qs.count() + salary_advance_qs.count(),
-                'pending': leave_qs.filter(status='pending').count() + late_arrival_qs.filter(status='pending').count() + early_departure_qs.filter(status='pending').count() + wfh_qs.filter(status='pending').count() + salary_advance_qs.filter(status='pending').count(),
-            }
-        }, status=status.HTTP_200_OK)
+        return Response(attendance_stats.request_counts(admin_owner), status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='attendance-percentage')
     def attendance_percentage(self, request):
@@ -1198,31 +1083,19 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         last_day  = datetime(year, month, monthrange(year, month)[1]).date()
         today     = timezone.now().date()
         effective_end = min(last_day, today)
-        sunday_working = _is_sunday_working(admin_owner)
-        working_days = 0
-        current = first_day
-        while current <= effective_end:
-            if _is_working_day(current, sunday_working):
-                working_days += 1
-            current += timedelta(days=1)
-        qs = Attendance.objects.filter(admin_owner=admin_owner, date__gte=first_day, date__lte=effective_end)
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        total_employees = User.objects.filter(admin_owner=admin_owner, is_active=True).count()
-        expected = total_employees * working_days
-        present_count = qs.filter(status__in=['present', 'late', 'half_day']).count()
-        percentage = round((present_count / expected) * 100, 2) if expected > 0 else 0.0
-        return Response({
-            'year':                  year,
-            'month':                 month,
-            'total_employees':       total_employees,
-            'working_days':          working_days,
-            'expected':              expected,
-            'present':               present_count,
-            'absent':                qs.filter(status='absent').count(),
-            'leave':                 qs.filter(status='leave').count(),
-            'attendance_percentage': percentage,
-        }, status=status.HTTP_200_OK)
+        working_days = work_calendar.working_days_between(admin_owner, first_day, effective_end)
+        total_employees = get_user_model().objects.filter(admin_owner=admin_owner, is_active=True).count()
+        data = {'year': year, 'month': month}
+        if admin_owner is not None:
+            counts = attendance_rollups.totals(admin_owner.pk, first_day, effective_end)
+            data.update(attendance_stats.attendance_percentage_from_counts(
+                sum(counts[s] for s in attendance_stats.ATTENDED_STATUSES),
+                counts['absent'], counts['leave'], total_employees, working_days,
+            ))
+        else:
+            qs = Attendance.objects.filter(admin_owner=admin_owner, date__gte=first_day, date__lte=effective_end)
+            data.update(attendance_stats.attendance_percentage(qs, total_employees, working_days))
+        return Response(data, status=status.HTTP_200_OK)
     # ─────────────────────────────────────────────────────────────────────────────
 # LATE ARRIVAL REQUEST VIEWSET
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1650,7 +1523,6 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
 
         admin_notes = serializer.validated_data.get('admin_notes', '')
         admin_owner = _get_admin_owner(request.user)
-        sunday_working = _is_sunday_working(admin_owner)
 
         # ── Determine if this leave type is unpaid (triggers salary deduction) ─
         is_unpaid = False
@@ -1668,10 +1540,14 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
 
         def _apply_attendance_records(status_value, note_prefix):
             """Create/update attendance records for each working day in the leave range."""
+            with attendance_rollups.deferred():
+                return _mark_leave_days(status_value, note_prefix)
+
+        def _mark_leave_days(status_value, note_prefix):
             current_date = leave_request.start_date
             working_days = 0
             while current_date <= leave_request.end_date:
-                if _is_working_day(current_date, sunday_working):
+                if work_calendar.work_calendar(admin_owner, current_date.year).is_working_day(current_date):
                     working_days += 1
                     attendance, created = Attendance.objects.get_or_create(
                         user=leave_request.user,
@@ -1710,36 +1586,28 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
             One Deduction row is created per calendar month the leave spans
             (upsert so repeated approvals don't double-count).
             """
-            from master.models import Deduction as MasterDeduction, PayrollPolicy as _PP
-            from employee_management.models import Employee
+            from master.models import Deduction as MasterDeduction
+            from employee_management.identity import employee_for_user
             from decimal import Decimal, ROUND_HALF_UP
             import calendar as _cal
-            from collections import defaultdict
 
             # ── Locate employee ───────────────────────────────────────────────
-            employee = Employee.objects.filter(
-                email=leave_request.user.email,
-                admin_owner=admin_owner,
-            ).first()
+            employee = employee_for_user(leave_request.user, admin_owner)
             if not employee or not employee.salary:
                 return
 
             basic_salary = Decimal(str(employee.salary))
 
             # ── Payroll policy (normalized mode?) ─────────────────────────────
-            policy_obj  = _PP.objects.filter(admin_owner=admin_owner).first()
-            policy_data = policy_obj.policy_data if policy_obj else {}
+            policy_data = tenant_config(admin_owner).policy_data
             sal_calc    = policy_data.get('salaryCalculation', {})
             normalized_mode       = sal_calc.get('enabled', False)
             normalized_month_days = int(sal_calc.get('normalizedMonthDays', 30))
 
             # ── Count leave days per (year, month) ────────────────────────────
-            days_per_month = defaultdict(int)
-            cur = leave_request.start_date
-            while cur <= leave_request.end_date:
-                if _is_working_day(cur, sunday_working):
-                    days_per_month[(cur.year, cur.month)] += 1
-                cur += timedelta(days=1)
+            days_per_month = work_calendar.working_days_by_month(
+                admin_owner, leave_request.start_date, leave_request.end_date
+            )
 
             # ── Build one Deduction row per affected month ────────────────────
             for (yr, mo), days in days_per_month.items():
@@ -1749,9 +1617,8 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
                     total_days_divisor = max(1, normalized_month_days)
                 else:
                     # Standard: calendar days minus Sunday-holidays for that month
-                    from payroll.views import _get_holiday_breakdown
                     cal_days = _cal.monthrange(yr, mo)[1]
-                    hol_bk   = _get_holiday_breakdown(yr, mo, admin_owner)
+                    hol_bk   = work_calendar.work_calendar(admin_owner, yr).holiday_breakdown(mo)
                     total_days_divisor = max(1, cal_days - hol_bk['sunday_count'])
 
                 per_day    = (basic_salary / Decimal(str(total_days_divisor))).quantize(
@@ -2323,14 +2190,8 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
         # ── Quality gate: ensure exactly ONE face is detectable before saving ─
         # This prevents registering blurry, multi-person, or obstructed photos
         # which are the #1 cause of downstream false positives.
-        tmp_path = self._write_temp(img_bytes, suffix='.jpg')
         try:
-            faces = DeepFace.extract_faces(
-                img_path=tmp_path,
-                detector_backend='retinaface',   # most accurate detector
-                enforce_detection=True,
-                align=True,
-            )
+            faces = face.worker.extract_faces(img_bytes)   # retinaface — most accurate detector
             if len(faces) == 0:
                 return Response(
                     {'error': 'No face detected in the image. Please use a clear, well-lit photo with the face centred.'},
@@ -2356,12 +2217,6 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             return Response({'error': f'Face validation error: {err_str}'}, status=status.HTTP_400_BAD_REQUEST)
-        finally:
-            try:
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-            except Exception:
-                pass
 
         # ── Save the validated reference image ────────────────────────────────
         face_obj, _ = EmployeeFaceData.objects.get_or_create(
@@ -2370,36 +2225,23 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
         )
         face_obj.reference_image.save(
             f'face_{user_id}.jpg',
-            ContentFile(img_bytes),
+            ContentFile(face.image.upright_jpeg(img_bytes)),   # stored upright for display
             save=False,   # don't hit DB yet — we compute embedding first
         )
 
         # ── Fix 3: Pre-compute and store the Facenet512 embedding ─────────────
         # This means punch time = one cosine distance calculation (~1ms)
         # instead of running DeepFace.verify() which reloads the model each time.
-        emb_tmp = self._write_temp(img_bytes, suffix='.jpg')
         try:
-            representations = DeepFace.represent(
-                img_path=emb_tmp,
-                model_name='Facenet512',
-                detector_backend='retinaface',
-                enforce_detection=True,
-                align=True,
-            )
-            embedding = representations[0]['embedding']  # list of 512 floats
-            face_obj.face_embedding = json.dumps(embedding)
+            representations = face.worker.represent(img_bytes)
+            face_obj.embedding = representations[0]['embedding']  # 512 floats
         except Exception:
             # Embedding computation failed — still save the image so the
             # record isn't lost.  Punch will fall back to DeepFace.verify().
             face_obj.face_embedding = None
-        finally:
-            try:
-                if os.path.exists(emb_tmp):
-                    os.remove(emb_tmp)
-            except Exception:
-                pass
 
         face_obj.save()
+        face.index.update_face_index(face_obj)
 
         return Response({'message': 'Face registered successfully!', 'user_id': int(user_id), 'face_registered': True})
 
@@ -2461,7 +2303,7 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
         admin_owner  = _get_admin_owner(device_user)
 
         # ── Face punch toggle gate ────────────────────────────────────────────
-        _kiosk_settings = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        _kiosk_settings = request.tenant.for_owner(admin_owner).attendance_settings
         if _kiosk_settings and not _kiosk_settings.face_punch_enabled:
             return Response(
                 {'error': 'Face punch-in/out is currently disabled for this organisation.'},
@@ -2483,23 +2325,13 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # ── 4. Write incoming image to a temp file (deleted in finally) ───────
-        inc_path = self._write_temp(inc_bytes, suffix='.jpg')
-
-        matched_user  = None
-        best_distance = 1.0   # lower = better match
         threshold     = self._FACE_MODELS[0]['threshold']  # 0.30
 
         # ── Fix 3: Compute live embedding once, then compare against all stored
         # embeddings in DB — pure numpy vector math, no model reloads per user.
         try:
-            live_representations = DeepFace.represent(
-                img_path=inc_path,
-                model_name='Facenet512',
-                detector_backend='retinaface',  # matches registration detector; handles mobile selfies correctly
-                enforce_detection=True,
-                align=True,
-            )
+            # retinaface matches the registration detector; handles mobile selfies correctly
+            live_representations = face.worker.represent(inc_bytes)
             live_embedding = np.array(live_representations[0]['embedding'])
         except Exception as e:
             err_str = str(e)
@@ -2509,70 +2341,11 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
                     status=status.HTTP_403_FORBIDDEN,
                 )
             return Response({'error': f'Face processing error: {err_str}'}, status=status.HTTP_400_BAD_REQUEST)
-        finally:
-            try:
-                if os.path.exists(inc_path):
-                    os.remove(inc_path)
-            except Exception:
-                pass
 
-        # ── Compare live embedding against each registered employee ───────────
-        for face_obj in all_faces:
-            if face_obj.face_embedding:
-                # Fast path — stored embedding available (~1ms per candidate)
-                try:
-                    stored_embedding = np.array(json.loads(face_obj.face_embedding))
-                    dot      = np.dot(live_embedding, stored_embedding)
-                    norm     = np.linalg.norm(live_embedding) * np.linalg.norm(stored_embedding)
-                    distance = 1.0 - (dot / norm) if norm > 0 else 1.0
-
-                    if distance <= threshold and distance < best_distance:
-                        best_distance = distance
-                        matched_user  = face_obj.user
-                except Exception:
-                    continue  # skip corrupt embedding silently
-            else:
-                # Slow fallback — no embedding yet (pre-update employee)
-                try:
-                    with face_obj.reference_image.open('rb') as f:
-                        ref_bytes = f.read()
-                except Exception:
-                    continue
-
-                ref_path = self._write_temp(ref_bytes, suffix='.jpg')
-                inc_path2 = self._write_temp(inc_bytes, suffix='.jpg')
-                try:
-                    ref_representations = DeepFace.represent(
-                        img_path=ref_path,
-                        model_name='Facenet512',
-                        detector_backend='retinaface',
-                        enforce_detection=True,
-                        align=True,
-                    )
-                    stored_embedding = np.array(ref_representations[0]['embedding'])
-                    dot      = np.dot(live_embedding, stored_embedding)
-                    norm     = np.linalg.norm(live_embedding) * np.linalg.norm(stored_embedding)
-                    distance = 1.0 - (dot / norm) if norm > 0 else 1.0
-
-                    if distance <= threshold and distance < best_distance:
-                        best_distance = distance
-                        matched_user  = face_obj.user
-
-                    # Opportunistically save embedding for next time
-                    try:
-                        face_obj.face_embedding = json.dumps(ref_representations[0]['embedding'])
-                        face_obj.save(update_fields=['face_embedding', 'updated_at'])
-                    except Exception:
-                        pass
-                except Exception:
-                    continue
-                finally:
-                    for p in (ref_path, inc_path2):
-                        try:
-                            if os.path.exists(p):
-                                os.remove(p)
-                        except Exception:
-                            pass
+        # ── Identify against the tenant's face index ──────────────────────────
+        matched_user, best_distance = self._identify_face(
+            admin_owner, all_faces, live_embedding, threshold
+        )
 
         # ── 5. No match found ─────────────────────────────────────────────────
         if matched_user is None:
@@ -2582,7 +2355,7 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
             )
 
         # ── 6. Geofence check (using the matched employee's profile) ──────────
-        settings_obj = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        settings_obj = request.tenant.for_owner(admin_owner).attendance_settings
         allowed, geo_error, _ = validate_geofence(matched_user, latitude, longitude, settings_obj)
         if not allowed:
             return Response({'error': geo_error}, status=status.HTTP_403_FORBIDDEN)
@@ -2814,7 +2587,7 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
         admin_owner = _get_admin_owner(device_user)
 
         # ── Face punch toggle gate ────────────────────────────────────────────
-        _auto_settings = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        _auto_settings = request.tenant.for_owner(admin_owner).attendance_settings
         if _auto_settings and not _auto_settings.face_punch_enabled:
             return Response(
                 {'error': 'Face punch-in/out is currently disabled for this organisation.'},
@@ -2836,19 +2609,11 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
             )
 
         # ── 4. Compute live face embedding once ───────────────────────────────
-        inc_path = self._write_temp(inc_bytes, suffix='.jpg')
-        matched_user  = None
-        best_distance = 1.0
         threshold     = self._FACE_MODELS[0]['threshold']  # 0.30
 
         try:
-            live_reps = DeepFace.represent(
-                img_path=inc_path,
-                model_name='Facenet512',
-                detector_backend='retinaface',  # matches registration detector; handles mobile selfies correctly
-                enforce_detection=True,
-                align=True,
-            )
+            # retinaface matches the registration detector; handles mobile selfies correctly
+            live_reps = face.worker.represent(inc_bytes)
             live_embedding = np.array(live_reps[0]['embedding'])
         except Exception as e:
             err_str = str(e)
@@ -2858,65 +2623,11 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
                     status=status.HTTP_403_FORBIDDEN,
                 )
             return Response({'error': f'Face processing error: {err_str}'}, status=status.HTTP_400_BAD_REQUEST)
-        finally:
-            try:
-                if os.path.exists(inc_path):
-                    os.remove(inc_path)
-            except Exception:
-                pass
 
-        # ── 5. Compare against every registered employee ──────────────────────
-        for face_obj in all_faces:
-            if face_obj.face_embedding:
-                try:
-                    stored_emb = np.array(json.loads(face_obj.face_embedding))
-                    dot      = np.dot(live_embedding, stored_emb)
-                    norm     = np.linalg.norm(live_embedding) * np.linalg.norm(stored_emb)
-                    distance = 1.0 - (dot / norm) if norm > 0 else 1.0
-                    if distance <= threshold and distance < best_distance:
-                        best_distance = distance
-                        matched_user  = face_obj.user
-                except Exception:
-                    continue
-            else:
-                # Slow fallback for employees without pre-computed embeddings
-                try:
-                    with face_obj.reference_image.open('rb') as f:
-                        ref_bytes = f.read()
-                except Exception:
-                    continue
-                ref_path  = self._write_temp(ref_bytes, suffix='.jpg')
-                inc_path2 = self._write_temp(inc_bytes, suffix='.jpg')
-                try:
-                    ref_reps = DeepFace.represent(
-                        img_path=ref_path,
-                        model_name='Facenet512',
-                        detector_backend='retinaface',
-                        enforce_detection=True,
-                        align=True,
-                    )
-                    stored_emb = np.array(ref_reps[0]['embedding'])
-                    dot      = np.dot(live_embedding, stored_emb)
-                    norm     = np.linalg.norm(live_embedding) * np.linalg.norm(stored_emb)
-                    distance = 1.0 - (dot / norm) if norm > 0 else 1.0
-                    if distance <= threshold and distance < best_distance:
-                        best_distance = distance
-                        matched_user  = face_obj.user
-                    # Cache embedding for next time
-                    try:
-                        face_obj.face_embedding = json.dumps(ref_reps[0]['embedding'])
-                        face_obj.save(update_fields=['face_embedding', 'updated_at'])
-                    except Exception:
-                        pass
-                except Exception:
-                    continue
-                finally:
-                    for p in (ref_path, inc_path2):
-                        try:
-                            if os.path.exists(p):
-                                os.remove(p)
-                        except Exception:
-                            pass
+        # ── 5. Identify against the tenant's face index ───────────────────────
+        matched_user, best_distance = self._identify_face(
+            admin_owner, all_faces, live_embedding, threshold
+        )
 
         # ── 6. No match found ─────────────────────────────────────────────────
         if matched_user is None:
@@ -2926,7 +2637,7 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
             )
 
         # ── 7. Geofence check for the matched employee ────────────────────────
-        settings_obj = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        settings_obj = request.tenant.for_owner(admin_owner).attendance_settings
         allowed, geo_error, _ = validate_geofence(matched_user, latitude, longitude, settings_obj)
         if not allowed:
             return Response({'error': geo_error}, status=status.HTTP_403_FORBIDDEN)
@@ -3111,46 +2822,13 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
         {'model': 'Facenet512',  'metric': 'cosine',    'threshold': 0.35},
     ]
 
-    @staticmethod
-    def _normalize_image_orientation(raw_bytes: bytes) -> bytes:
-        """
-        Bake any EXIF orientation tag into the pixel data and return a clean
-        RGB JPEG.
-
-        Mobile phones (iOS + Android) write the image sensor output in landscape
-        but store a rotation flag in EXIF.  OpenCV (used by DeepFace as the fast
-        detector) ignores that flag, so it receives a rotated/flipped face and
-        fails to detect it.  RetinaFace handles it better but not perfectly.
-
-        By stripping EXIF and physically rotating the pixels here — before any
-        DeepFace call — we guarantee the image is always upright regardless of
-        which detector is used or how the photo was taken.
-
-        Falls back to returning the original bytes if Pillow is not installed or
-        if the image cannot be opened (non-fatal).
-        """
-        if not _PIL_AVAILABLE or not raw_bytes:
-            return raw_bytes
-        try:
-            img = _PilImage.open(io.BytesIO(raw_bytes))
-            # ImageOps.exif_transpose rotates the image so that the pixel data
-            # matches what you see on screen, then removes the EXIF orientation tag.
-            img = _PilImageOps.exif_transpose(img)
-            # Ensure RGB (some phones save RGBA / CMYK / palette PNGs)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            buf = io.BytesIO()
-            img.save(buf, format='JPEG', quality=95)
-            return buf.getvalue()
-        except Exception:
-            # Non-fatal — return original bytes unchanged
-            return raw_bytes
-
     def _load_image_bytes(self, image_data):
         """
         Accept a base64 string (with or without data-URI prefix) or a Django
-        UploadedFile / any file-like object.  Returns raw JPEG bytes with EXIF
-        orientation baked in (so mobile selfies are always upright for DeepFace).
+        UploadedFile / any file-like object and return the raw image bytes.
+
+        No decoding happens here: the face worker decodes the bytes exactly
+        once (EXIF transpose + downscale, see face.image.decode_image).
         """
         if isinstance(image_data, str):
             if ',' in image_data:
@@ -3160,17 +2838,60 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
             if hasattr(image_data, 'seek'):
                 image_data.seek(0)
             raw = image_data.read()
-        # ── Normalise EXIF orientation so DeepFace always sees an upright face ──
-        return self._normalize_image_orientation(raw)
+        return raw
 
-    def _write_temp(self, content: bytes, suffix='.jpg') -> str:
-        """Write bytes to a named temp file and return the path (caller must delete)."""
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        try:
-            tmp.write(content)
-        finally:
-            tmp.close()
-        return tmp.name
+    def _identify_face(self, admin_owner, all_faces, live_embedding, threshold):
+        """
+        Return (user, cosine_distance) for the registered face that best
+        matches live_embedding within threshold, or (None, 1.0).
+
+        Faces with a stored embedding are scored in one shot against the
+        tenant's FaceIndex.  Faces registered before embeddings were stored
+        go through the slow DeepFace.represent() fallback, and their freshly
+        computed embedding is saved and patched into the index.
+        """
+        matched_user_id, best_distance = face.index.get_face_index(admin_owner).best_match(
+            live_embedding, threshold
+        )
+        if matched_user_id is None:
+            best_distance = 1.0
+
+        # Submit every pending reference image up front so the worker pool can
+        # batch them, then score the results as they come back.
+        pending = []
+        pool    = face.worker.get_pool()
+        for face_obj in all_faces.filter(Q(face_embedding__isnull=True) | Q(face_embedding=b'')):
+            try:
+                with face_obj.reference_image.open('rb') as f:
+                    ref_bytes = f.read()
+            except Exception:
+                continue
+            pending.append((face_obj, pool.submit('represent', ref_bytes)))
+
+        for face_obj, future in pending:
+            try:
+                ref_reps   = face.worker.wait(future)
+                stored_emb = np.array(ref_reps[0]['embedding'])
+                dot      = np.dot(live_embedding, stored_emb)
+                norm     = np.linalg.norm(live_embedding) * np.linalg.norm(stored_emb)
+                distance = 1.0 - (dot / norm) if norm > 0 else 1.0
+                if distance <= threshold and distance < best_distance:
+                    best_distance   = distance
+                    matched_user_id = face_obj.user_id
+
+                # Cache embedding for next time
+                try:
+                    face_obj.embedding = ref_reps[0]['embedding']
+                    face_obj.save(update_fields=['face_embedding', 'updated_at'])
+                    face.index.update_face_index(face_obj)
+                except Exception:
+                    pass
+            except Exception:
+                continue
+
+        if matched_user_id is None:
+            return None, 1.0
+        return get_user_model().objects.filter(pk=matched_user_id).first(), best_distance
 
     def _verify_face(self, user, incoming_image_data):
         """
@@ -3204,17 +2925,11 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
 
         # ── 3a. Fast path — embedding already stored in DB ────────────────────
         if face_data.face_embedding:
-            inc_path = self._write_temp(inc_bytes, suffix='.jpg')
             try:
-                representations = DeepFace.represent(
-                    img_path=inc_path,
-                    model_name='Facenet512',
-                    detector_backend='retinaface',  # matches registration detector; handles mobile selfies correctly
-                    enforce_detection=True,
-                    align=True,
-                )
+                # retinaface matches the registration detector; handles mobile selfies correctly
+                representations = face.worker.represent(inc_bytes)
                 live_embedding = np.array(representations[0]['embedding'])
-                stored_embedding = np.array(json.loads(face_data.face_embedding))
+                stored_embedding = face_data.embedding
 
                 # Cosine distance = 1 - cosine_similarity
                 dot   = np.dot(live_embedding, stored_embedding)
@@ -3233,12 +2948,6 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
                         'face the camera directly, and remove obstructions.'
                     )
                 # Unexpected error — fall through to slow path below
-            finally:
-                try:
-                    if os.path.exists(inc_path):
-                        os.remove(inc_path)
-                except Exception:
-                    pass
 
         # ── 3b. Slow fallback — no embedding stored yet (pre-update employees) ─
         # Also recomputes and saves the embedding so next time is fast.
@@ -3251,32 +2960,18 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
         except Exception as e:
             return False, f'Failed to load reference face: {e}'
 
-        ref_path = self._write_temp(ref_bytes, suffix='.jpg')
-        inc_path = self._write_temp(inc_bytes, suffix='.jpg')
         try:
-            result = DeepFace.verify(
-                img1_path=inc_path,
-                img2_path=ref_path,
-                model_name='Facenet512',
-                distance_metric='cosine',
-                enforce_detection=True,
-                align=True,
-            )
+            result = face.worker.verify(inc_bytes, ref_bytes)
             distance = result.get('distance', 1.0)
             passed   = result.get('verified', False) and (distance <= threshold)
 
             if passed:
                 # ── Opportunistically save embedding so next punch is fast ────
                 try:
-                    representations = DeepFace.represent(
-                        img_path=ref_path,
-                        model_name='Facenet512',
-                        detector_backend='retinaface',
-                        enforce_detection=True,
-                        align=True,
-                    )
-                    face_data.face_embedding = json.dumps(representations[0]['embedding'])
+                    representations = face.worker.represent(ref_bytes)
+                    face_data.embedding = representations[0]['embedding']
                     face_data.save(update_fields=['face_embedding', 'updated_at'])
+                    face.index.update_face_index(face_data)
                 except Exception:
                     pass   # Non-fatal — will retry on next successful punch
                 return True, 'Verified'
@@ -3291,13 +2986,6 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
                     'face the camera directly, and remove obstructions.'
                 )
             return False, f'Face verification error: {err_str}'
-        finally:
-            for p in (ref_path, inc_path):
-                try:
-                    if os.path.exists(p):
-                        os.remove(p)
-                except Exception:
-                    pass
 
     @action(detail=False, methods=['post'], url_path='check-in')
     def check_in(self, request):
@@ -3313,7 +3001,7 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
 
         # ── Face punch toggle gate ────────────────────────────────────────────
         admin_owner = _get_admin_owner(user)
-        _face_settings = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        _face_settings = request.tenant.for_owner(admin_owner).attendance_settings
         if _face_settings and not _face_settings.face_punch_enabled:
             return Response(
                 {'error': 'Face punch-in/out is currently disabled for this organisation.'},
@@ -3409,7 +3097,7 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
 
         # ── Face punch toggle gate ────────────────────────────────────────────
         admin_owner = _get_admin_owner(user)
-        _face_co_settings = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        _face_co_settings = request.tenant.for_owner(admin_owner).attendance_settings
         if _face_co_settings and not _face_co_settings.face_punch_enabled:
             return Response(
                 {'error': 'Face punch-in/out is currently disabled for this organisation.'},
@@ -3494,7 +3182,7 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
             return Response({'error': 'Image is required for face break-in.'}, status=status.HTTP_400_BAD_REQUEST)
 
         admin_owner = _get_admin_owner(user)
-        _face_break_settings = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        _face_break_settings = request.tenant.for_owner(admin_owner).attendance_settings
         if _face_break_settings and not _face_break_settings.face_break_enabled:
             return Response(
                 {'error': 'Face break-in/out is currently disabled for this organisation.'},
@@ -3559,7 +3247,7 @@ class FaceRecognitionViewSet(viewsets.ViewSet):
             return Response({'error': 'Image is required for face break-out.'}, status=status.HTTP_400_BAD_REQUEST)
 
         admin_owner = _get_admin_owner(user)
-        _face_break_settings = AttendanceSettings.objects.filter(admin_owner=admin_owner).order_by('-id').first()
+        _face_break_settings = request.tenant.for_owner(admin_owner).attendance_settings
         if _face_break_settings and not _face_break_settings.face_break_enabled:
             return Response(
                 {'error': 'Face break-in/out is currently disabled for this organisation.'},
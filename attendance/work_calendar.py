@@ -0,0 +1,132 @@
+# attendance/work_calendar.py
+"""
+Per-tenant working-day calendar.
+
+Working-day counts used to be recomputed day by day wherever they were
+needed — the average-attendance card even re-read the Sunday-working flag
+for every day of the month, and leave approval walked the leave range
+twice.  A WorkCalendar precomputes one tenant's year once:
+
+    cal = tenant_config(admin_owner).work_calendar(2025)
+
+    cal.is_working_day(day)              # Mon–Sat, plus Sunday when sundayWorking
+    cal.working_days(first, last)        # count in [first, last], O(1)
+    cal.holiday_class(day)               # NONE / SUNDAY / PAID / UNPAID
+    cal.holiday_breakdown(month)         # same dict as payroll's _get_holiday_breakdown
+
+    working_days_between(admin_owner, first, last)   # may span years
+
+Internally a year is three NumPy arrays indexed by day-of-year: a bool
+array of working days, a uint8 array of holiday classes and the running
+working-day count, so a range count is two lookups.
+
+Holidays do not make a day non-working here, exactly as before: payroll
+pays or deducts them separately (see payroll.views._get_holiday_breakdown).
+
+Calendars are stored in the tenant-config cache (login/tenant_cache.py)
+next to the Holiday rows and PayrollPolicy they are built from, so the
+signals that invalidate those — a Holiday saved or deleted, the payroll
+policy's sundayWorking toggled — drop the calendar with them.
+"""
+
+from calendar import monthrange
+from datetime import date
+
+import numpy as np
+
+# Holiday classes, as bucketed by payroll.views._split_holidays.
+HOLIDAY_NONE = 0
+HOLIDAY_SUNDAY = 1
+HOLIDAY_PAID = 2
+HOLIDAY_UNPAID = 3
+
+
+class WorkCalendar:
+    """One tenant's working days and holidays for one calendar year."""
+
+    def __init__(self, year, sunday_working=False, holidays=()):
+        self.year = year
+        self.sunday_working = bool(sunday_working)
+        self.first_day = date(year, 1, 1)
+        self.last_day = date(year, 12, 31)
+
+        days = (self.last_day - self.first_day).days + 1
+        # date(year, 1, 1).weekday() is the weekday of index 0.
+        weekdays = (np.arange(days) + self.first_day.weekday()) % 7
+        self._working = np.ones(days, dtype=bool) if self.sunday_working else weekdays != 6
+        # _cumulative[i] = working days among the first i days of the year.
+        self._cumulative = np.concatenate(([0], np.cumsum(self._working, dtype=np.int32)))
+
+        self._holiday_class = np.zeros(days, dtype=np.uint8)
+        self._holidays_by_month = {month: [] for month in range(1, 13)}
+        for h in holidays:
+            if h.date.year != year:
+                continue
+            self._holidays_by_month[h.date.month].append(h)
+            index = self._index(h.date)
+            if h.date.weekday() == 6:
+                self._holiday_class[index] = HOLIDAY_SUNDAY
+            elif h.is_paid:
+                self._holiday_class[index] = HOLIDAY_PAID
+            else:
+                self._holiday_class[index] = HOLIDAY_UNPAID
+
+    def _index(self, day):
+        return (day - self.first_day).days
+
+    def _check(self, day):
+        if day.year != self.year:
+            raise ValueError(f'{day} is outside the {self.year} calendar.')
+
+    def is_working_day(self, day):
+        self._check(day)
+        return bool(self._working[self._index(day)])
+
+    def working_days(self, first_day, last_day):
+        """Working days in [first_day, last_day], clipped to this year."""
+        first_day = max(first_day, self.first_day)
+        last_day = min(last_day, self.last_day)
+        if last_day < first_day:
+            return 0
+        return int(self._cumulative[self._index(last_day) + 1] - self._cumulative[self._index(first_day)])
+
+    def holiday_class(self, day):
+        self._check(day)
+        return int(self._holiday_class[self._index(day)])
+
+    def holiday_breakdown(self, month):
+        """The month's holidays bucketed like payroll.views._get_holiday_breakdown (fresh lists)."""
+        from payroll.views import _split_holidays
+
+        return _split_holidays(self._holidays_by_month[month])
+
+
+def work_calendar(admin_owner, year):
+    """The tenant's WorkCalendar for year (cached; see module docstring)."""
+    from login.tenant import tenant_config
+
+    return tenant_config(admin_owner).work_calendar(year)
+
+
+def working_days_between(admin_owner, first_day, last_day):
+    """Working days in [first_day, last_day] for the tenant; the range may span years."""
+    total = 0
+    for year in range(first_day.year, last_day.year + 1):
+        total += work_calendar(admin_owner, year).working_days(first_day, last_day)
+    return total
+
+
+def working_days_by_month(admin_owner, first_day, last_day):
+    """{(year, month): working days} for every month [first_day, last_day] touches."""
+    counts = {}
+    for year in range(first_day.year, last_day.year + 1):
+        cal = work_calendar(admin_owner, year)
+        first_month = first_day.month if year == first_day.year else 1
+        last_month = last_day.month if year == last_day.year else 12
+        for month in range(first_month, last_month + 1):
+            month_start = max(first_day, date(year, month, 1))
+            month_end = min(last_day, date(year, month, monthrange(year, month)[1]))
+            days = cal.working_days(month_start, month_end)
+            if days:
+                counts[(year, month)] = days
+    return counts
@@ -13,16 +13,19 @@ Endpoints:
 import requests as http_requests
 import logging
 
+from task_hrms_backend import httpclient
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 
 from activitylog.utils import log_activity
+from login import license_directory
 
 logger = logging.getLogger(__name__)
 
 # ── External API ──────────────────────────────────────────────────────────────
-LICENSE_API_URL = "https://activate.imcbs.com/mobileapp/api/project/trellisco/"
+# The customer list itself is read through login.license_directory.
 DEVICE_DELETE_URL = "https://activate.imcbs.com/mobileapp/api/project/trellisco/mobile_control/"
 API_TIMEOUT = 12  # seconds
 
@@ -43,34 +46,31 @@ def _get_admin_owner(user):
 
 def _fetch_all_customers():
     """
-    Fetch all customer data from the license server.
-    Returns (customers_list, error_response_or_None).
+    The license server's customer list, from the cached license directory.
+    Returns (snapshot, error_response_or_None); snapshot.items is the list,
+    snapshot.index maps client_id → customer.
     """
     try:
-        resp = http_requests.get(LICENSE_API_URL, timeout=API_TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
-        return data.get('customers', []), None
-    except http_requests.exceptions.Timeout:
-        logger.warning("device_control: License server timed out.")
-        return None, Response(
-            {"detail": "License server timed out. Please try again."},
-            status=status.HTTP_504_GATEWAY_TIMEOUT,
-        )
-    except http_requests.exceptions.RequestException as exc:
+        return license_directory.customers.snapshot(), None
+    except license_directory.LicenseUnavailable as exc:
+        if exc.timed_out:
+            logger.warning("device_control: License server timed out.")
+            return None, Response(
+                {"detail": str(exc)},
+                status=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
         logger.error("device_control: Could not reach license server: %s", exc)
         return None, Response(
-            {"detail": f"Could not reach license server: {exc}"},
+            {"detail": str(exc)},
             status=status.HTTP_502_BAD_GATEWAY,
         )
 
 
-def _find_customer(customers, client_id):
-    """Return the customer dict matching client_id, or None."""
-    for customer in customers:
-        if customer.get('client_id') == client_id:
-            return customer
-    return None
+def _find_device(customers, client_id, device_id):
+    """(customer, device) for a client_id / device_id in a customer snapshot; either may be None."""
+    customer = customers.index.get(client_id)
+    devices = customer.get('registered_devices', []) if customer else []
+    return customer, next((d for d in devices if d.get('device_id') == device_id), None)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -82,7 +82,7 @@ class DeviceListView(APIView):
     GET /api/device-control/devices/
 
     Returns all registered devices for the logged-in admin's client_id,
-    fetched live from the external license server.
+    read from the cached license-server customer list.
 
     Admins see only their own client_id's devices.
     Super Admins can pass ?client_id=<id> to inspect any client.
@@ -121,7 +121,7 @@ class DeviceListView(APIView):
                 if err:
                     return err
                 result = []
-                for c in customers:
+                for c in customers.items:
                     result.append({
                         'client_id':        c.get('client_id'),
                         'customer_name':    c.get('customer_name'),
@@ -150,7 +150,7 @@ class DeviceListView(APIView):
         if err:
             return err
 
-        customer = _find_customer(customers, target_client_id)
+        customer = customers.index.get(target_client_id)
         if not customer:
             # Client ID not found on the license server — return empty list
             return Response({
@@ -231,15 +231,18 @@ class DeviceDeleteView(APIView):
         if err:
             return err
 
-        customer = _find_customer(customers, target_client_id)
+        customer, device = _find_device(customers, target_client_id, device_id)
+        if not device:
+            # The cached list may predate the device's registration.
+            customer, device = _find_device(
+                license_directory.customers.refresh(), target_client_id, device_id,
+            )
+
         if not customer:
             return Response(
                 {"detail": "Client ID not found on the license server."},
                 status=status.HTTP_404_NOT_FOUND,
             )
-
-        devices = customer.get('registered_devices', [])
-        device = next((d for d in devices if d.get('device_id') == device_id), None)
         if not device:
             return Response(
                 {"detail": "Device not found for this client."},
@@ -260,7 +263,8 @@ class DeviceDeleteView(APIView):
         # Body: { "license_key": "...", "device_id": "..." }
         deregister_url = "https://activate.imcbs.com/mobileapp/api/project/trellisco/logout/"
         try:
-            ext_resp = http_requests.post(
+            ext_resp = httpclient.post(
+                'license',
                 deregister_url,
                 json={"license_key": license_key, "device_id": device_id},
                 timeout=API_TIMEOUT,
@@ -320,6 +324,9 @@ class DeviceDeleteView(APIView):
                 status=status.HTTP_502_BAD_GATEWAY,
             )
 
+        # The cached customer list still shows the device.
+        license_directory.customers.invalidate()
+
         log_activity(
             user=request.user,
             action_type='DELETE',
@@ -374,7 +381,7 @@ class LicenseInfoView(APIView):
         if err:
             return err
 
-        customer = _find_customer(customers, target_client_id)
+        customer = customers.index.get(target_client_id)
         if not customer:
             return Response(
                 {"detail": "Client ID not found on the license server."},
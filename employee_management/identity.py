@@ -0,0 +1,82 @@
+# employee_management/identity.py
+"""
+Employee ↔ login-account (User) resolution.
+
+An Employee and the User who logs in for them share an email address;
+Employee.user stores that link explicitly (backfilled by migration 0035,
+kept current by Employee.save() and the User post_save receiver in
+models.py).  Code that needs "the user for this employee" or "the employee
+for this user" goes through this module instead of matching emails:
+
+    from employee_management.identity import employees_for_users
+
+    by_user = employees_for_users(leave_requests_users)   # one query
+    emp = by_user.get(request.user.id)
+
+For a single Employee, `employee.user_id` needs no query at all.
+"""
+
+from django.contrib.auth import get_user_model
+
+from .models import Employee
+
+
+def user_id_for_email(email):
+    """pk of the User with this email (case-insensitive), or None."""
+    if not email:
+        return None
+    return (
+        get_user_model().objects
+        .filter(email__iexact=email)
+        .values_list('id', flat=True)
+        .first()
+    )
+
+
+def link_employees_to_user(user):
+    """Attach every unlinked Employee with the user's email to the user."""
+    if not user.email:
+        return 0
+    return (
+        Employee.objects
+        .filter(email__iexact=user.email, user__isnull=True)
+        .update(user=user)
+    )
+
+
+def users_for_employees(employees):
+    """{employee.id: User or None} for the given Employee rows, in one query."""
+    employees = list(employees)
+    users = get_user_model().objects.in_bulk(
+        {e.user_id for e in employees if e.user_id}
+    )
+    return {e.id: users.get(e.user_id) for e in employees}
+
+
+def employees_for_users(users, admin_owner=None):
+    """
+    {user.id: Employee} for the given Users (or user ids), in one query.
+    Users without an employee record are absent.  When several Employee rows
+    point at the same user, the oldest one wins (as `.first()` would).
+    """
+    user_ids = {getattr(u, 'pk', u) for u in users if u is not None}
+    if not user_ids:
+        return {}
+    qs = Employee.objects.filter(user_id__in=user_ids)
+    if admin_owner is not None:
+        qs = qs.filter(admin_owner=admin_owner)
+
+    by_user = {}
+    for emp in qs.order_by('-id'):
+        by_user[emp.user_id] = emp
+    return by_user
+
+
+def employee_for_user(user, admin_owner=None):
+    """The Employee record for a User (optionally within one tenant), or None."""
+    if user is None or not user.pk:
+        return None
+    qs = Employee.objects.filter(user_id=user.pk)
+    if admin_owner is not None:
+        qs = qs.filter(admin_owner=admin_owner)
+    return qs.order_by('id').first()
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_employees_by_email(apps, schema_editor):
+    Employee = apps.get_model('employee_management', 'Employee')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    (
+        Employee.objects
+        .filter(user__isnull=True)
+        .exclude(email='')
+        .update(user_id=models.Subquery(
+            User.objects.filter(email__iexact=models.OuterRef('email')).values('id')[:1]
+        ))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_management', '0034_add_employee_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        # link_employees_by_email filters on User.email.
+        ('login', '0023_user_can_switch_client'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='user',
+            field=models.ForeignKey(blank=True, help_text='Login account with the same email address (set automatically).', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employee_records', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(link_employees_by_email, migrations.RunPython.noop),
+    ]
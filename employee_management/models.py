@@ -268,11 +268,38 @@ class Employee(models.Model):
         limit_choices_to={'role': 'ADMIN'},
     )
 
+    # ── Login account (matched by email, kept in sync on save) ────────────────
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='employee_records',
+        help_text='Login account with the same email address (set automatically).',
+    )
+
     # ── Timestamps ────────────────────────────────────────────────────────────
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_email = instance.__dict__.get('email')
+        return instance
+
+    def _sync_user_link(self):
+        """
+        Point `user` at the login account with this employee's email when the
+        link is missing or the email changed since the row was loaded.
+        """
+        if self.user_id and self.email == getattr(self, '_loaded_email', self.email):
+            return
+        from .identity import user_id_for_email
+        self.user_id = user_id_for_email(self.email)
+
     def save(self, *args, **kwargs):
+        self._sync_user_link()
         if not self.employee_id:
             last_emp = Employee.objects.order_by('-id').first()
             if last_emp:
@@ -289,6 +316,7 @@ class Employee(models.Model):
         elif not self.probation_period_months:
             self.probation_end_date = None
         super().save(*args, **kwargs)
+        self._loaded_email = self.email
 
     def __str__(self):
         return f'{self.employee_id} - {self.first_name} {self.last_name}'
@@ -503,7 +531,7 @@ class EmployeeDocument(models.Model):
 # ---------------------------------------------------------------------------
 # Signals — auto-delete images from Cloudflare R2
 # ---------------------------------------------------------------------------
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 
@@ -534,4 +562,13 @@ def auto_delete_image_on_change(sender, instance, **kwargs):
 def auto_delete_document_on_delete(sender, instance, **kwargs):
     """Delete document file from R2 when the EmployeeDocument record is deleted."""
     if instance.file:
-        instance.file.delete(save=False)
\ No newline at end of file
+        instance.file.delete(save=False)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def link_employee_records_on_user_save(sender, instance, created, update_fields=None, **kwargs):
+    """Attach unlinked Employee rows to a new login account (or a changed email)."""
+    if not created and update_fields is not None and 'email' not in update_fields:
+        return
+    from .identity import link_employees_to_user
+    link_employees_to_user(instance)
@@ -19,6 +19,7 @@ from .serializers import (
 )
 
 from activitylog.utils import log_activity
+from login.tenant import resolve_admin_owner
 
 User = get_user_model()
 
@@ -49,11 +50,7 @@ def _get_admin_owner(user):
     - ADMIN       : they ARE the tenant root; returns themselves.
     - USER        : belongs to an admin's tenant; returns their admin_owner.
     """
-    if user.role == 'ADMIN' or getattr(user, 'is_admin_user', False):
-        return user if user.role == 'ADMIN' else user.admin_owner
-    if user.role == 'USER':
-        return user.admin_owner
-    return None  # SUPER_ADMIN — cross-tenant access handled per-view
+    return resolve_admin_owner(user)
 
 
 def _employee_qs(user):
@@ -108,7 +105,7 @@ def _delete_linked_user(employee):
 
     Priority:
       1. employee.candidate.user  (cleanest link)
-      2. User whose email matches employee.email
+      2. employee.user (the login account with the same email)
 
     Returns the deleted username as a string, or None.
     """
@@ -123,9 +120,9 @@ def _delete_linked_user(employee):
     ):
         linked_user = employee.candidate.user
 
-    # 2. Fallback: match by email
-    if linked_user is None and employee.email:
-        linked_user = User.objects.filter(email=employee.email).first()
+    # 2. Fallback: the login account linked to this employee
+    if linked_user is None:
+        linked_user = employee.user
 
     if linked_user:
         username = linked_user.username
@@ -599,7 +596,7 @@ class CompleteOffboardingView(APIView):
     """
     Atomically:
       1. Sets employee.status = 'terminated' (record is retained for history)
-      2. Permanently deletes the linked system User account (via candidate.user or email match)
+      2. Permanently deletes the linked system User account (via candidate.user or employee.user)
          so the employee is removed from the user list and can no longer log in
 
     Response includes the updated employee data plus:
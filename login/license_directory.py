@@ -0,0 +1,269 @@
+# login/license_directory.py
+"""
+Cached view of the license server (activate.imcbs.com).
+
+Every admin login used to download the whole `customers` list (8 s
+timeout) and scan it; the device-control views and the client switcher
+downloaded their list again on every request.  Each feed now lives in one
+LicenseDirectory, kept in process memory and indexed by client_id:
+
+    from login.license_directory import LicenseUnavailable, customers, corporates
+
+    customer  = customers.get(client_id)     # customer dict, or None
+    corporate = corporates.get(client_id)    # corporate group owning that shop, or None
+    snapshot  = customers.snapshot()         # .payload, .items, .index, .age
+
+Freshness (stale-while-revalidate):
+
+  * younger than LICENSE_DIRECTORY_FRESH_SECONDS — served as is;
+  * younger than LICENSE_DIRECTORY_STALE_SECONDS — served as is while one
+    background thread refreshes it;
+  * older, invalidated, or never loaded — the caller waits for the fetch
+    (concurrent callers share one fetch).
+
+When a fetch fails the last good copy is served, whatever its age; only
+with nothing cached is LicenseUnavailable raised.
+
+A circuit breaker guards the upstream: after LICENSE_BREAKER_THRESHOLD
+consecutive failures no request goes out for LICENSE_BREAKER_RESET_SECONDS,
+then a single trial fetch decides whether it closes again.  While it is
+open callers get the cached copy (or LicenseUnavailable) at once instead
+of each waiting out a timeout.
+
+LICENSE_CUSTOMERS_URL / LICENSE_CORPORATE_URL point the directories at
+another server, e.g. a local stub in tests.  The cache is per process;
+each worker loads its own copy.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+from task_hrms_backend import httpclient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CUSTOMERS_URL = "https://activate.imcbs.com/mobileapp/api/project/trellisco/"
+DEFAULT_CORPORATE_URL = "https://activate.imcbs.com/corporate-clientid/list/"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class LicenseUnavailable(Exception):
+    """The license server could not be reached and nothing is cached."""
+
+    def __init__(self, message, timed_out=False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+class CircuitBreaker:
+    """closed → open after `threshold` consecutive failures → half-open (one trial) after `reset_seconds`."""
+
+    def __init__(self, threshold=3, reset_seconds=30):
+        self.threshold = max(1, threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """True when a request may go out now."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class Snapshot:
+    """One parsed response: the raw payload, its entry list and {client_id: entry}."""
+
+    __slots__ = ('payload', 'items', 'index', 'fetched_at')
+
+    def __init__(self, payload, items, index, fetched_at):
+        self.payload = payload
+        self.items = items
+        self.index = index
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self):
+        return time.monotonic() - self.fetched_at
+
+
+class LicenseDirectory:
+    """One license-server feed, cached and indexed by client_id."""
+
+    def __init__(self, name, url_setting, default_url, list_key, build_index):
+        self.name = name
+        self._url_setting = url_setting
+        self._default_url = default_url
+        self._list_key = list_key
+        self._build_index = build_index
+        self.breaker = CircuitBreaker(
+            threshold=_setting('LICENSE_BREAKER_THRESHOLD', 3),
+            reset_seconds=_setting('LICENSE_BREAKER_RESET_SECONDS', 30),
+        )
+        self._snapshot = None
+        self._reset_locks()
+
+    def _reset_locks(self):
+        self._pid = os.getpid()
+        self._fetch_lock = threading.Lock()     # one fetch at a time
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def url(self):
+        return _setting(self._url_setting, None) or self._default_url
+
+    # ── reads ────────────────────────────────────────────────────────────────
+
+    def snapshot(self):
+        """The current Snapshot, refreshed according to its age (see module docstring)."""
+        if self._pid != os.getpid():
+            # Forked worker: the parent's locks and refresher thread are not ours.
+            self._reset_locks()
+        snapshot = self._snapshot
+        if snapshot is not None:
+            age = snapshot.age
+            if age < _setting('LICENSE_DIRECTORY_FRESH_SECONDS', 60):
+                return snapshot
+            if age < _setting('LICENSE_DIRECTORY_STALE_SECONDS', 3600):
+                self._refresh_in_background()
+                return snapshot
+        return self._refresh_blocking(snapshot)
+
+    def get(self, client_id):
+        """The entry for client_id, or None when the server does not list it."""
+        return self.snapshot().index.get(client_id)
+
+    # ── refresh ──────────────────────────────────────────────────────────────
+
+    def refresh(self):
+        """Fetch now, whatever the age of the cached copy (falls back to it on failure)."""
+        return self._refresh_blocking(self._snapshot, force=True)
+
+    def invalidate(self):
+        """Make the next read wait for a fresh copy (the current one stays as fallback)."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            self._snapshot = Snapshot(snapshot.payload, snapshot.items, snapshot.index, float('-inf'))
+
+    def _refresh_blocking(self, seen, force=False):
+        with self._fetch_lock:
+            current = self._snapshot
+            if (not force and current is not None and current is not seen
+                    and current.age < _setting('LICENSE_DIRECTORY_FRESH_SECONDS', 60)):
+                return current      # fetched by another caller while this one waited
+            try:
+                return self._fetch()
+            except LicenseUnavailable:
+                if current is not None:
+                    return current
+                raise
+
+    def _refresh_in_background(self):
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._background_refresh, name=f'license-{self.name}-refresh', daemon=True,
+        ).start()
+
+    def _background_refresh(self):
+        try:
+            with self._fetch_lock:
+                self._fetch()
+        except LicenseUnavailable:
+            pass    # logged by _fetch; the stale copy keeps being served
+        except Exception:  # noqa: BLE001
+            logger.exception("License %s: background refresh failed", self.name)
+        finally:
+            with self._state_lock:
+                self._refreshing = False
+
+    def _fetch(self):
+        if not self.breaker.allow():
+            raise LicenseUnavailable("License server is unavailable (circuit open). Please try again shortly.")
+        try:
+            resp = httpclient.get('license', self.url)
+            resp.raise_for_status()
+            payload = resp.json()
+            items = payload.get(self._list_key, [])
+            if not isinstance(items, list):
+                raise ValueError(f"'{self._list_key}' is not a list")
+            index = self._build_index(items)
+        except requests.exceptions.Timeout as exc:
+            self.breaker.record_failure()
+            logger.warning("License %s: server timed out (%s)", self.name, exc)
+            raise LicenseUnavailable("License server timed out. Please try again.", timed_out=True) from exc
+        except (requests.exceptions.RequestException, ValueError, AttributeError, TypeError) as exc:
+            # Unreachable, an error status, or a payload of an unexpected shape.
+            self.breaker.record_failure()
+            logger.warning("License %s: fetch failed: %s", self.name, exc)
+            raise LicenseUnavailable(f"Could not reach license server: {exc}") from exc
+
+        self.breaker.record_success()
+        snapshot = Snapshot(payload, items, index, time.monotonic())
+        self._snapshot = snapshot
+        return snapshot
+
+
+def _index_customers(customers):
+    index = {}
+    for customer in customers:
+        if customer.get('client_id'):
+            index.setdefault(customer['client_id'], customer)   # first match wins, as the old scan did
+    return index
+
+
+def _index_corporates(corporates):
+    """{shop client_id: the corporate entry listing that shop}."""
+    index = {}
+    for corporate in corporates:
+        for shop in corporate.get('shops', []):
+            if shop.get('client_id'):
+                index.setdefault(shop['client_id'], corporate)
+    return index
+
+
+customers = LicenseDirectory(
+    'customers', 'LICENSE_CUSTOMERS_URL', DEFAULT_CUSTOMERS_URL, 'customers', _index_customers,
+)
+corporates = LicenseDirectory(
+    'corporates', 'LICENSE_CORPORATE_URL', DEFAULT_CORPORATE_URL, 'data', _index_corporates,
+)
@@ -0,0 +1,21 @@
+# login/middleware.py
+from .tenant import TenantContext, activate, deactivate
+
+
+class TenantMiddleware:
+    """
+    Attach a lazy TenantContext to every request as `request.tenant` and make
+    it the current tenant for tenant_config() while the request is handled.
+    See login/tenant.py.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tenant = TenantContext(request)
+        token = activate(request.tenant)
+        try:
+            return self.get_response(request)
+        finally:
+            deactivate(token)
@@ -153,3 +153,19 @@ class CompanySettings(models.Model):
 
     def __str__(self):
         return f"{self.owner.client_id or self.owner.username} - {self.name}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SIGNALS — keep the cached tenant configuration fresh
+# ─────────────────────────────────────────────────────────────────────────────
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=CompanySettings)
+@receiver(post_delete, sender=CompanySettings)
+def invalidate_company_settings_cache(sender, instance, **kwargs):
+    """Drop the tenant's cached configuration when its company settings change."""
+    from .tenant_cache import invalidate_tenant_config
+    invalidate_tenant_config(instance.owner_id)
@@ -30,8 +30,8 @@ class UserSerializer(serializers.ModelSerializer):
     def get_employee_profile_image(self, obj):
         """Return the linked employee's profile photo (stored in R2) if available."""
         try:
-            from employee_management.models import Employee
-            employee = Employee.objects.filter(email=obj.email).first()
+            from employee_management.identity import employee_for_user
+            employee = employee_for_user(obj)
             if employee and employee.profile_image:
                 return employee.profile_image.url
         except Exception:
@@ -0,0 +1,262 @@
+# login/tenant.py
+"""
+Per-request tenant context.
+
+Almost every endpoint starts by resolving the caller's admin_owner and then
+re-reading the same tenant configuration rows — AttendanceSettings,
+PayrollPolicy, CompanySettings — often several times per request (a
+check-in reads AttendanceSettings for the geofence, again for the duty
+times of the auto late-request, and PayrollPolicy twice).
+
+TenantMiddleware (login/middleware.py) attaches a TenantContext to every
+request as `request.tenant`.  Nothing is queried up front; each value is
+loaded on first access and memoized for the rest of the request:
+
+    admin_owner = _get_admin_owner(request.user)
+    cfg = request.tenant.for_owner(admin_owner)
+
+    cfg.attendance_settings     # latest AttendanceSettings row or None
+    cfg.payroll_policy          # PayrollPolicy row or None
+    cfg.policy_data             # PayrollPolicy.policy_data or {}
+    cfg.company_settings        # CompanySettings row or None
+    cfg.sunday_working          # policy_data.salaryCalculation.sundayWorking
+    cfg.leave_types             # {id: LeaveType} for the tenant
+    cfg.holidays(year, month)   # active Holiday rows, ordered by date
+    cfg.work_calendar(year)     # attendance.work_calendar.WorkCalendar
+
+Behind the per-request memo, every row is served from the process-wide
+tenant-config cache (login/tenant_cache.py), so most requests don't query
+these tables at all.
+
+Module-level helpers that have no request at hand use tenant_config(), which
+returns the active request's memoized TenantConfig (or a fresh one outside a
+request, e.g. in management commands).
+
+The context is read-only: endpoints that *write* these rows keep querying
+them directly.
+"""
+
+import contextvars
+from functools import cached_property
+
+from . import tenant_cache
+
+_current_tenant = contextvars.ContextVar('current_tenant', default=None)
+
+
+def resolve_admin_owner(user):
+    """
+    Return the ADMIN who owns the user's tenant scope.
+
+    - SUPER_ADMIN : has no tenant scope of their own; returns None.
+    - ADMIN       : they ARE the tenant root; returns themselves.
+    - USER        : belongs to an admin's tenant; returns their admin_owner.
+    """
+    role = getattr(user, 'role', None)
+    if role == 'ADMIN' or getattr(user, 'is_admin_user', False):
+        return user if role == 'ADMIN' else getattr(user, 'admin_owner', None)
+    if role == 'USER':
+        return getattr(user, 'admin_owner', None)
+    return None  # SUPER_ADMIN / anonymous
+
+
+class TenantConfig:
+    """
+    Lazily loaded, memoized configuration rows for one admin_owner
+    (a User or its pk).
+    """
+
+    def __init__(self, admin_owner):
+        self.admin_owner = admin_owner
+        self._holidays = {}
+        self._calendars = {}
+
+    @property
+    def admin_owner_id(self):
+        return getattr(self.admin_owner, 'pk', self.admin_owner)
+
+    def _cached(self, item, loader):
+        return tenant_cache.get_or_load(self.admin_owner_id, item, loader)
+
+    @cached_property
+    def attendance_settings(self):
+        from attendance.models import AttendanceSettings
+
+        if self.admin_owner_id is None:
+            return None
+        return self._cached('attendance_settings', lambda: (
+            AttendanceSettings.objects
+            .filter(admin_owner_id=self.admin_owner_id)
+            .order_by('-id')
+            .first()
+        ))
+
+    @cached_property
+    def payroll_policy(self):
+        from master.models import PayrollPolicy
+
+        if self.admin_owner_id is None:
+            return None
+        return self._cached('payroll_policy', lambda: (
+            PayrollPolicy.objects.filter(admin_owner_id=self.admin_owner_id).first()
+        ))
+
+    @cached_property
+    def policy_data(self):
+        policy = self.payroll_policy
+        return (policy.policy_data or {}) if policy else {}
+
+    @cached_property
+    def company_settings(self):
+        from .models import CompanySettings
+
+        if self.admin_owner_id is None:
+            return None
+        return self._cached('company_settings', lambda: (
+            CompanySettings.objects.filter(owner_id=self.admin_owner_id).first()
+        ))
+
+    @cached_property
+    def leave_types(self):
+        """{id: LeaveType} for every leave type of the tenant, active or not."""
+        from master.models import LeaveType
+
+        if self.admin_owner_id is None:
+            return {}
+        return self._cached('leave_types', lambda: {
+            lt.id: lt for lt in LeaveType.objects.filter(admin_owner_id=self.admin_owner_id)
+        })
+
+    def holidays(self, year, month=None):
+        """Active Holiday rows for the year (or one month of it), by date."""
+        from master.models import Holiday
+
+        if self.admin_owner_id is None:
+            return []
+        rows = self._holidays.get(year)
+        if rows is None:
+            rows = self._holidays[year] = self._cached(f'holidays:{year}', lambda: list(
+                Holiday.objects
+                .filter(admin_owner_id=self.admin_owner_id, date__year=year, is_active=True)
+                .order_by('date', 'id')
+            ))
+        if month is None:
+            return list(rows)
+        return [h for h in rows if h.date.month == month]
+
+    @cached_property
+    def sunday_working(self):
+        return bool(
+            self.policy_data
+            .get('salaryCalculation', {})
+            .get('sundayWorking', False)
+        )
+
+    def work_calendar(self, year):
+        """WorkCalendar for the year, built from sunday_working and holidays(year)."""
+        from attendance.work_calendar import WorkCalendar
+
+        calendar = self._calendars.get(year)
+        if calendar is None:
+            if self.admin_owner_id is None:
+                calendar = WorkCalendar(year)
+            else:
+                calendar = self._cached(f'work_calendar:{year}', lambda: WorkCalendar(
+                    year, self.sunday_working, self.holidays(year),
+                ))
+            self._calendars[year] = calendar
+        return calendar
+
+
+class TenantContext:
+    """
+    Attached to every request as `request.tenant` by TenantMiddleware.
+
+    `admin_owner` is resolved from request.user on first access.  DRF
+    authenticates JWT requests inside the view, after middleware has run,
+    so nothing is resolved (or cached) while the user is still anonymous.
+    """
+
+    def __init__(self, request=None):
+        self._request = request
+        self._configs = {}
+
+    @property
+    def user(self):
+        return getattr(self._request, 'user', None)
+
+    @cached_property
+    def _admin_owner(self):
+        return resolve_admin_owner(self.user)
+
+    @property
+    def admin_owner(self):
+        user = self.user
+        if user is None or not getattr(user, 'is_authenticated', False):
+            return None
+        return self._admin_owner
+
+    def for_owner(self, admin_owner):
+        """TenantConfig for admin_owner, shared by everything in this request."""
+        key = getattr(admin_owner, 'pk', admin_owner)
+        config = self._configs.get(key)
+        if config is None:
+            config = self._configs[key] = TenantConfig(admin_owner)
+        return config
+
+    @property
+    def config(self):
+        return self.for_owner(self.admin_owner)
+
+    @property
+    def attendance_settings(self):
+        return self.config.attendance_settings
+
+    @property
+    def payroll_policy(self):
+        return self.config.payroll_policy
+
+    @property
+    def policy_data(self):
+        return self.config.policy_data
+
+    @property
+    def company_settings(self):
+        return self.config.company_settings
+
+    @property
+    def sunday_working(self):
+        return self.config.sunday_working
+
+
+def activate(context):
+    """Make context the current tenant; returns a token for deactivate()."""
+    return _current_tenant.set(context)
+
+
+def deactivate(token):
+    _current_tenant.reset(token)
+
+
+def current_tenant():
+    """The active request's TenantContext, or None outside a request."""
+    return _current_tenant.get()
+
+
+def get_tenant(request):
+    """request.tenant, or a fresh TenantContext if the middleware did not run."""
+    context = getattr(request, 'tenant', None)
+    if context is None:
+        context = TenantContext(request)
+    return context
+
+
+def tenant_config(admin_owner):
+    """
+    TenantConfig for admin_owner — memoized for the active request, or a
+    fresh (uncached) one when called outside a request.
+    """
+    context = current_tenant()
+    if context is None:
+        return TenantConfig(admin_owner)
+    return context.for_owner(admin_owner)
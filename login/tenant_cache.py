@@ -0,0 +1,134 @@
+# login/tenant_cache.py
+"""
+Process-wide TTL cache for tenant configuration.
+
+AttendanceSettings, PayrollPolicy, CompanySettings, Holiday lists and
+LeaveType rows change a few times a month but are read on every punch,
+payroll calculation and PDF render.  TenantConfig (login/tenant.py) loads
+them through get_or_load(), which keeps them in Django's default cache —
+local memory unless REDIS_URL is set (see CACHES in settings.py).
+
+Keys are versioned per tenant:
+
+    tenant_config:<schema>:<admin_owner_id>:version          → int
+    tenant_config:<schema>:<admin_owner_id>:v<version>:<item> → cached value
+
+invalidate_tenant_config() bumps the tenant's version, which orphans every
+item at once; orphans simply age out.  The save/delete signal receivers in
+attendance.models, master.models and login.models call it.
+
+With the local-memory backend each worker process has its own cache, and a
+signal only reaches the process that made the change.  cache_ttl() then caps
+every TTL at LOCAL_CACHE_MAX_TTL (a few seconds), so other workers pick up a
+changed policy, holiday or Sunday-working flag — and the WorkCalendar built
+from them — almost at once; TENANT_CONFIG_CACHE_TTL only applies in full
+with a shared cache (REDIS_URL).
+
+cache_stats() returns this process's hit/miss counters per item.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+# Bump when the shape of a cached value changes so a deploy never reads
+# entries written by the previous release.
+CACHE_SCHEMA = 1
+
+_MISSING = object()
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def cache_ttl(ttl):
+    """
+    ttl for an entry that signals invalidate, capped at LOCAL_CACHE_MAX_TTL
+    when the default cache is per process (LocMemCache): there the signal
+    only clears the entry in the process that made the change.
+    """
+    if isinstance(caches['default'], LocMemCache):
+        return min(ttl, int(getattr(settings, 'LOCAL_CACHE_MAX_TTL', 5)))
+    return ttl
+
+
+def _ttl():
+    return cache_ttl(int(getattr(settings, 'TENANT_CONFIG_CACHE_TTL', 600)))
+
+
+def _prefix(admin_owner_id):
+    return f'tenant_config:{CACHE_SCHEMA}:{admin_owner_id}'
+
+
+def _version(admin_owner_id):
+    key = f'{_prefix(admin_owner_id)}:version'
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version key lost to eviction never
+        # resurrects entries written under an earlier version.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _record(item, hit):
+    with _stats_lock:
+        counters = _stats.setdefault(item, {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+
+
+def get_or_load(admin_owner_id, item, loader):
+    """
+    Return the cached value of item for the tenant, calling loader() and
+    caching its result on a miss.  None is a valid cached value.
+    Requests without a tenant (admin_owner_id is None) bypass the cache.
+    """
+    if admin_owner_id is None:
+        return loader()
+
+    key = f'{_prefix(admin_owner_id)}:v{_version(admin_owner_id)}:{item}'
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _record(item, hit=True)
+        return value
+
+    _record(item, hit=False)
+    value = loader()
+    cache.set(key, value, _ttl())
+    return value
+
+
+def invalidate_tenant_config(admin_owner_id):
+    """Drop every cached config item for the tenant."""
+    if admin_owner_id is None:
+        return
+    try:
+        cache.incr(f'{_prefix(admin_owner_id)}:version')
+    except ValueError:
+        pass   # no version yet, so nothing has been cached under it
+
+
+def cache_stats():
+    """
+    {'hits', 'misses', 'hit_rate', 'items': {item: {'hits', 'misses'}}}
+    for this process since start-up (or the last reset_cache_stats()).
+    """
+    with _stats_lock:
+        items = {item: dict(counters) for item, counters in _stats.items()}
+    hits   = sum(c['hits'] for c in items.values())
+    misses = sum(c['misses'] for c in items.values())
+    total  = hits + misses
+    return {
+        'hits':     hits,
+        'misses':   misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+        'items':    items,
+    }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
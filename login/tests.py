@@ -1,3 +1,162 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from . import tenant_cache
+from .license_directory import LicenseDirectory, LicenseUnavailable, _index_customers
+
+
+class _StubLicenseServer:
+    """A local license server: serves `payload` as JSON (or `status`), after `delay` seconds."""
+
+    def __init__(self):
+        self.payload = {'customers': [{'client_id': 'C1', 'name': 'Acme'}]}
+        self.status = 200
+        self.delay = 0.0
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits += 1
+                time.sleep(stub.delay)
+                body = json.dumps(stub.payload).encode()
+                self.send_response(stub.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}/customers/'
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class LicenseDirectoryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.stub = _StubLicenseServer()
+        self.addCleanup(self.stub.close)
+        overrides = override_settings(
+            LICENSE_CUSTOMERS_URL=self.stub.url,
+            LICENSE_DIRECTORY_FRESH_SECONDS=60,
+            LICENSE_DIRECTORY_STALE_SECONDS=3600,
+            LICENSE_BREAKER_THRESHOLD=2,
+            LICENSE_BREAKER_RESET_SECONDS=0.3,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.directory = LicenseDirectory(
+            'customers', 'LICENSE_CUSTOMERS_URL', 'http://unused.invalid/', 'customers', _index_customers,
+        )
+
+    def _age(self, seconds):
+        self.directory._snapshot.fetched_at -= seconds
+
+    def test_cold_read_is_one_fetch_shared_by_concurrent_readers(self):
+        self.stub.delay = 0.2
+        readers = 8
+        barrier = threading.Barrier(readers)
+        results = []
+
+        def read():
+            barrier.wait()
+            results.append(self.directory.get('C1'))
+
+        threads = [threading.Thread(target=read) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.stub.hits, 1)
+        self.assertEqual(results, [{'client_id': 'C1', 'name': 'Acme'}] * readers)
+        self.assertIsNone(self.directory.get('C2'))
+        self.assertEqual(self.stub.hits, 1)
+
+    def test_stale_read_returns_at_once_and_refreshes_in_background(self):
+        self.directory.get('C1')
+        self._age(120)
+        self.stub.delay = 0.5
+        self.stub.payload = {'customers': [{'client_id': 'C1', 'name': 'Acme Ltd'}]}
+
+        started = time.monotonic()
+        self.assertEqual(self.directory.get('C1')['name'], 'Acme')
+        self.assertLess(time.monotonic() - started, 0.3)
+        self.directory.get('C1')       # a second stale read starts no second refresh
+
+        deadline = time.monotonic() + 5
+        while self.directory.get('C1')['name'] != 'Acme Ltd' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.directory.get('C1')['name'], 'Acme Ltd')
+        self.assertEqual(self.stub.hits, 2)
+
+    def test_failed_fetch_serves_the_last_good_copy(self):
+        self.directory.get('C1')
+        self.stub.status = 500
+
+        with self.assertLogs('login.license_directory', level='WARNING'):
+            self.assertEqual(self.directory.refresh().index['C1']['name'], 'Acme')
+        self.directory.invalidate()
+        with self.assertLogs('login.license_directory', level='WARNING'):
+            self.assertEqual(self.directory.get('C1')['name'], 'Acme')
+        self.assertEqual(self.stub.hits, 3)
+
+    def test_failed_cold_fetch_raises(self):
+        self.stub.status = 500
+        with self.assertLogs('login.license_directory', level='WARNING'), self.assertRaises(LicenseUnavailable):
+            self.directory.get('C1')
+
+    def test_breaker_opens_after_threshold_and_closes_after_one_good_trial(self):
+        self.stub.status = 500
+        for _ in range(2):
+            with self.assertLogs('login.license_directory', level='WARNING'), self.assertRaises(LicenseUnavailable):
+                self.directory.get('C1')
+        self.assertEqual(self.directory.breaker.state, 'open')
+
+        with self.assertRaisesRegex(LicenseUnavailable, 'circuit open'):
+            self.directory.get('C1')
+        self.assertEqual(self.stub.hits, 2)      # no request while open
+
+        time.sleep(0.35)
+        self.assertEqual(self.directory.breaker.state, 'half-open')
+        with self.assertLogs('login.license_directory', level='WARNING'), self.assertRaises(LicenseUnavailable):
+            self.directory.get('C1')            # failed trial: open again
+        self.assertEqual((self.directory.breaker.state, self.stub.hits), ('open', 3))
+
+        time.sleep(0.35)
+        self.stub.status = 200
+        self.assertEqual(self.directory.get('C1')['name'], 'Acme')
+        self.assertEqual((self.directory.breaker.state, self.stub.hits), ('closed', 4))
+
+
+class TenantCacheTTLTests(SimpleTestCase):
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        TENANT_CONFIG_CACHE_TTL=600, LOCAL_CACHE_MAX_TTL=5,
+    )
+    def test_per_process_cache_caps_the_ttl(self):
+        self.assertEqual(tenant_cache._ttl(), 5)
+        self.assertEqual(tenant_cache.cache_ttl(2), 2)
+
+    @override_settings(
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tempfile.gettempdir(),
+        }},
+        TENANT_CONFIG_CACHE_TTL=600, LOCAL_CACHE_MAX_TTL=5,
+    )
+    def test_shared_cache_keeps_the_configured_ttl(self):
+        self.assertEqual(tenant_cache._ttl(), 600)
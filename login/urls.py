@@ -13,6 +13,7 @@ from .views import (
     SwitchClientView,
     ChangePasswordView,
     FCMTokenView,
+    TenantCacheStatsView,
 )
 from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -42,4 +43,7 @@ urlpatterns = [
 
     # 📱 Mobile push notifications
     path('fcm-token/',                  FCMTokenView.as_view(),              name='fcm_token'),
+
+    # Tenant config cache
+    path('tenant-cache/stats/',         TenantCacheStatsView.as_view(),      name='tenant_cache_stats'),
 ]
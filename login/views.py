@@ -5,9 +5,9 @@ from rest_framework              import status, permissions
 from rest_framework.permissions  import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
-import requests as _req
 import logging
 
+from . import license_directory
 from .serializers import (
     UserSerializer,
     UserCreateSerializer,
@@ -25,38 +25,35 @@ User = get_user_model()
 # License status check helper
 # Must be defined at the TOP so LoginView can call it.
 # ---------------------------------------------------------------------------
-_TRELLISCO_LICENSE_API = "https://activate.imcbs.com/mobileapp/api/project/trellisco/"
-
 def _check_license_status(client_id):
     """
     Returns (is_active: bool, error_message: str | None).
     - Blocks login when the client_id is found and status != 'Active'.
-    - Fails OPEN (allows login) only when the license server is unreachable,
-      so a network blip never locks everyone out.
+    - Fails OPEN (allows login) only when the license server is unreachable
+      and nothing is cached, so a network blip never locks everyone out.
     - Fails OPEN when the client_id is not in the list (manually-created admins).
+    The customer list comes from the cached license directory.
     """
     try:
-        resp = _req.get(_TRELLISCO_LICENSE_API, timeout=8)
-        resp.raise_for_status()
-        customers = resp.json().get("customers", [])
-        for customer in customers:
-            if customer.get("client_id") == client_id:
-                lic_status = (customer.get("status") or "").strip()
-                if lic_status.lower() == "active":
-                    return True, None
-                customer_name = customer.get("customer_name", client_id)
-                return False, (
-                    f"License for '{customer_name}' is {lic_status}. "
-                    f"Please contact your administrator to activate the license."
-                )
-        # client_id not in license list → fail open
-        return True, None
-    except Exception as exc:
+        customer = license_directory.customers.get(client_id)
+    except license_directory.LicenseUnavailable as exc:
         # Log the real error so it's visible in Django logs
         logger.warning("License check failed for %s: %s", client_id, exc)
         # Fail open — don't lock users out due to a network issue
         return True, None
 
+    # client_id not in license list → fail open
+    if customer is None:
+        return True, None
+    lic_status = (customer.get("status") or "").strip()
+    if lic_status.lower() == "active":
+        return True, None
+    customer_name = customer.get("customer_name", client_id)
+    return False, (
+        f"License for '{customer_name}' is {lic_status}. "
+        f"Please contact your administrator to activate the license."
+    )
+
 
 def get_tenant_admin(user):
     if user.role == 'ADMIN':
@@ -365,10 +362,11 @@ class UserUpdateView(APIView):
         # record as 'inactive' so it no longer appears in Employee Management.
         if 'is_active' in data and str(data['is_active']).lower() in ('false', '0') and not user.is_active:
             from employee_management.models import Employee
+            from employee_management.identity import employee_for_user
             from django.contrib.auth import get_user_model as _get_user_model
             _User = _get_user_model()
 
-            # Try to find the employee linked via candidate.user or email match
+            # Try to find the employee linked via candidate.user or Employee.user
             linked_employee = None
 
             # 1. Via candidate → user FK
@@ -380,9 +378,9 @@ class UserUpdateView(APIView):
             except Exception:
                 pass
 
-            # 2. Fallback: match by email
-            if linked_employee is None and user.email:
-                linked_employee = Employee.objects.filter(email=user.email).first()
+            # 2. Fallback: the employee record linked to this login account
+            if linked_employee is None:
+                linked_employee = employee_for_user(user)
 
             if linked_employee and linked_employee.status not in ('terminated', 'resigned', 'retired', 'offboarded', 'inactive'):
                 linked_employee.status = 'inactive'
@@ -454,13 +452,17 @@ class UserDeleteView(APIView):
 # has to make a cross-origin request (which would be blocked by CORS).
 # Only SUPER_ADMIN can call this endpoint.
 # ---------------------------------------------------------------------------
-import requests as http_requests
+def _license_unavailable_response(exc):
+    """504 / 502 for a LicenseUnavailable, as the proxies always answered."""
+    return Response(
+        {"detail": str(exc)},
+        status=status.HTTP_504_GATEWAY_TIMEOUT if exc.timed_out else status.HTTP_502_BAD_GATEWAY,
+    )
+
 
 class LicenseCustomersProxyView(APIView):
     permission_classes = [IsAuthenticated]
 
-    LICENSE_API_URL = "https://activate.imcbs.com/mobileapp/api/project/trellisco/"
-
     def get(self, request):
         if request.user.role != 'SUPER_ADMIN':
             return Response(
@@ -468,19 +470,9 @@ class LicenseCustomersProxyView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
         try:
-            resp = http_requests.get(self.LICENSE_API_URL, timeout=10)
-            resp.raise_for_status()
-            return Response(resp.json(), status=resp.status_code)
-        except http_requests.exceptions.Timeout:
-            return Response(
-                {"detail": "License server timed out. Please try again."},
-                status=status.HTTP_504_GATEWAY_TIMEOUT,
-            )
-        except http_requests.exceptions.RequestException as e:
-            return Response(
-                {"detail": f"Could not reach license server: {str(e)}"},
-                status=status.HTTP_502_BAD_GATEWAY,
-            )
+            return Response(license_directory.customers.snapshot().payload, status=status.HTTP_200_OK)
+        except license_directory.LicenseUnavailable as exc:
+            return _license_unavailable_response(exc)
 
 
 # ---------------------------------------------------------------------------
@@ -489,35 +481,13 @@ class LicenseCustomersProxyView(APIView):
 # Returns the full corporate → shops → client_id tree from the license server.
 # Used by the frontend to build the client-switcher dropdown.
 # ---------------------------------------------------------------------------
-CORPORATE_CLIENT_API_URL = "https://activate.imcbs.com/corporate-clientid/list/"
-
-def _fetch_corporate_list():
-    """Fetch and return the corporate client list from the license server.
-    Returns (data_list, error_response) — one of them will be None."""
+def _fetch_corporate_index():
+    """The cached {client_id: corporate entry} index of the corporate client list.
+    Returns (index, error_response) — one of them will be None."""
     try:
-        resp = http_requests.get(CORPORATE_CLIENT_API_URL, timeout=10)
-        resp.raise_for_status()
-        payload = resp.json()
-        return payload.get("data", []), None
-    except http_requests.exceptions.Timeout:
-        return None, Response(
-            {"detail": "License server timed out. Please try again."},
-            status=status.HTTP_504_GATEWAY_TIMEOUT,
-        )
-    except http_requests.exceptions.RequestException as e:
-        return None, Response(
-            {"detail": f"Could not reach license server: {str(e)}"},
-            status=status.HTTP_502_BAD_GATEWAY,
-        )
-
-
-def _find_corporate_for_client(data_list, client_id):
-    """Return the corporate entry that contains the given client_id, or None."""
-    for corporate in data_list:
-        for shop in corporate.get("shops", []):
-            if shop.get("client_id") == client_id:
-                return corporate
-    return None
+        return license_directory.corporates.snapshot().index, None
+    except license_directory.LicenseUnavailable as exc:
+        return None, _license_unavailable_response(exc)
 
 
 class CorporateClientListView(APIView):
@@ -561,11 +531,11 @@ class CorporateClientListView(APIView):
         # ── Try to fetch the full corporate list from the license server ──────
         # If it fails (network error, timeout, or client_id not found), we fall
         # back to a single-item response so the UI still works.
-        data_list, err = _fetch_corporate_list()
+        corporate_index, err = _fetch_corporate_index()
 
         corporate = None
-        if data_list:
-            corporate = _find_corporate_for_client(data_list, current_client_id)
+        if corporate_index:
+            corporate = corporate_index.get(current_client_id)
 
         # ── Fallback: client_id not in license server or server unreachable ───
         if not corporate:
@@ -669,11 +639,11 @@ class SwitchClientView(APIView):
             )
 
         # Fetch corporate list and validate both client_ids are in the same group
-        data_list, err = _fetch_corporate_list()
+        corporate_index, err = _fetch_corporate_index()
         if err:
             return err
 
-        current_corporate = _find_corporate_for_client(data_list, current_client_id)
+        current_corporate = corporate_index.get(current_client_id)
         if not current_corporate:
             return Response(
                 {"detail": f"Your current client ID '{current_client_id}' is not found in the license server."},
@@ -681,7 +651,7 @@ class SwitchClientView(APIView):
             )
 
         # Check target belongs to the same corporate
-        target_corporate = _find_corporate_for_client(data_list, target_client_id)
+        target_corporate = corporate_index.get(target_client_id)
         if not target_corporate:
             return Response(
                 {"detail": f"Target client ID '{target_client_id}' is not registered in the license server."},
@@ -778,7 +748,7 @@ class CompanySettingsCurrentView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        settings_obj = CompanySettings.objects.filter(owner=tenant_admin).first()
+        settings_obj = request.tenant.for_owner(tenant_admin).company_settings
         if not settings_obj:
             return Response(
                 {
@@ -943,3 +913,22 @@ class FCMTokenView(APIView):
             {"detail": "FCM token cleared."},
             status=status.HTTP_200_OK,
         )
+
+
+# ---------------------------------------------------------------------------
+# Tenant config cache stats – GET /api/tenant-cache/stats/
+#
+# Hit/miss counters of the tenant-config cache (login/tenant_cache.py) for
+# the worker process that serves the request.  Only SUPER_ADMIN can call it.
+# ---------------------------------------------------------------------------
+class TenantCacheStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'SUPER_ADMIN':
+            return Response(
+                {"detail": "Only Super Admins can view cache statistics."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        from .tenant_cache import cache_stats
+        return Response(cache_stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_management', '0035_employee_user'),
+        ('master', '0015_announcement_duration_days'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deduction',
+            index=models.Index(fields=['employee', 'year', 'month', 'deduction_name'], name='ded_emp_period_name_idx', opclasses=['int8_ops', 'int4_ops', 'int4_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='holiday',
+            index=models.Index(fields=['admin_owner', 'date'], name='holiday_owner_date_idx'),
+        ),
+    ]
@@ -212,6 +212,9 @@ class Holiday(models.Model):
         ordering = ['date']
         verbose_name = 'Holiday'
         verbose_name_plural = 'Holidays'
+        indexes = [
+            models.Index(fields=['admin_owner', 'date'], name='holiday_owner_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.date})"
@@ -290,6 +293,15 @@ class Deduction(models.Model):
         verbose_name = 'Deduction'
         verbose_name_plural = 'Deductions'
         unique_together = ['employee', 'deduction_name', 'year', 'month']
+        indexes = [
+            # (employee, year, month, deduction_name__startswith='Policy ' / 'Request Deduction - ')
+            # — pattern ops so a LIKE 'prefix%' can use the index under any collation.
+            models.Index(
+                fields=['employee', 'year', 'month', 'deduction_name'],
+                name='ded_emp_period_name_idx',
+                opclasses=['int8_ops', 'int4_ops', 'int4_ops', 'varchar_pattern_ops'],
+            ),
+        ]
 
     def __str__(self):
         return f"{self.employee.first_name} {self.employee.last_name} - {self.deduction_name} ({self.year}/{self.month})"
@@ -513,4 +525,24 @@ class Section(models.Model):
         unique_together = ['name', 'admin_owner']
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SIGNALS — keep the cached tenant configuration fresh
+# ─────────────────────────────────────────────────────────────────────────────
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=PayrollPolicy)
+@receiver(post_delete, sender=PayrollPolicy)
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+@receiver(post_save, sender=LeaveType)
+@receiver(post_delete, sender=LeaveType)
+def invalidate_tenant_config_cache(sender, instance, **kwargs):
+    """Drop the tenant's cached configuration when policy/holidays/leave types change."""
+    from login.tenant_cache import invalidate_tenant_config
+    invalidate_tenant_config(instance.admin_owner_id)
@@ -17,6 +17,7 @@ from .serializers import (
     SectionSerializer,
 )
 from activitylog.utils import ActivityLogMixin, log_activity
+from login.tenant import resolve_admin_owner
 
 
 def _is_admin(user):
@@ -29,11 +30,7 @@ def _get_admin_owner(user):
     """
     Return the ADMIN who owns the current request's tenant scope.
     """
-    if user.role == 'ADMIN' or getattr(user, 'is_admin_user', False):
-        return user if user.role == 'ADMIN' else user.admin_owner
-    if user.role == 'USER':
-        return user.admin_owner
-    return None  # SUPER_ADMIN
+    return resolve_admin_owner(user)
 
 
 class LeaveTypeViewSet(ActivityLogMixin, viewsets.ModelViewSet):
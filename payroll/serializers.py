@@ -139,3 +139,13 @@ class PayrollCalculateSerializer(serializers.Serializer):
     employee_id = serializers.IntegerField(required=True)
     year = serializers.IntegerField(required=True)
     month = serializers.IntegerField(required=True, min_value=1, max_value=12)
+
+
+class PayrollBulkCalculateSerializer(serializers.Serializer):
+    """Serializer for bulk payroll calculation request"""
+
+    year = serializers.IntegerField(required=True)
+    month = serializers.IntegerField(required=True, min_value=1, max_value=12)
+    employee_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=True
+    )
@@ -1,3 +1,261 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytz
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from attendance import stats
+from attendance.models import (
+    Attendance, AttendanceSettings, EarlyDepartureRequest, LateArrivalRequest, LeaveRequest,
+)
+from employee_management.models import Employee
+from login.models import User
+from master.models import Allowance, Deduction, Holiday, PayrollPolicy
+
+from .batch import PayrollBatchCalculator, PolicyViolationScanner
+from .views import _build_payroll_dict, _check_policy_violations, _get_policy_data, _policy_decision_qs
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def _make_employee(admin, index, with_user=True, **fields):
+    user = None
+    email = f'{admin.username}-emp{index}@example.com'
+    if with_user:
+        user = User.objects.create(
+            username=f'{admin.username}-emp{index}', role='USER', admin_owner=admin, email=email,
+        )
+    defaults = {
+        'first_name': f'Emp{index}',
+        'email': email,
+        'salary': Decimal('30000') + index * 1000,
+        'position': 'Staff',
+        'employment_type': 'full',
+        'date_of_joining': date(2025, 1, 1),
+    }
+    defaults.update(fields)
+    employee = Employee.objects.create(admin_owner=admin, user=user, **defaults)
+    return employee, user
+
+
+def _punch(admin, user, day, check_in, check_out):
+    attendance = Attendance.objects.create(admin_owner=admin, user=user, date=day)
+    Attendance.objects.filter(pk=attendance.pk).update(
+        check_in_time=IST.localize(datetime.combine(day, check_in)),
+        check_out_time=IST.localize(datetime.combine(day, check_out)),
+        status='present',
+    )
+
+
+class DailyViolationsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(username='admin', role='ADMIN', email='admin@example.com')
+        PayrollPolicy.objects.create(admin_owner=self.admin, policy_data={'attendance': {
+            'lateArrival': {'enabled': True}, 'earlyDeparture': {'enabled': True},
+        }})
+        AttendanceSettings.objects.create(
+            admin_owner=self.admin, office_start_time=time(9), office_end_time=time(18),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_auto_created_requests_refresh_request_counts(self):
+        day = date(2026, 3, 5)
+        for i in range(4):
+            _, user = _make_employee(self.admin, i)
+            _punch(self.admin, user, day, time(9, 40), time(18, 5))
+
+        before = self.client.get('/api/attendance/total-requests/').data
+        self.assertEqual(before['late_arrival_requests']['total'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.get('/api/payroll/daily-violations/', {'date': day.isoformat()})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(LateArrivalRequest.objects.filter(admin_owner=self.admin).count(), 4)
+
+        after = self.client.get('/api/attendance/total-requests/').data
+        self.assertEqual(after['late_arrival_requests']['total'], 4)
+        self.assertEqual(after['overall']['total'], before['overall']['total'] + 4)
+
+    def test_super_admin_auto_created_requests_refresh_request_counts(self):
+        # A SUPER_ADMIN has no tenant: the policy falls back to "enabled" and
+        # the auto-created rows carry admin_owner=None.
+        day = date(2026, 3, 5)
+        super_admin = User.objects.create(username='root', role='SUPER_ADMIN', email='root@example.com')
+        user = User.objects.create(username='loose', role='USER', email='loose@example.com')
+        Employee.objects.create(
+            user=user, first_name='Loose', email=user.email, salary=Decimal('30000'), position='Staff',
+            employment_type='full', date_of_joining=date(2025, 1, 1),
+            duty_start_time=time(9), duty_end_time=time(18),
+        )
+        _punch(None, user, day, time(9, 40), time(17, 30))
+        self.assertEqual(stats.request_counts(None)['overall']['total'], 0)
+
+        self.client.force_authenticate(super_admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.get('/api/payroll/daily-violations/', {'date': day.isoformat()})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(LateArrivalRequest.objects.filter(admin_owner=None, user=user).count(), 1)
+        self.assertEqual(EarlyDepartureRequest.objects.filter(admin_owner=None, user=user).count(), 1)
+        self.assertEqual(stats.request_counts(None)['overall']['total'], 2)
+
+
+POLICY = {
+    'attendance': {
+        'lateArrival': {
+            'enabled': True, 'forgivenLatesPerMonth': 1,
+            'tiers': [
+                {'fromMin': 0, 'toMin': 30, 'action': 'half_hour_cut'},
+                {'fromMin': 30, 'toMin': 120, 'action': 'half_day_cut'},
+                {'fromMin': 120, 'toMin': None, 'action': 'full_day_cut'},
+            ],
+        },
+        'earlyDeparture': {'enabled': True, 'forgivenEarlyPerMonth': 0, 'fine': {'type': 'fixed', 'value': '75'}},
+        'breakDeduction': {'enabled': True, 'allowedBreakMinutes': 30},
+    },
+}
+
+
+class _TenantMonthFixture(TestCase):
+    """One tenant in March 2026 with every input the payroll calculation reads."""
+
+    YEAR, MONTH = 2026, 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='acme', role='ADMIN', email='acme@example.com')
+        cls.other_admin = User.objects.create(username='other', role='ADMIN', email='other@example.com')
+        cls.policy = PayrollPolicy.objects.create(admin_owner=cls.admin, policy_data=POLICY)
+        AttendanceSettings.objects.create(
+            admin_owner=cls.admin, office_start_time=time(9), office_end_time=time(18),
+        )
+        for day, paid in [(1, True), (10, True), (17, False)]:    # Sunday, paid weekday, unpaid weekday
+            Holiday.objects.create(admin_owner=cls.admin, name=f'H{day}', date=date(2026, 3, day), is_paid=paid)
+        Holiday.objects.create(admin_owner=cls.other_admin, name='Elsewhere', date=date(2026, 3, 8))
+
+        cls.employees = []
+        statuses = ['present', 'late', 'absent', 'half_day', 'leave', 'present']
+        for i in range(5):
+            duty = {'duty_start_time': time(10), 'duty_end_time': time(19)} if i == 2 else {}
+            employee, user = _make_employee(cls.admin, i, **duty)
+            cls.employees.append(employee)
+            for d in range(2, 28):
+                day = date(2026, 3, d)
+                if day.weekday() == 6 or (d + i) % 9 == 0:
+                    continue
+                attendance = Attendance.objects.create(admin_owner=cls.admin, user=user, date=day)
+                Attendance.objects.filter(pk=attendance.pk).update(
+                    status=statuses[(d * (i + 1)) % len(statuses)],
+                    total_hours=Decimal('8.00'), net_working_hours=Decimal('7.50'),
+                    total_break_minutes=[0, 20, 45, 90][(d + i) % 4],
+                )
+            for d in range(2, 27, 3 + i % 2):
+                LateArrivalRequest.objects.create(
+                    admin_owner=cls.admin, user=user, date=date(2026, 3, d),
+                    expected_arrival_time=time(9, 0) if i == 2 else time(9 + d % 3, (d * 13) % 60),
+                    reason='traffic', status=['pending', 'approved', 'waived', 'rejected'][d % 4],
+                )
+            for d in range(4, 27, 5):
+                EarlyDepartureRequest.objects.create(
+                    admin_owner=cls.admin, user=user, date=date(2026, 3, d),
+                    expected_departure_time=time(16 + i % 2, 30), reason='appointment',
+                    status=['pending', 'approved', 'cancelled'][d % 3],
+                )
+            if i % 2:
+                LeaveRequest.objects.create(
+                    admin_owner=cls.admin, user=user, leave_type=['casual', 'unpaid'][i % 3 == 0],
+                    start_date=date(2026, 2, 26), end_date=date(2026, 3, 3), reason='family', status='approved',
+                )
+            Allowance.objects.create(
+                admin_owner=cls.admin, employee=employee, allowance_name='Travel',
+                year=2026, month=3, amount=Decimal('500') + i,
+            )
+            Deduction.objects.create(
+                admin_owner=cls.admin, employee=employee, deduction_name='Canteen',
+                year=2026, month=3, amount=Decimal('120'),
+            )
+            Deduction.objects.create(
+                admin_owner=cls.admin, employee=employee,
+                deduction_name=f'Request Deduction - Late Arrival #{i} - Mar 2026',
+                year=2026, month=3, amount=Decimal('55'), is_active=i != 3,
+            )
+        # Rows the tenant scoping must leave out.
+        Deduction.objects.create(
+            admin_owner=cls.other_admin, employee=cls.employees[0], deduction_name='Elsewhere',
+            year=2026, month=3, amount=Decimal('999'),
+        )
+        Deduction.objects.create(
+            admin_owner=cls.admin, employee=cls.employees[1],
+            deduction_name='Policy Waiver - Late Arrival - March 2026', year=2026, month=3, amount=0,
+        )
+        Deduction.objects.create(
+            admin_owner=cls.other_admin, employee=cls.employees[1],
+            deduction_name='Policy Deduction - All Violations - March 2026', year=2026, month=3, amount=10,
+        )
+
+        employee, _ = _make_employee(cls.admin, 9, with_user=False)
+        cls.employees.append(employee)
+
+    def setUp(self):
+        cache.clear()
+
+
+class PayrollBatchCalculatorTests(_TenantMonthFixture):
+
+    def _assert_batch_matches_single(self):
+        results = PayrollBatchCalculator(self.admin, self.YEAR, self.MONTH).calculate(self.employees)
+
+        self.assertEqual(set(results), {e.id for e in self.employees})
+        for employee in self.employees:
+            with self.subTest(employee=employee.first_name):
+                self.assertEqual(
+                    results[employee.id],
+                    _build_payroll_dict(employee, self.YEAR, self.MONTH, admin_owner=self.admin),
+                )
+
+    def test_batch_matches_single_employee_calculation(self):
+        self._assert_batch_matches_single()
+
+    def test_batch_matches_single_employee_calculation_in_normalized_mode(self):
+        PayrollPolicy.objects.filter(pk=self.policy.pk).update(policy_data=dict(POLICY, salaryCalculation={
+            'enabled': True, 'normalizedMonthDays': 30, 'paidOffDaysPerMonth': 4,
+        }))
+        self._assert_batch_matches_single()
+
+    def test_batch_covers_violations_and_employees_without_login(self):
+        results = PayrollBatchCalculator(self.admin, self.YEAR, self.MONTH).calculate(self.employees)
+
+        self.assertTrue(any(r['policy_violations'] for r in results.values()))
+        self.assertEqual(results[self.employees[-1].id]['policy_violations'], [])
+
+
+class PolicyViolationScannerTests(_TenantMonthFixture):
+
+    def test_scan_matches_single_employee_checks(self):
+        policy_data = _get_policy_data(self.admin)
+        scan = PolicyViolationScanner(self.admin, self.YEAR, self.MONTH).scan(self.employees)
 
-# Create your tests here.
+        self.assertTrue(any(entry['violations'] for entry in scan.values()))
+        for employee in self.employees:
+            with self.subTest(employee=employee.first_name):
+                entry = scan[employee.id]
+                self.assertEqual(
+                    entry['violations'],
+                    _check_policy_violations(employee, self.YEAR, self.MONTH, policy_data, self.admin),
+                )
+                self.assertEqual(
+                    entry['decision_names'],
+                    set(_policy_decision_qs(employee, self.YEAR, self.MONTH, self.admin)
+                        .values_list('deduction_name', flat=True)),
+                )
+                self.assertEqual(
+                    [d.pk for d in entry['request_deductions']],
+                    list(Deduction.objects.filter(
+                        employee=employee, year=self.YEAR, month=self.MONTH, is_active=True,
+                        deduction_name__startswith='Request Deduction - ',
+                    ).order_by('id').values_list('pk', flat=True)),
+                )
@@ -2,6 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.db.models import Q, Sum
 from django.utils import timezone
 from datetime import datetime
@@ -10,11 +11,16 @@ import re
 from decimal import Decimal, ROUND_HALF_UP
 
 from .models import Payroll
-from .serializers import PayrollSerializer, PayrollDetailSerializer, PayrollCalculateSerializer
+from .serializers import (
+    PayrollSerializer, PayrollDetailSerializer, PayrollCalculateSerializer,
+    PayrollBulkCalculateSerializer,
+)
 from employee_management.models import Employee
 from master.models import Allowance, Deduction, PayrollPolicy
-from attendance.models import Attendance, LeaveRequest
+from attendance.models import Attendance
+from attendance.rollups import month_summaries
 from activitylog.utils import ActivityLogMixin, log_activity
+from login.tenant import resolve_admin_owner, tenant_config
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -31,11 +37,7 @@ def _get_admin_owner(user):
     """
     Return the ADMIN who owns the current request's tenant scope.
     """
-    if user.role == 'ADMIN' or getattr(user, 'is_admin_user', False):
-        return user if user.role == 'ADMIN' else user.admin_owner
-    if user.role == 'USER':
-        return user.admin_owner
-    return None  # SUPER_ADMIN
+    return resolve_admin_owner(user)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -48,11 +50,10 @@ def _get_duty_times(employee, admin):
     Priority: employee-specific duty times → global AttendanceSettings.
     Both returned as datetime.time objects (or None if not configured).
     """
-    from attendance.models import AttendanceSettings
     start = getattr(employee, 'duty_start_time', None)
     end   = getattr(employee, 'duty_end_time', None)
     if not start or not end:
-        settings_obj = AttendanceSettings.objects.filter(admin_owner=admin).order_by('-id').first()
+        settings_obj = tenant_config(admin).attendance_settings
         if settings_obj:
             start = start or settings_obj.office_start_time
             end   = end   or settings_obj.office_end_time
@@ -112,13 +113,71 @@ def _check_policy_violations(employee, year, month, policy_data, admin, total_da
     """
     Compare an employee's attendance for the given month against policy_data.
 
-    Uses employee-specific duty_start_time / duty_end_time (falls back to
-    global AttendanceSettings) to calculate the actual minutes late / early
-    for each request, then maps those minutes to the correct policy tier.
+    Loads the employee's late / early requests and break-heavy attendance rows
+    for the month, then hands them to _evaluate_policy_violations().
+    PayrollBatchCalculator (payroll/batch.py) preloads the same rows for a
+    whole tenant and calls _evaluate_policy_violations() directly.
+    """
+    from attendance.models import LateArrivalRequest, EarlyDepartureRequest
+
+    # ── Linked login account (Employee.user) ──────────────────────────────────
+    auth_user_id = employee.user_id
+    if not auth_user_id:
+        return []
+
+    duty_start, duty_end = _get_duty_times(employee, admin)
+
+    if total_days is None:
+        # Recalculate working days — only Sunday holidays reduce the divisor
+        total_days = _working_day_divisor(year, month, _get_holiday_breakdown(year, month, admin))
+
+    late_requests = list(
+        LateArrivalRequest.objects.filter(
+            user_id=auth_user_id,
+            date__year=year,
+            date__month=month,
+            admin_owner=admin,
+        ).exclude(status__in=['rejected', 'cancelled']).order_by('date')
+    )
+    early_requests = list(
+        EarlyDepartureRequest.objects.filter(
+            user_id=auth_user_id,
+            date__year=year,
+            date__month=month,
+            admin_owner=admin,
+        ).exclude(status__in=['rejected', 'cancelled']).order_by('date')
+    )
+    break_attendances = list(
+        Attendance.objects.filter(
+            user_id=auth_user_id,
+            date__year=year,
+            date__month=month,
+            total_break_minutes__gt=0,
+        ).order_by('date')
+    )
+
+    return _evaluate_policy_violations(
+        employee, policy_data, duty_start, duty_end, total_days,
+        late_requests, early_requests, break_attendances,
+    )
+
+
+def _evaluate_policy_violations(employee, policy_data, duty_start, duty_end, total_days,
+                                late_requests, early_requests, break_attendances):
+    """
+    Pure, in-memory half of _check_policy_violations().
+
+    late_requests / early_requests are the employee's non-rejected,
+    non-cancelled requests for the month ordered by date; break_attendances
+    are the month's Attendance rows with total_break_minutes > 0 ordered by
+    date.  No queries are issued here.
+
+    duty_start / duty_end are the employee's resolved duty times (see
+    _get_duty_times) and are used to calculate the actual minutes late / early
+    for each request, then those minutes are mapped to the correct policy tier.
 
     per_day is computed from the employee's monthly salary divided by
-    total_days (working days after holidays).  If total_days is not supplied
-    it is recalculated here so the function stays self-contained.
+    total_days (working days after holidays).
 
     Deduction mapping (per billable occurrence):
       half_day_cut        → per_day / 2
@@ -132,25 +191,10 @@ def _check_policy_violations(employee, year, month, policy_data, admin, total_da
          action, fine, deduction_amount, per_day_salary, requests }, ...]
     Returns an empty list when the employee is within all policy limits.
     """
-    from login.models import User
-    from attendance.models import LateArrivalRequest, EarlyDepartureRequest
-
     violations = []
 
-    # ── Resolve auth user from employee email ─────────────────────────────────
-    auth_user = User.objects.filter(email=employee.email).first()
-    if not auth_user:
-        return violations
-
-    duty_start, duty_end = _get_duty_times(employee, admin)
-
     # ── Per-day salary — must match _build_payroll_dict ───────────────────────
     basic_salary = Decimal(str(employee.salary))
-    if total_days is None:
-        # Recalculate working days — only Sunday holidays reduce the divisor
-        calendar_days_count = calendar.monthrange(year, month)[1]
-        hol_bk = _get_holiday_breakdown(year, month, admin)
-        total_days = max(1, calendar_days_count - hol_bk['sunday_count'])
 
     per_day = (basic_salary / Decimal(str(total_days))).quantize(
         Decimal('0.01'), rounding=ROUND_HALF_UP
@@ -210,14 +254,6 @@ def _check_policy_violations(employee, year, month, policy_data, admin, total_da
         tiers             = la_policy.get('tiers', [])
         habitual_action   = la_policy.get('habitualLate', 'full_day_cut')
 
-        late_qs = LateArrivalRequest.objects.filter(
-            user=auth_user,
-            date__year=year,
-            date__month=month,
-            admin_owner=admin,
-        ).exclude(status__in=['rejected', 'cancelled']).order_by('date')
-
-        late_requests = list(late_qs)
         late_count    = len(late_requests)
         billable      = max(0, late_count - forgiven)
 
@@ -289,14 +325,6 @@ def _check_policy_violations(employee, year, month, policy_data, admin, total_da
         ed_tiers       = ed_policy.get('tiers', [])
         default_action = ed_policy.get('unapprovedEarlyLeave', 'half_hour_cut')
 
-        early_qs = EarlyDepartureRequest.objects.filter(
-            user=auth_user,
-            date__year=year,
-            date__month=month,
-            admin_owner=admin,
-        ).exclude(status__in=['rejected', 'cancelled']).order_by('date')
-
-        early_requests = list(early_qs)
         early_count    = len(early_requests)
         billable_early = max(0, early_count - forgiven_early)
 
@@ -362,16 +390,8 @@ def _check_policy_violations(employee, year, month, policy_data, admin, total_da
         bd_tiers = bd_policy.get('tiers', [])
         required_hours = duty_hours
 
-        # Attendance records with break data for this month
-        att_qs = Attendance.objects.filter(
-            user=auth_user,
-            date__year=year,
-            date__month=month,
-            total_break_minutes__gt=0,
-        ).order_by('date')
-
         annotated_break = []
-        for att in att_qs:
+        for att in break_attendances:
             net_hours = Decimal(str(att.net_working_hours or 0))
             # No penalty if the employee met the required working hours
             if net_hours >= required_hours:
@@ -425,14 +445,8 @@ def _check_policy_violations(employee, year, month, policy_data, admin, total_da
     return violations
 
 
-def _get_leave_type_breakdown(employee, year, month):
-    """
-    Get detailed breakdown of leave types for the employee in the given month.
-    """
-    from login.models import User
-    from datetime import date
-
-    leave_breakdown = {
+def _empty_leave_breakdown():
+    return {
         'sick_leave':      {'count': 0, 'days': 0, 'label': 'Sick Leave'},
         'casual_leave':    {'count': 0, 'days': 0, 'label': 'Casual Leave'},
         'annual_leave':    {'count': 0, 'days': 0, 'label': 'Annual Leave'},
@@ -442,39 +456,42 @@ def _get_leave_type_breakdown(employee, year, month):
         'other_leave':     {'count': 0, 'days': 0, 'label': 'Other Leave'},
     }
 
-    try:
-        user = User.objects.filter(email=employee.email).first()
-        if not user:
-            return leave_breakdown
-
-        first_day = date(year, month, 1)
-        last_day  = date(year, month, calendar.monthrange(year, month)[1])
-
-        leave_requests = LeaveRequest.objects.filter(
-            user=user,
-            status='approved',
-            start_date__lte=last_day,
-            end_date__gte=first_day,
-        )
 
-        for leave_req in leave_requests:
-            actual_start   = max(leave_req.start_date, first_day)
-            actual_end     = min(leave_req.end_date,   last_day)
-            days_in_month  = (actual_end - actual_start).days + 1
-            leave_type_key = f"{leave_req.leave_type}_leave"
-            if leave_type_key in leave_breakdown:
-                leave_breakdown[leave_type_key]['count'] += 1
-                leave_breakdown[leave_type_key]['days']  += days_in_month
+def _leave_breakdown_from_summary(summary):
+    """
+    Build the leave-type breakdown from an EmployeeMonthSummary (approved
+    leave overlapping the month; only the days inside the month count).
+    """
+    leave_breakdown = _empty_leave_breakdown()
+    for leave_type, figures in (summary.leave_by_type if summary else {}).items():
+        leave_type_key = f"{leave_type}_leave"
+        if leave_type_key in leave_breakdown:
+            leave_breakdown[leave_type_key]['count'] += figures['count']
+            leave_breakdown[leave_type_key]['days']  += figures['days']
+    return leave_breakdown
 
-    except Exception:
-        pass
 
-    return leave_breakdown
+def _counts_from_summary(summary):
+    """Status counts of an EmployeeMonthSummary (empty when there is none)."""
+    if summary is None:
+        return {}
+    return {
+        'present':  summary.present,
+        'absent':   summary.absent,
+        'late':     summary.late,
+        'half_day': summary.half_day,
+        'leave':    summary.leave,
+        'wfh':      summary.wfh,
+    }
 
 
-def _get_attendance_summary(employee, year, month, total_days):
+def _attendance_summary_from_counts(counts, total_days, leave_breakdown):
     """
-    Match Employee → auth User by email, then count every attendance status
+    Turn per-status attendance counts into the payroll attendance summary.
+
+    counts is a dict keyed like _counts_from_summary(), or None when
+    the employee has no matching auth User (every day is then treated as
+    present, matching the historical behaviour).
     """
     summary = {
         'present_days':   0,
@@ -485,33 +502,39 @@ def _get_attendance_summary(employee, year, month, total_days):
         'wfh_days':       0,
         'working_days':   0,
         'paid_days':      0,
-        'leave_breakdown': {},
+        'leave_breakdown': leave_breakdown,
     }
+    if counts is None:
+        summary['present_days'] = total_days
+        summary['working_days'] = total_days
+        summary['paid_days']    = total_days
+        return summary
+
+    summary['present_days'] = counts.get('present', 0)
+    summary['absent_days']  = counts.get('absent', 0)
+    summary['late_days']    = counts.get('late', 0)
+    summary['half_days']    = counts.get('half_day', 0)
+    summary['leave_days']   = counts.get('leave', 0)
+    summary['wfh_days']     = counts.get('wfh', 0)
+    summary['working_days'] = summary['present_days'] + summary['late_days'] + summary['half_days']
+    summary['paid_days']    = summary['present_days'] + summary['late_days'] + summary['leave_days']
+    return summary
+
+
+def _get_attendance_summary(employee, year, month, total_days):
+    """
+    Count every attendance status of the employee's linked login account,
+    read from its EmployeeMonthSummary (attendance.rollups).
+    """
     try:
-        from login.models import User
-        user = User.objects.filter(email=employee.email).first()
-        if user:
-            att_qs = Attendance.objects.filter(user=user, date__year=year, date__month=month)
-            summary['present_days'] = att_qs.filter(status='present').count()
-            summary['absent_days']  = att_qs.filter(status='absent').count()
-            summary['late_days']    = att_qs.filter(status='late').count()
-            summary['half_days']    = att_qs.filter(status='half_day').count()
-            summary['leave_days']   = att_qs.filter(status='leave').count()
-            summary['wfh_days']     = att_qs.filter(is_wfh=True).count()
-            summary['working_days'] = summary['present_days'] + summary['late_days'] + summary['half_days']
-            summary['paid_days']    = summary['present_days'] + summary['late_days'] + summary['leave_days']
-            summary['leave_breakdown'] = _get_leave_type_breakdown(employee, year, month)
-        else:
-            summary['present_days']    = total_days
-            summary['working_days']    = total_days
-            summary['paid_days']       = total_days
-            summary['leave_breakdown'] = _get_leave_type_breakdown(employee, year, month)
+        if not employee.user_id:
+            return _attendance_summary_from_counts(None, total_days, _empty_leave_breakdown())
+        summary = month_summaries([employee.user_id], year, month).get(employee.user_id)
+        return _attendance_summary_from_counts(
+            _counts_from_summary(summary), total_days, _leave_breakdown_from_summary(summary)
+        )
     except Exception:
-        summary['present_days']    = total_days
-        summary['working_days']    = total_days
-        summary['paid_days']       = total_days
-        summary['leave_breakdown'] = {}
-    return summary
+        return _attendance_summary_from_counts(None, total_days, {})
 
 
 def _calc_att_deduction(basic_salary, total_days, absent_days, half_days):
@@ -596,6 +619,10 @@ def _policy_decision_name(kind, violation_type, month, year):
     return f"Policy {kind} - {label} - {month_name} {year}"
 
 
+# "Request Deduction - Late Arrival #123 - Jun 2026"
+_REQUEST_DEDUCTION_RE = re.compile(r'^Request Deduction - (Late Arrival|Early Departure) #(\d+)')
+
+
 def _policy_decision_qs(employee, year, month, admin_owner=None):
     qs = Deduction.objects.filter(
         employee=employee,
@@ -637,17 +664,25 @@ def _get_holiday_breakdown(year, month, admin_owner=None):
       }
     """
     from master.models import Holiday as _Holiday
-    import datetime as _dt
 
-    qs = _Holiday.objects.filter(date__year=year, date__month=month, is_active=True)
     if admin_owner:
-        qs = qs.filter(admin_owner=admin_owner)
+        return tenant_config(admin_owner).work_calendar(year).holiday_breakdown(month)
+
+    qs = _Holiday.objects.filter(date__year=year, date__month=month, is_active=True)
+    return _split_holidays(qs)
 
+
+def _split_holidays(holidays):
+    """
+    Bucket an iterable of Holiday rows the same way _get_holiday_breakdown
+    does.  Split out so the batch calculator can reuse it on holidays it
+    has already loaded.
+    """
     sunday_hols        = []
     paid_non_sunday    = []
     unpaid_non_sunday  = []
 
-    for h in qs:
+    for h in holidays:
         if h.date.weekday() == 6:          # weekday() == 6 → Sunday
             sunday_hols.append(h)
         elif h.is_paid:
@@ -665,6 +700,22 @@ def _get_holiday_breakdown(year, month, admin_owner=None):
     }
 
 
+def _working_day_divisor(year, month, hol_breakdown):
+    """
+    Working-day divisor for the month: calendar days minus Sunday holidays
+    (never below 1).  Paid/unpaid weekday holidays do not shrink it.
+    """
+    calendar_days = calendar.monthrange(year, month)[1]
+    return max(1, calendar_days - hol_breakdown['sunday_count'])
+
+
+def _get_policy_data(admin_owner):
+    """Return the tenant's PayrollPolicy.policy_data, or {} if none is saved."""
+    if not admin_owner:
+        return {}
+    return tenant_config(admin_owner).policy_data
+
+
 def _build_payroll_dict(employee, year, month, admin_owner=None):
     """
     Central helper for payroll calculation.
@@ -711,13 +762,52 @@ def _build_payroll_dict(employee, year, month, admin_owner=None):
       + paid_holiday_allowance    (B above — applied in all modes)
       + unpaid_holiday_deduction  (C above — applied in all modes)
     """
-    import datetime as _dt
-    calendar_days = calendar.monthrange(year, month)[1]
+    hol_breakdown = _get_holiday_breakdown(year, month, admin_owner)
+    total_days = _working_day_divisor(year, month, hol_breakdown)
+    policy_data = _get_policy_data(admin_owner)
 
-    from master.models import Holiday, PayrollPolicy as _PP
+    att = _get_attendance_summary(employee, year, month, total_days)
+
+    # ── Manual allowances & deductions from DB (tenant-scoped) ────────────────
+    db_allowances = Allowance.objects.filter(
+        employee=employee, year=year, month=month, is_active=True
+    )
+    db_deductions = Deduction.objects.filter(
+        employee=employee, year=year, month=month, is_active=True
+    )
+    if admin_owner:
+        db_allowances = db_allowances.filter(admin_owner=admin_owner)
+        db_deductions = db_deductions.filter(admin_owner=admin_owner)
+
+    policy_violations = _check_policy_violations(
+        employee, year, month, policy_data, admin_owner, total_days=total_days
+    )
+
+    return _compose_payroll_dict(
+        employee, year, month,
+        hol_breakdown=hol_breakdown,
+        policy_data=policy_data,
+        att=att,
+        db_allowances=list(db_allowances.order_by('id')),
+        db_deductions=list(db_deductions.order_by('id')),
+        policy_violations=policy_violations,
+    )
+
+
+def _compose_payroll_dict(employee, year, month, hol_breakdown, policy_data,
+                          att, db_allowances, db_deductions, policy_violations):
+    """
+    Pure part of the payroll calculation: turns already-loaded inputs into
+    the payroll dict.  Shared by _build_payroll_dict (one employee) and
+    payroll.batch.PayrollBatchCalculator (whole tenant) so both paths
+    return identical figures.
+
+    db_allowances / db_deductions are lists of active Allowance / Deduction
+    rows for the employee-month, ordered by id.
+    """
+    calendar_days = calendar.monthrange(year, month)[1]
 
     # ── Holiday breakdown (Sunday vs paid/unpaid weekday) ─────────────────────
-    hol_breakdown = _get_holiday_breakdown(year, month, admin_owner)
     sunday_count            = hol_breakdown['sunday_count']
     paid_non_sunday_count   = hol_breakdown['paid_non_sunday_count']
     unpaid_non_sunday_count = hol_breakdown['unpaid_non_sunday_count']
@@ -733,8 +823,6 @@ def _build_payroll_dict(employee, year, month, admin_owner=None):
     basic_salary = employee.salary
 
     # ── Resolve salary-calculation policy ────────────────────────────────────
-    policy_obj = _PP.objects.filter(admin_owner=admin_owner).first() if admin_owner else None
-    policy_data = policy_obj.policy_data if policy_obj else {}
     sal_calc = policy_data.get('salaryCalculation', {})
     normalized_mode = sal_calc.get('enabled', False)
     normalized_month_days = int(sal_calc.get('normalizedMonthDays', 30))
@@ -747,9 +835,6 @@ def _build_payroll_dict(employee, year, month, admin_owner=None):
         total_days = max(1, calendar_days - holiday_count)
     # (standard mode already uses all calendar days minus holidays, so no change needed)
 
-    # ── Attendance ────────────────────────────────────────────────────────────
-    att = _get_attendance_summary(employee, year, month, total_days)
-
     if normalized_mode:
         # Normalize: treat every month as `normalized_month_days` days
         norm_total_days = max(1, normalized_month_days)
@@ -826,28 +911,19 @@ def _build_payroll_dict(employee, year, month, admin_owner=None):
         })
 
     # ── Manual allowances & deductions from DB (tenant-scoped) ────────────────
-    db_allowances = Allowance.objects.filter(
-        employee=employee, year=year, month=month, is_active=True
-    )
-    db_deductions = Deduction.objects.filter(
-        employee=employee, year=year, month=month, is_active=True
-    )
-    
-    if admin_owner:
-        db_allowances = db_allowances.filter(admin_owner=admin_owner)
-        db_deductions = db_deductions.filter(admin_owner=admin_owner)
-
-    db_policy_deductions = db_deductions.filter(deduction_name__startswith='Policy Deduction')
-    db_other_deductions = db_deductions.exclude(deduction_name__startswith='Policy Deduction')
-
-    db_allowances_total = db_allowances.aggregate(t=Sum('amount'))['t'] or Decimal('0.00')
-    total_manual_deductions = db_other_deductions.aggregate(t=Sum('amount'))['t'] or Decimal('0.00')
-    policy_deductions_total = (
-        db_policy_deductions.aggregate(t=Sum('amount'))['t'] or Decimal('0.00')
+    db_policy_deductions = [
+        d for d in db_deductions if d.deduction_name.startswith('Policy Deduction')
+    ]
+    db_other_deductions = [
+        d for d in db_deductions if not d.deduction_name.startswith('Policy Deduction')
+    ]
+
+    db_allowances_total = sum((a.amount for a in db_allowances), Decimal('0.00'))
+    total_manual_deductions = sum((d.amount for d in db_other_deductions), Decimal('0.00'))
+    policy_deductions_total = sum(
+        (d.amount for d in db_policy_deductions), Decimal('0.00')
     ).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
-    policy_violations = _check_policy_violations(employee, year, month, policy_data, admin_owner, total_days=total_days)
-
     # ── WFH deduction (based on policy salary effect) ─────────────────────────
     wfh_policy   = policy_data.get('attendance', {}).get('workFromHome', {})
     wfh_enabled  = wfh_policy.get('enabled', False)
@@ -968,7 +1044,7 @@ def _build_payroll_dict(employee, year, month, admin_owner=None):
                 'description': d.description,
                 'source': 'policy' if d.deduction_name.startswith('Policy Deduction') else 'manual',
             }
-            for d in list(db_other_deductions) + list(db_policy_deductions)
+            for d in db_other_deductions + db_policy_deductions
         ] + unpaid_holiday_deduction_items,
         'policy_violations': policy_violations,
         'employee_settings': {
@@ -1054,6 +1130,51 @@ class PayrollViewSet(ActivityLogMixin, viewsets.ModelViewSet):
         })
         return Response(data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'], url_path='calculate-bulk')
+    def calculate_bulk(self, request):
+        """
+        Calculate payroll for every active employee of the tenant (or the
+        given employee_ids) in one request.  Figures are identical to
+        calling `calculate` once per employee.
+        """
+        from .batch import PayrollBatchCalculator
+
+        ser = PayrollBulkCalculateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        year  = ser.validated_data['year']
+        month = ser.validated_data['month']
+
+        admin = _get_admin_owner(request.user)
+        if admin is None and request.user.role != 'SUPER_ADMIN':
+            return Response({'error': 'No tenant scope for this user'}, status=status.HTTP_403_FORBIDDEN)
+
+        calculator = PayrollBatchCalculator(admin, year, month)
+        employees  = calculator.employees(ser.validated_data.get('employee_ids'))
+        payrolls   = calculator.calculate(employees)
+
+        month_name = dict(Payroll.MONTH_CHOICES).get(month, '')
+        results = []
+        for employee in employees:
+            data = payrolls[employee.id]
+            data.update({
+                'employee_id':   employee.id,
+                'employee_name': f"{employee.first_name} {employee.last_name}",
+                'employee_code': employee.employee_id,
+                'year':          year,
+                'month':         month,
+                'month_name':    month_name,
+            })
+            results.append(data)
+
+        return Response({
+            'year':       year,
+            'month':      month,
+            'month_name': month_name,
+            'count':      len(results),
+            'results':    results,
+        }, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'], url_path='employee-data')
     def employee_data(self, request):
         employee_id = request.query_params.get('employee_id')
@@ -1175,21 +1296,13 @@ class PayrollViewSet(ActivityLogMixin, viewsets.ModelViewSet):
         except ValueError:
             return Response({'error': 'Invalid year or month'}, status=status.HTTP_400_BAD_REQUEST)
 
+        from .batch import PolicyViolationScanner
+
         user  = request.user
         admin = _get_admin_owner(user)
 
         # Load the payroll policy for this tenant
-        from master.models import PayrollPolicy
-        policy_obj = None
-        if admin:
-            policy_obj = PayrollPolicy.objects.filter(admin_owner=admin).first()
-
-        policy_data = policy_obj.policy_data if policy_obj else {}
-
-        # Pre-compute working days (calendar days minus Sunday holidays only) — shared across employees
-        _cal_days = calendar.monthrange(year, month)[1]
-        _hol_bk = _get_holiday_breakdown(year, month, admin)
-        _total_days = max(1, _cal_days - _hol_bk['sunday_count'])
+        policy_data = request.tenant.for_owner(admin).policy_data if admin else {}
 
         # Fetch all active employees for this tenant (exclude offboarded/inactive)
         _OFFBOARDED = {'terminated', 'resigned', 'retired', 'offboarded', 'inactive'}
@@ -1198,34 +1311,30 @@ class PayrollViewSet(ActivityLogMixin, viewsets.ModelViewSet):
             if admin is None:
                 return Response([], status=status.HTTP_200_OK)
             emp_qs = emp_qs.filter(admin_owner=admin)
-        emp_qs = emp_qs.exclude(status__in=_OFFBOARDED)
+        employees = list(emp_qs.exclude(status__in=_OFFBOARDED).select_related('department'))
+
+        # Requests, break-heavy days and policy / per-request deductions for
+        # the whole tenant in a handful of queries; tiers evaluated in memory.
+        scan = PolicyViolationScanner(admin, year, month).scan(employees, policy_data)
+        all_deduction_name = _policy_decision_name('Deduction', 'all', month, year)
 
         violations = []
 
-        for employee in emp_qs.select_related('department'):
-            emp_violations = _check_policy_violations(employee, year, month, policy_data, admin, total_days=_total_days)
-            duty_start, duty_end = _get_duty_times(employee, admin)
-            decision_names = set(
-                _policy_decision_qs(employee, year, month, admin)
-                .values_list('deduction_name', flat=True)
-            )
-            all_deduction_name = _policy_decision_name('Deduction', 'all', month, year)
-
-            # Check for per-request deductions applied from Daily View
-            per_request_deduction_records = Deduction.objects.filter(
-                employee=employee,
-                year=year,
-                month=month,
-                deduction_name__startswith='Request Deduction - ',
-                is_active=True,
-            )
+        for employee in employees:
+            emp_scan = scan[employee.id]
+            emp_violations = emp_scan['violations']
+            duty_start, duty_end = emp_scan['duty_start'], emp_scan['duty_end']
+            decision_names = emp_scan['decision_names']
+
+            # Per-request deductions applied from Daily View
+            per_request_deduction_records = emp_scan['request_deductions']
             per_request_deduction_total = sum(d.amount for d in per_request_deduction_records)
 
             # Build per-request deduction details (request_type, request_id, amount)
             # Name format: "Request Deduction - Late Arrival #123 - Jun 2026"
             per_request_details = []
             for d in per_request_deduction_records:
-                m = re.match(r'^Request Deduction - (Late Arrival|Early Departure) #(\d+)', d.deduction_name)
+                m = _REQUEST_DEDUCTION_RE.match(d.deduction_name)
                 if m:
                     label = m.group(1)
                     req_id = int(m.group(2))
@@ -1311,21 +1420,14 @@ class PayrollViewSet(ActivityLogMixin, viewsets.ModelViewSet):
         user  = request.user
         admin = _get_admin_owner(user)
 
-        from master.models import PayrollPolicy
         from attendance.models import LateArrivalRequest, EarlyDepartureRequest
-        from login.models import User as AuthUser
+        from .batch import PolicyViolationScanner
 
-        policy_obj  = PayrollPolicy.objects.filter(admin_owner=admin).first() if admin else None
-        policy_data = policy_obj.policy_data if policy_obj else {}
+        policy_data = request.tenant.for_owner(admin).policy_data if admin else {}
 
         la_policy  = policy_data.get('attendance', {}).get('lateArrival',    {})
         ed_policy  = policy_data.get('attendance', {}).get('earlyDeparture', {})
 
-        # Pre-compute working days for this month (same as _build_payroll_dict)
-        _cal_days_dv = calendar.monthrange(year, month)[1]
-        _hol_bk_dv = _get_holiday_breakdown(year, month, admin)
-        _total_days_dv = max(1, _cal_days_dv - _hol_bk_dv['sunday_count'])
-
         # Build a map: auth_user_id → employee record (active employees only)
         _OFFBOARDED = {'terminated', 'resigned', 'retired', 'offboarded', 'inactive'}
         emp_qs = Employee.objects.all()
@@ -1335,7 +1437,13 @@ class PayrollViewSet(ActivityLogMixin, viewsets.ModelViewSet):
             emp_qs = emp_qs.filter(admin_owner=admin)
         emp_qs = emp_qs.exclude(status__in=_OFFBOARDED)
 
-        emp_by_email = {emp.email.lower(): emp for emp in emp_qs.select_related('department')}
+        emp_by_user = {
+            emp.user_id: emp
+            for emp in emp_qs.filter(user__isnull=False).select_related('department')
+        }
+
+        # Month-level scan (working days, duty times, violations, decisions)
+        scanner = PolicyViolationScanner(admin, year, month)
 
         # ── Auto-detect late/early from raw Attendance records ────────────────
         # For every employee who punched in/out today, check if they were
@@ -1344,97 +1452,151 @@ class PayrollViewSet(ActivityLogMixin, viewsets.ModelViewSet):
         # as _auto_create_late_request / _auto_create_early_request in
         # attendance/views.py).  This ensures the daily view always shows all
         # policy violations whether or not the employee submitted a request.
+        #
+        # Users who already have a request for the day are skipped up front;
+        # the rest go in with one bulk_create per request type, and
+        # ignore_conflicts leaves rows created concurrently (unique on
+        # user + date) untouched.
         import pytz as _pytz
         from attendance.models import Attendance as _Attendance
 
+        _ist        = _pytz.timezone('Asia/Kolkata')
         _grace_min  = int(la_policy.get('gracePeriodMin', 0))
         _buffer_min = int(ed_policy.get('earlyBufferMin', 0))
         _la_enabled = la_policy.get('enabled', True)
         _ed_enabled = ed_policy.get('enabled', True)
 
-        _att_qs = _Attendance.objects.filter(
+        _att_rows = list(_Attendance.objects.filter(
             date=query_date,
             admin_owner=admin,
-        ).select_related('user')
+            user_id__in=list(emp_by_user),
+        ).values_list('user_id', 'check_in_time', 'check_out_time'))
+        _att_user_ids = [row[0] for row in _att_rows]
+
+        _has_late = set(
+            LateArrivalRequest.objects
+            .filter(user_id__in=_att_user_ids, date=query_date)
+            .values_list('user_id', flat=True)
+        )
+        _has_early = set(
+            EarlyDepartureRequest.objects
+            .filter(user_id__in=_att_user_ids, date=query_date)
+            .values_list('user_id', flat=True)
+        )
 
-        for _att in _att_qs:
-            _emp = emp_by_email.get((_att.user.email or '').lower())
+        _new_late, _new_early = [], []
+        for _user_id, _check_in, _check_out in _att_rows:
+            _emp = emp_by_user.get(_user_id)
             if not _emp:
                 continue
-            _duty_start, _duty_end = _get_duty_times(_emp, admin)
+            _duty_start, _duty_end = scanner.duty_times(_emp)
 
             # ── Late check-in ─────────────────────────────────────────────────
-            if _la_enabled and _att.check_in_time and _duty_start:
-                _ci_local = _att.check_in_time.astimezone(_pytz.timezone('Asia/Kolkata'))
-                _ci_time  = _ci_local.time()
+            if _la_enabled and _check_in and _duty_start and _user_id not in _has_late:
+                _ci_time  = _check_in.astimezone(_ist).time()
                 _mins_late = _minutes_late(_ci_time, _duty_start, _grace_min)
                 if _mins_late > 0:
-                    LateArrivalRequest.objects.get_or_create(
-                        user=_att.user,
+                    _has_late.add(_user_id)
+                    _new_late.append(LateArrivalRequest(
+                        user_id=_user_id,
                         date=query_date,
                         admin_owner=admin,
-                        defaults={
-                            'expected_arrival_time': _ci_time,
-                            'reason': f'Auto-detected late check-in ({round(_mins_late)} min late)',
-                            'status': 'pending',
-                        },
-                    )
+                        expected_arrival_time=_ci_time,
+                        reason=f'Auto-detected late check-in ({round(_mins_late)} min late)',
+                        status='pending',
+                    ))
 
             # ── Early check-out ───────────────────────────────────────────────
-            if _ed_enabled and _att.check_out_time and _duty_end:
-                _co_local = _att.check_out_time.astimezone(_pytz.timezone('Asia/Kolkata'))
-                _co_time  = _co_local.time()
+            if _ed_enabled and _check_out and _duty_end and _user_id not in _has_early:
+                _co_time  = _check_out.astimezone(_ist).time()
                 _mins_early = _minutes_early(_co_time, _duty_end, _buffer_min)
                 if _mins_early > 0:
-                    EarlyDepartureRequest.objects.get_or_create(
-                        user=_att.user,
+                    _has_early.add(_user_id)
+                    _new_early.append(EarlyDepartureRequest(
+                        user_id=_user_id,
                         date=query_date,
                         admin_owner=admin,
-                        defaults={
-                            'expected_departure_time': _co_time,
-                            'reason': f'Auto-detected early check-out ({round(_mins_early)} min early)',
-                            'status': 'pending',
-                        },
-                    )
+                        expected_departure_time=_co_time,
+                        reason=f'Auto-detected early check-out ({round(_mins_early)} min early)',
+                        status='pending',
+                    ))
+
+        if _new_late:
+            LateArrivalRequest.objects.bulk_create(_new_late, ignore_conflicts=True)
+        if _new_early:
+            EarlyDepartureRequest.objects.bulk_create(_new_early, ignore_conflicts=True)
+        if _new_late or _new_early:
+            # bulk_create sends no post_save, so the cached request counters
+            # (attendance.stats.request_counts) must be dropped by hand — for
+            # the same admin_owner_id the post_save signal would use, which is
+            # None for a SUPER_ADMIN's unscoped rows.
+            from attendance.stats import invalidate_request_counts
+            _admin_owner_id = getattr(admin, 'pk', None)
+            transaction.on_commit(lambda: invalidate_request_counts(_admin_owner_id))
         # ─────────────────────────────────────────────────────────────────────
 
         # Fetch all late and early requests for this day (include pending so
-        # auto-detected violations are visible; exclude only rejected/cancelled).
-        late_day_qs  = LateArrivalRequest.objects.filter(
-            date=query_date, admin_owner=admin,
-        ).exclude(status__in=['rejected', 'cancelled']).select_related('user').order_by('date')
-        early_day_qs = EarlyDepartureRequest.objects.filter(
-            date=query_date, admin_owner=admin,
-        ).exclude(status__in=['rejected', 'cancelled']).select_related('user').order_by('date')
+        # auto-detected violations are visible; exclude only rejected/cancelled),
+        # grouped by user once.
+        late_by_user, early_by_user = {}, {}
+        for req in (
+            LateArrivalRequest.objects
+            .filter(date=query_date, admin_owner=admin)
+            .exclude(status__in=['rejected', 'cancelled'])
+            .order_by('date')
+        ):
+            late_by_user.setdefault(req.user_id, []).append(req)
+        for req in (
+            EarlyDepartureRequest.objects
+            .filter(date=query_date, admin_owner=admin)
+            .exclude(status__in=['rejected', 'cancelled'])
+            .order_by('date')
+        ):
+            early_by_user.setdefault(req.user_id, []).append(req)
 
         # Collect unique auth users who have a request today
-        auth_user_ids = set(
-            list(late_day_qs.values_list('user_id', flat=True)) +
-            list(early_day_qs.values_list('user_id', flat=True))
+        auth_user_ids = set(list(late_by_user) + list(early_by_user))
+
+        # Monthly violations + decisions for just those employees, in bulk
+        day_employees = [emp_by_user[uid] for uid in auth_user_ids if uid in emp_by_user]
+        monthly_scan = scanner.scan(day_employees, policy_data)
+
+        # Per-request deductions already applied, for every request shown today
+        _month_label = timezone.now().strftime('%b %Y')
+        all_ded_names = (
+            [f"Request Deduction - Late Arrival #{r.id} - {_month_label}"
+             for reqs in late_by_user.values() for r in reqs] +
+            [f"Request Deduction - Early Departure #{r.id} - {_month_label}"
+             for reqs in early_by_user.values() for r in reqs]
         )
+        existing_ded = set()
+        if day_employees and all_ded_names:
+            existing_ded = set(
+                Deduction.objects.filter(
+                    employee__in=[e.id for e in day_employees], year=year, month=month,
+                    deduction_name__in=all_ded_names,
+                ).values_list('employee_id', 'deduction_name')
+            )
+
+        grace_min  = int(la_policy.get('gracePeriodMin',  0))
+        buffer_min = int(ed_policy.get('earlyBufferMin',  0))
+        la_tiers   = la_policy.get('tiers', [])
+        ed_tiers   = ed_policy.get('tiers', [])
+        all_deduction_name = _policy_decision_name('Deduction', 'all', month, year)
 
         result = []
 
         for auth_uid in auth_user_ids:
-            try:
-                auth_u = AuthUser.objects.get(pk=auth_uid)
-            except AuthUser.DoesNotExist:
-                continue
-
-            employee = emp_by_email.get((auth_u.email or '').lower())
+            employee = emp_by_user.get(auth_uid)
             if not employee:
                 continue
 
-            duty_start, duty_end = _get_duty_times(employee, admin)
-
-            grace_min  = int(la_policy.get('gracePeriodMin',  0))
-            buffer_min = int(ed_policy.get('earlyBufferMin',  0))
-            la_tiers   = la_policy.get('tiers', [])
-            ed_tiers   = ed_policy.get('tiers', [])
+            emp_scan = monthly_scan[employee.id]
+            duty_start, duty_end = emp_scan['duty_start'], emp_scan['duty_end']
 
             # -- Today's requests for this employee --
-            emp_late  = [r for r in late_day_qs  if r.user_id == auth_uid]
-            emp_early = [r for r in early_day_qs if r.user_id == auth_uid]
+            emp_late  = late_by_user.get(auth_uid, [])
+            emp_early = early_by_user.get(auth_uid, [])
 
             late_items = []
             for req in emp_late:
@@ -1452,7 +1614,7 @@ class PayrollViewSet(ActivityLogMixin, viewsets.ModelViewSet):
                     'admin_notes':  req.admin_notes,
                     'tier_action':  act,
                     'is_waived':    req.status == 'waived',
-                    'is_deducted':  False,  # resolved below
+                    'is_deducted':  (employee.id, f"Request Deduction - Late Arrival #{req.id} - {_month_label}") in existing_ded,
                     'type':         'late',
                 })
 
@@ -1472,43 +1634,18 @@ class PayrollViewSet(ActivityLogMixin, viewsets.ModelViewSet):
                     'admin_notes':      req.admin_notes,
                     'tier_action':      act,
                     'is_waived':        req.status == 'waived',
-                    'is_deducted':      False,  # resolved below
+                    'is_deducted':      (employee.id, f"Request Deduction - Early Departure #{req.id} - {_month_label}") in existing_ded,
                     'type':             'early',
                 })
 
-            # Resolve per-request deduction status by checking Deduction table
-            _month_label = timezone.now().strftime('%b %Y')
-            late_ded_names  = [f"Request Deduction - Late Arrival #{r['id']} - {_month_label}" for r in late_items]
-            early_ded_names = [f"Request Deduction - Early Departure #{r['id']} - {_month_label}" for r in early_items]
-            all_ded_names = late_ded_names + early_ded_names
-            if all_ded_names:
-                existing_ded = set(
-                    Deduction.objects.filter(
-                        employee=employee, year=year, month=month,
-                        deduction_name__in=all_ded_names,
-                    ).values_list('deduction_name', flat=True)
-                )
-                for r in late_items:
-                    dn = f"Request Deduction - Late Arrival #{r['id']} - {_month_label}"
-                    if dn in existing_ded:
-                        r['is_deducted'] = True
-                for r in early_items:
-                    dn = f"Request Deduction - Early Departure #{r['id']} - {_month_label}"
-                    if dn in existing_ded:
-                        r['is_deducted'] = True
-
             # -- Monthly violation check (to know if policy threshold is breached) --
-            monthly_violations = _check_policy_violations(employee, year, month, policy_data, admin, total_days=_total_days_dv)
+            monthly_violations = emp_scan['violations']
 
             total_monthly_deduction = sum(v['deduction_amount'] for v in monthly_violations)
             policy_hit = any(v['billable_count'] > 0 and v['deduction_amount'] > 0 for v in monthly_violations)
 
-            # Check existing deduction/waiver decisions for this month
-            decision_names = set(
-                _policy_decision_qs(employee, year, month, admin)
-                .values_list('deduction_name', flat=True)
-            )
-            all_deduction_name = _policy_decision_name('Deduction', 'all', month, year)
+            # Existing deduction/waiver decisions for this month
+            decision_names = emp_scan['decision_names']
             for v in monthly_violations:
                 vtype = v.get('violation_type') or 'all'
                 ded_name  = _policy_decision_name('Deduction', vtype, month, year)
@@ -0,0 +1,163 @@
+"""
+task_hrms_backend/httpclient.py
+-------------------------------
+Shared outbound HTTP client.
+
+Module-level requests.get()/post() build a throw-away Session per call, so
+every license check and every WhatsApp message paid a fresh TCP + TLS
+handshake.  Calls made through here reuse one requests.Session per profile
+(per process): urllib3 keeps a keep-alive connection pool per host inside
+it, so messaging five admin numbers through the same provider opens one
+connection, not five.
+
+    from task_hrms_backend import httpclient
+
+    resp = httpclient.get('license', LICENSE_URL)
+    resp = httpclient.post('ultramsg', url, data={...})
+
+A profile sets the default timeout, the retry budget and the pool size:
+
+  * license  — GET only, idempotent: connect errors and 502/503/504 are
+               retried with backoff.
+  * whatsapp — sends are not idempotent (DXing even sends on GET): only
+               connection failures, where nothing reached the provider,
+               are retried.  Each provider key (dxing, ultramsg, waapi,
+               twilio, meta, wablas, custom) uses these settings unless
+               OUTBOUND_HTTP_PROFILES overrides it.
+
+An explicit timeout= still wins.  Every call's latency is logged at DEBUG
+(WARNING past SLOW_CALL_MS) and aggregated per (profile, host) in stats().
+
+settings.OUTBOUND_HTTP_PROFILES (JSON in the environment variable of the
+same name) may override any profile field, e.g.
+    {"meta": {"timeout": [3, 30]}, "license": {"status_retries": 0}}
+"""
+
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+SLOW_CALL_MS = 3000
+
+_BASE_PROFILES = {
+    'default': {
+        'timeout': (5, 15), 'connect_retries': 1, 'status_retries': 0,
+        'backoff': 0.3, 'pool_maxsize': 10,
+    },
+    'license': {
+        'timeout': (3.05, 10), 'connect_retries': 2, 'status_retries': 2,
+        'backoff': 0.5, 'pool_maxsize': 10,
+    },
+    'whatsapp': {
+        'timeout': (5, 15), 'connect_retries': 2, 'status_retries': 0,
+        'backoff': 0.3, 'pool_maxsize': 20,
+    },
+}
+
+WHATSAPP_PROVIDERS = ('dxing', 'ultramsg', 'waapi', 'twilio', 'meta', 'wablas', 'custom')
+
+_sessions = {}
+_sessions_pid = None
+_stats = {}
+_lock = threading.Lock()
+
+
+def profile(name):
+    """Effective settings of a profile (provider keys inherit from 'whatsapp')."""
+    base = 'whatsapp' if name in WHATSAPP_PROVIDERS else name
+    values = dict(_BASE_PROFILES.get(base, _BASE_PROFILES['default']))
+    overrides = getattr(settings, 'OUTBOUND_HTTP_PROFILES', {}) or {}
+    values.update(overrides.get(base, {}))
+    if base != name:
+        values.update(overrides.get(name, {}))
+    if isinstance(values['timeout'], list):     # JSON has no tuples
+        values['timeout'] = tuple(values['timeout'])
+    return values
+
+
+def _build_session(name):
+    cfg = profile(name)
+    retry = Retry(
+        total=cfg['connect_retries'] + cfg['status_retries'],
+        connect=cfg['connect_retries'],
+        read=0,
+        status=cfg['status_retries'],
+        status_forcelist=(502, 503, 504) if cfg['status_retries'] else (),
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        backoff_factor=cfg['backoff'],
+        raise_on_status=False,      # hand the last response back; callers check status_code
+    )
+    adapter = HTTPAdapter(
+        pool_connections=10,        # hosts kept per session
+        pool_maxsize=cfg['pool_maxsize'],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def session(name):
+    """This process's Session for a profile (rebuilt after a fork)."""
+    global _sessions_pid
+    pid = os.getpid()
+    with _lock:
+        if _sessions_pid != pid:
+            _sessions.clear()
+            _stats.clear()
+            _sessions_pid = pid
+        if name not in _sessions:
+            _sessions[name] = _build_session(name)
+        return _sessions[name]
+
+
+def _record(name, url, elapsed_ms, failed):
+    host = urlsplit(url).netloc
+    with _lock:
+        entry = _stats.setdefault((name, host), {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        entry['calls'] += 1
+        entry['errors'] += int(failed)
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+    level = logging.WARNING if elapsed_ms >= SLOW_CALL_MS else logging.DEBUG
+    logger.log(level, 'HTTP %s %s %.0f ms%s', name, host, elapsed_ms, ' (failed)' if failed else '')
+
+
+def request(name, method, url, **kwargs):
+    """requests.request() through the profile's pooled session."""
+    kwargs.setdefault('timeout', profile(name)['timeout'])
+    started = time.monotonic()
+    failed = True
+    try:
+        resp = session(name).request(method, url, **kwargs)
+        failed = resp.status_code >= 500
+        return resp
+    finally:
+        _record(name, url, (time.monotonic() - started) * 1000, failed)
+
+
+def get(name, url, **kwargs):
+    return request(name, 'GET', url, **kwargs)
+
+
+def post(name, url, **kwargs):
+    return request(name, 'POST', url, **kwargs)
+
+
+def stats():
+    """{(profile, host): {'calls', 'errors', 'total_ms', 'max_ms', 'avg_ms'}} for this process."""
+    with _lock:
+        return {
+            key: {**entry, 'avg_ms': entry['total_ms'] / entry['calls'] if entry['calls'] else 0.0}
+            for key, entry in _stats.items()
+        }
@@ -9,7 +9,9 @@ https://docs.djangoproject.com/en/6.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
+import json
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -81,6 +83,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'login.middleware.TenantMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -201,3 +204,83 @@ MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/'
 # but STORAGES will handle the actual uploads to R2.
 
 AUTH_USER_MODEL = 'login.User'
+
+# Shared face-inference server socket (see attendance/face/server.py).
+# Empty = run inference on a background thread of each web worker.
+FACE_SERVER_SOCKET = os.getenv('FACE_SERVER_SOCKET', os.path.join(tempfile.gettempdir(), 'task_hrms_face.sock'))
+# Start the face server from a web worker when none is running.
+FACE_SERVER_AUTOSTART = os.getenv('FACE_SERVER_AUTOSTART', 'true').lower() in ('1', 'true', 'yes')
+FACE_WORKER_BATCH_SIZE = int(os.getenv('FACE_WORKER_BATCH_SIZE', 8))
+FACE_WORKER_BATCH_WINDOW_MS = int(os.getenv('FACE_WORKER_BATCH_WINDOW_MS', 10))
+FACE_WORKER_TIMEOUT = int(os.getenv('FACE_WORKER_TIMEOUT', 60))
+# Load the face models at process start (set only on face-serving workers).
+FACE_WARMUP_ON_STARTUP = os.getenv('FACE_WARMUP_ON_STARTUP', '').lower() in ('1', 'true', 'yes')
+# Longest image side fed to RetinaFace/Facenet512 (see attendance/face/image.py).
+FACE_DETECTOR_MAX_SIDE = int(os.getenv('FACE_DETECTOR_MAX_SIDE', 640))
+
+# Buffered activity-log writer (see activitylog/writer.py).
+ACTIVITY_LOG_ASYNC = os.getenv('ACTIVITY_LOG_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+ACTIVITY_LOG_BATCH_SIZE = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', 200))
+ACTIVITY_LOG_FLUSH_INTERVAL_MS = int(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL_MS', 1000))
+ACTIVITY_LOG_QUEUE_SIZE = int(os.getenv('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+# JSON-lines file for batches that could not be written; empty = no spool.
+ACTIVITY_LOG_SPOOL_PATH = os.getenv('ACTIVITY_LOG_SPOOL_PATH') or None
+# Monthly partitions kept ahead, months kept in the database, and the
+# STORAGES alias archived months are written to (see activitylog/archive.py).
+ACTIVITY_LOG_PARTITIONS_AHEAD = int(os.getenv('ACTIVITY_LOG_PARTITIONS_AHEAD', 3))
+ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv('ACTIVITY_LOG_RETENTION_MONTHS', 24))
+ACTIVITY_LOG_ARCHIVE_STORAGE = os.getenv('ACTIVITY_LOG_ARCHIVE_STORAGE', 'default')
+# Seconds an archived month's rows stay cached for paging (files never change).
+ACTIVITY_LOG_ARCHIVE_CACHE_SECONDS = int(os.getenv('ACTIVITY_LOG_ARCHIVE_CACHE_SECONDS', 600))
+
+# WhatsApp notification outbox (see watsapp_config/outbox.py).
+WHATSAPP_OUTBOX_WORKERS = int(os.getenv('WHATSAPP_OUTBOX_WORKERS', 4))
+WHATSAPP_OUTBOX_BATCH_SIZE = int(os.getenv('WHATSAPP_OUTBOX_BATCH_SIZE', 50))
+WHATSAPP_OUTBOX_MAX_ATTEMPTS = int(os.getenv('WHATSAPP_OUTBOX_MAX_ATTEMPTS', 5))
+WHATSAPP_OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('WHATSAPP_OUTBOX_RETRY_BASE_SECONDS', 30))
+# Set false when `manage.py run_notification_outbox` / `run_whatsapp_broadcasts` deliver instead of the web workers.
+WHATSAPP_OUTBOX_INPROCESS = os.getenv('WHATSAPP_OUTBOX_INPROCESS', 'true').lower() in ('1', 'true', 'yes')
+# WhatsApp broadcasts (see watsapp_config/broadcast.py): concurrent provider
+# requests, and provider requests per second, per broadcast.
+WHATSAPP_BROADCAST_CONCURRENCY = int(os.getenv('WHATSAPP_BROADCAST_CONCURRENCY', 8))
+WHATSAPP_BROADCAST_RATE = float(os.getenv('WHATSAPP_BROADCAST_RATE', 20))
+# Record sends in memory instead of calling the provider (watsapp_config/fake.py).
+WHATSAPP_FAKE_PROVIDER = os.getenv('WHATSAPP_FAKE_PROVIDER', '').lower() in ('1', 'true', 'yes')
+
+# Outbound HTTP profile overrides as JSON, e.g. {"meta": {"timeout": [3, 30]}}
+# (see task_hrms_backend/httpclient.py).
+OUTBOUND_HTTP_PROFILES = json.loads(os.getenv('OUTBOUND_HTTP_PROFILES') or '{}')
+
+# License-server directory (see login/license_directory.py): seconds a copy is
+# fresh, seconds a stale copy is served while it refreshes, and the circuit
+# breaker (consecutive failures to open it, seconds before a trial request).
+LICENSE_DIRECTORY_FRESH_SECONDS = int(os.getenv('LICENSE_DIRECTORY_FRESH_SECONDS', 60))
+LICENSE_DIRECTORY_STALE_SECONDS = int(os.getenv('LICENSE_DIRECTORY_STALE_SECONDS', 3600))
+LICENSE_BREAKER_THRESHOLD = int(os.getenv('LICENSE_BREAKER_THRESHOLD', 3))
+LICENSE_BREAKER_RESET_SECONDS = int(os.getenv('LICENSE_BREAKER_RESET_SECONDS', 30))
+# Override the license-server endpoints (e.g. a local stub); empty = production URLs.
+LICENSE_CUSTOMERS_URL = os.getenv('LICENSE_CUSTOMERS_URL') or None
+LICENSE_CORPORATE_URL = os.getenv('LICENSE_CORPORATE_URL') or None
+
+# Cache: local memory per process by default; set REDIS_URL to share one
+# cache across all workers (tenant config, request counters).
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'task-hrms',
+        }
+    }
+# Seconds a cached tenant config item lives (see login/tenant_cache.py).
+TENANT_CONFIG_CACHE_TTL = int(os.getenv('TENANT_CONFIG_CACHE_TTL', 600))
+# Cap on those TTLs without REDIS_URL: a change is only invalidated in the
+# worker that made it, so the others must re-read within this many seconds.
+LOCAL_CACHE_MAX_TTL = int(os.getenv('LOCAL_CACHE_MAX_TTL', 5))
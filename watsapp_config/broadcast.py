@@ -0,0 +1,381 @@
+"""
+watsapp_config/broadcast.py
+---------------------------
+WhatsApp broadcasts: one purpose (announcement, payslip) sent to many
+employees of a tenant.
+
+send_whatsapp_message() sends one message per call and reads the tenant's
+WhatsAppConfig every time, so announcing to 1,000 employees meant 1,000
+sequential round trips.  A broadcast instead
+
+  * is stored up front — a WhatsAppBroadcast row plus one
+    WhatsAppBroadcastRecipient per phone number (duplicates dropped) — and
+    sent in the background, so the admin's request returns at once;
+  * loads the config once, and renders the template once per distinct
+    value of the fields the template actually uses (an announcement is
+    rendered once in total, a payslip once per employee);
+  * goes through the provider's bulk endpoint where it has one
+    (utils.BULK_LIMITS), and otherwise fans out over a pool of
+    WHATSAPP_BROADCAST_CONCURRENCY sender threads; either way at most
+    WHATSAPP_BROADCAST_RATE provider requests per second;
+  * refreshes its sent / failed counters after every chunk of recipients,
+    which the broadcast detail endpoint reports as progress.
+
+    from watsapp_config.broadcast import announcement_recipients, create_broadcast
+
+    create_broadcast(
+        admin, 'announcement', announcement_recipients(admin),
+        context={'title': 'Office closed', 'body': '…'}, created_by=request.user,
+    )
+
+Broadcasts run like the notification outbox: in-process
+(WHATSAPP_OUTBOX_INPROCESS) on a supervisor thread woken when the broadcast
+commits, or with `python manage.py run_whatsapp_broadcasts`.  A worker that
+dies mid-run leaves its remaining recipients pending, and the broadcast is
+picked up again once its lease expires.  Each recipient gets one attempt.
+
+Settings (all optional):
+    WHATSAPP_BROADCAST_CONCURRENCY — concurrent provider requests (default 8)
+    WHATSAPP_BROADCAST_RATE        — provider requests per second (default 20)
+"""
+
+import logging
+import os
+import string
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .outbox import OutboxSupervisor
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(minutes=5)
+# Recipients sent between two progress updates.
+CHUNK_SIZE = 200
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _stringify(context):
+    # Same rule as outbox.enqueue: the row must be JSON-serialisable.
+    return {key: str(value) for key, value in (context or {}).items()}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RECIPIENTS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _recipient(employee, **context):
+    name = f"{employee.first_name} {employee.last_name}".strip()
+    return {
+        'employee_user_id': employee.user_id,
+        'name':             name,
+        'phone':            employee.phone,
+        'context':          {'name': name, **context},
+    }
+
+
+def announcement_recipients(admin_owner, employee_ids=None):
+    """Recipients for every current employee of the tenant with a phone number."""
+    from employee_management.models import Employee
+    from employee_management.views import OFFBOARDED_STATUSES, USER_INACTIVE_STATUS
+
+    qs = (
+        Employee.objects
+        .filter(admin_owner=admin_owner)
+        .exclude(status__in=OFFBOARDED_STATUSES | {USER_INACTIVE_STATUS})
+        .exclude(phone='')
+    )
+    if employee_ids is not None:
+        qs = qs.filter(pk__in=employee_ids)
+    return [_recipient(emp) for emp in qs.order_by('id')]
+
+
+def payslip_recipients(admin_owner, year, month, employee_ids=None):
+    """Recipients for the processed or paid payrolls of a month, with their net pay."""
+    from payroll.models import Payroll
+
+    qs = (
+        Payroll.objects
+        .filter(admin_owner=admin_owner, year=year, month=month, status__in=('processed', 'paid'))
+        .exclude(employee__phone='')
+        .select_related('employee')
+    )
+    if employee_ids is not None:
+        qs = qs.filter(employee_id__in=employee_ids)
+    return [
+        _recipient(payroll.employee, net_pay=f"{payroll.net_salary:,.2f}")
+        for payroll in qs.order_by('employee_id')
+    ]
+
+
+def create_broadcast(admin_owner, purpose_key, recipients, context=None, created_by=None):
+    """
+    Store a broadcast and its recipients (dicts with phone, name,
+    employee_user_id, context) and start sending after the current
+    transaction commits.  Returns the WhatsAppBroadcast.
+    """
+    from .models import WhatsAppBroadcast, WhatsAppBroadcastRecipient
+    from .utils import _normalise_phone
+
+    rows, seen = [], set()
+    for recipient in recipients:
+        phone = _normalise_phone(recipient.get('phone') or '')
+        if not phone or phone in seen:
+            continue
+        seen.add(phone)
+        rows.append(WhatsAppBroadcastRecipient(
+            employee_user_id=recipient.get('employee_user_id'),
+            name=(recipient.get('name') or '')[:200],
+            phone=phone,
+            context=_stringify(recipient.get('context')),
+        ))
+
+    with transaction.atomic():
+        broadcast = WhatsAppBroadcast.objects.create(
+            admin_owner=admin_owner,
+            created_by=created_by,
+            purpose_key=purpose_key,
+            context=_stringify(context),
+            total=len(rows),
+        )
+        for row in rows:
+            row.broadcast = broadcast
+        WhatsAppBroadcastRecipient.objects.bulk_create(rows, batch_size=1000)
+
+    if _setting('WHATSAPP_OUTBOX_INPROCESS', True):
+        transaction.on_commit(lambda: get_runner().wake())
+    return broadcast
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RENDERING AND THROTTLING
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _Renderer:
+    """Renders a purpose's template once per distinct value of the fields it uses."""
+
+    def __init__(self, purpose_key, shared_context):
+        from .notify import DEFAULT_TEMPLATES
+
+        template = DEFAULT_TEMPLATES.get(purpose_key, '')
+        self.purpose_key = purpose_key
+        self.shared = shared_context or {}
+        self.fields = sorted({field for _, field, _, _ in string.Formatter().parse(template) if field})
+        self.messages = {}
+
+    def render(self, context):
+        from .notify import _build_message
+
+        merged = {**self.shared, **(context or {})}
+        used = {field: merged[field] for field in self.fields if field in merged}
+        key = tuple(sorted(used.items()))
+        if key not in self.messages:
+            self.messages[key] = _build_message(self.purpose_key, used)
+        return self.messages[key]
+
+
+class RateLimiter:
+    """Token bucket shared by a broadcast's sender threads: acquire() blocks until a request may go out."""
+
+    def __init__(self, rate):
+        self.rate = max(0.1, float(rate))
+        self.capacity = max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SENDING
+# ─────────────────────────────────────────────────────────────────────────────
+
+def claim_broadcast():
+    """Lock the oldest queued broadcast (or one whose worker's lease expired) for this worker."""
+    from django.db.models import Q
+    from .models import WhatsAppBroadcast
+
+    now = timezone.now()
+    with transaction.atomic():
+        broadcast = (
+            WhatsAppBroadcast.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='queued') | Q(status='running', locked_until__lt=now))
+            .order_by('created_at')
+            .first()
+        )
+        if broadcast is None:
+            return None
+        broadcast.status = 'running'
+        broadcast.locked_until = now + LEASE
+        broadcast.started_at = broadcast.started_at or now
+        broadcast.save(update_fields=['status', 'locked_until', 'started_at'])
+    return broadcast
+
+
+def _send_one(cfg, limiter, phone, message):
+    from .utils import send_with_config
+
+    limiter.acquire()
+    try:
+        return send_with_config(cfg, phone, message)
+    except Exception as exc:  # noqa: BLE001
+        return False, str(exc)
+
+
+def _send_bulk(cfg, limiter, items):
+    from .utils import send_bulk_with_config
+
+    limiter.acquire()
+    try:
+        return send_bulk_with_config(cfg, items)
+    except Exception as exc:  # noqa: BLE001
+        return [(False, str(exc))] * len(items)
+
+
+def _send_chunk(cfg, limiter, executor, items):
+    """(ok, error) for each (phone, message) of items, in order."""
+    from .utils import BULK_LIMITS, supports_bulk
+
+    if not supports_bulk(cfg):
+        futures = [executor.submit(_send_one, cfg, limiter, phone, message) for phone, message in items]
+        return [future.result() for future in futures]
+
+    size = BULK_LIMITS[cfg.provider]
+    futures = [
+        executor.submit(_send_bulk, cfg, limiter, items[start:start + size])
+        for start in range(0, len(items), size)
+    ]
+    return [result for future in futures for result in future.result()]
+
+
+def _update_progress(broadcast, **fields):
+    """Recount the recipients, renew the lease and save the counters (plus any extra fields)."""
+    from django.db.models import Count
+    from .models import WhatsAppBroadcast
+
+    counts = dict(
+        broadcast.recipients.values_list('status').annotate(n=Count('id')).order_by()
+    )
+    values = {
+        'sent_count':   counts.get('sent', 0),
+        'failed_count': counts.get('failed', 0),
+        'locked_until': timezone.now() + LEASE,
+        **fields,
+    }
+    for name, value in values.items():
+        setattr(broadcast, name, value)
+    WhatsAppBroadcast.objects.filter(pk=broadcast.pk).update(**values)
+
+
+def run_broadcast(broadcast, executor):
+    """Send every pending recipient of a claimed broadcast.  Returns the number of messages sent."""
+    from .models import WhatsAppBroadcastRecipient, WhatsAppConfig
+
+    cfg = (
+        WhatsAppConfig.objects
+        .filter(admin_owner_id=broadcast.admin_owner_id, is_active=True)
+        .order_by('id')
+        .first()
+    )
+    if cfg is None or not cfg.instance_id.strip() or not cfg.api_token.strip():
+        error = (
+            'WhatsApp not configured or not active for this tenant.' if cfg is None
+            else 'WhatsApp credentials are incomplete.'
+        )
+        broadcast.recipients.filter(status='pending').update(status='failed', error=error)
+        _update_progress(
+            broadcast, status='failed', last_error=error,
+            locked_until=None, completed_at=timezone.now(),
+        )
+        return 0
+
+    renderer = _Renderer(broadcast.purpose_key, broadcast.context)
+    limiter = RateLimiter(_setting('WHATSAPP_BROADCAST_RATE', 20))
+    sent = 0
+    last_error = ''
+    while True:
+        chunk = list(broadcast.recipients.filter(status='pending').order_by('id')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        items = [(row.phone, renderer.render(row.context)) for row in chunk]
+        results = _send_chunk(cfg, limiter, executor, items)
+
+        now = timezone.now()
+        for row, (ok, err) in zip(chunk, results):
+            row.status = 'sent' if ok else 'failed'
+            row.error = err or ''
+            row.sent_at = now if ok else None
+            if ok:
+                sent += 1
+            else:
+                last_error = row.error
+        WhatsAppBroadcastRecipient.objects.bulk_update(chunk, ['status', 'error', 'sent_at'])
+        _update_progress(broadcast)
+
+    _update_progress(
+        broadcast, status='completed', last_error=last_error,
+        locked_until=None, completed_at=timezone.now(),
+    )
+    logger.info(
+        "WA broadcast %s [%s]: %d sent, %d failed, %d message(s) rendered",
+        broadcast.pk, broadcast.purpose_key, broadcast.sent_count,
+        broadcast.failed_count, len(renderer.messages),
+    )
+    return sent
+
+
+def drain_broadcasts(executor):
+    """Run claimable broadcasts until none are left.  Returns the number of messages sent."""
+    sent = 0
+    while True:
+        close_old_connections()
+        broadcast = claim_broadcast()
+        if broadcast is None:
+            return sent
+        try:
+            sent += run_broadcast(broadcast, executor)
+        except Exception:  # noqa: BLE001
+            # Still leased; resumed from its pending recipients once the lease expires.
+            logger.exception("WA broadcast %s failed", broadcast.pk)
+            return sent
+
+
+_runner      = None
+_runner_pid  = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    """This process's broadcast supervisor, started on first use (again after a fork)."""
+    global _runner, _runner_pid
+    pid = os.getpid()
+    if _runner is None or _runner_pid != pid:
+        with _runner_lock:
+            if _runner is None or _runner_pid != pid:
+                _runner = OutboxSupervisor(
+                    workers=_setting('WHATSAPP_BROADCAST_CONCURRENCY', 8),
+                    target=drain_broadcasts,
+                    name='wa-broadcast',
+                )
+                _runner_pid = pid
+    return _runner
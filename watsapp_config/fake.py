@@ -0,0 +1,47 @@
+"""
+watsapp_config/fake.py
+----------------------
+In-process stand-in for the WhatsApp providers, enabled with
+settings.WHATSAPP_FAKE_PROVIDER = True (tests, local development, load
+tests of the notification outbox).  Nothing goes over the network.
+
+    from watsapp_config import fake
+
+    fake.reset()
+    fake.fail_phones.add('919800000000')    # that number now fails
+    ...
+    assert fake.sent[0]['phone'] == '919876543210'
+"""
+
+import threading
+import time
+
+sent = []           # [{'admin_owner_id', 'provider', 'phone', 'message', 'at'}]
+fail_phones = set() # normalised numbers whose sends fail
+latency = 0.0       # seconds each send sleeps, to mimic a provider round-trip
+
+_lock = threading.Lock()
+
+
+def reset():
+    global latency
+    with _lock:
+        sent.clear()
+        fail_phones.clear()
+        latency = 0.0
+
+
+def send(cfg, phone: str, message: str) -> tuple[bool, str | None]:
+    if latency:
+        time.sleep(latency)
+    if phone in fail_phones:
+        return False, f"Fake provider rejected {phone}."
+    with _lock:
+        sent.append({
+            'admin_owner_id': cfg.admin_owner_id,
+            'provider':       cfg.provider,
+            'phone':          phone,
+            'message':        message,
+            'at':             time.time(),
+        })
+    return True, None
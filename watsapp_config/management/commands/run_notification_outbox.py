@@ -0,0 +1,28 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from watsapp_config import outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued WhatsApp notifications with a fixed-size pool of sender threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'WHATSAPP_OUTBOX_WORKERS', 4))
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'WHATSAPP_OUTBOX_BATCH_SIZE', 50))
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds to sleep when the outbox is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain what is due and exit.')
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=max(1, options['workers']),
+                                thread_name_prefix='wa-outbox-send') as executor:
+            while True:
+                sent = outbox.drain(executor, batch_size=max(1, options['batch_size']))
+                if sent:
+                    self.stdout.write(f'Sent {sent} message(s).')
+                if options['once']:
+                    return
+                time.sleep(max(0.1, options['poll']))
@@ -0,0 +1,27 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from watsapp_config import broadcast
+
+
+class Command(BaseCommand):
+    help = 'Send queued WhatsApp broadcasts (announcements, payslips) with a pool of sender threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'WHATSAPP_BROADCAST_CONCURRENCY', 8))
+        parser.add_argument('--poll', type=float, default=5.0, help='Seconds to sleep when nothing is queued.')
+        parser.add_argument('--once', action='store_true', help='Send what is queued and exit.')
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=max(1, options['workers']),
+                                thread_name_prefix='wa-broadcast-send') as executor:
+            while True:
+                sent = broadcast.drain_broadcasts(executor)
+                if sent:
+                    self.stdout.write(f'Sent {sent} broadcast message(s).')
+                if options['once']:
+                    return
+                time.sleep(max(0.1, options['poll']))
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
@@ -87,4 +88,159 @@ class WhatsAppNotificationPurpose(models.Model):
         unique_together = [('key', 'admin_owner')]
 
     def __str__(self):
-        return self.label
\ No newline at end of file
+        return self.label
+
+class NotificationOutbox(models.Model):
+    """
+    One WhatsApp notification event, written in the request's transaction
+    by notify.send_notification() and delivered by the outbox workers
+    (watsapp_config/outbox.py).  Recipients are resolved by the worker and
+    tracked one by one in `deliveries`, so a retry only re-sends the ones
+    that failed.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent',    'Sent'),
+        ('failed',  'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+
+    admin_owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='whatsapp_outbox',
+    )
+    purpose_key   = models.CharField(max_length=50)
+    employee_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='whatsapp_notifications',
+    )
+    context = models.JSONField(default=dict, blank=True)
+
+    status          = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts        = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until    = models.DateTimeField(null=True, blank=True)
+    # [{'to': 'employee'|'admin', 'name', 'phone', 'ok', 'error', 'latency_ms', 'at'}]
+    deliveries = models.JSONField(default=list, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at   = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Enqueue → last delivery, in milliseconds.
+    latency_ms   = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'WhatsApp Notification'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                name='wa_outbox_due_idx',
+                condition=models.Q(status__in=['pending', 'sending']),
+            ),
+            models.Index(fields=['admin_owner', '-created_at'], name='wa_outbox_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.purpose_key} → {self.status}"
+
+
+class WhatsAppBroadcast(models.Model):
+    """
+    One message to many employees (announcement, payslips), created by
+    broadcast.create_broadcast() and sent in the background by
+    watsapp_config/broadcast.py.  The counters are refreshed while it runs,
+    so the admin can poll progress.
+    """
+
+    STATUS_CHOICES = [
+        ('queued',    'Queued'),
+        ('running',   'Running'),
+        ('completed', 'Completed'),
+        ('failed',    'Failed'),
+    ]
+
+    admin_owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='whatsapp_broadcasts',
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    purpose_key = models.CharField(max_length=50)
+    # Template variables shared by every recipient (title, body, month…).
+    context = models.JSONField(default=dict, blank=True)
+
+    status       = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    total        = models.PositiveIntegerField(default=0)
+    sent_count   = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_error   = models.TextField(blank=True)
+
+    created_at   = models.DateTimeField(auto_now_add=True)
+    started_at   = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'WhatsApp Broadcast'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['admin_owner', '-created_at'], name='wa_broadcast_owner_idx'),
+            models.Index(
+                fields=['created_at'],
+                name='wa_broadcast_due_idx',
+                condition=models.Q(status__in=['queued', 'running']),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.purpose_key} broadcast → {self.status} ({self.sent_count}/{self.total})"
+
+
+class WhatsAppBroadcastRecipient(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent',    'Sent'),
+        ('failed',  'Failed'),
+    ]
+
+    broadcast = models.ForeignKey(
+        WhatsAppBroadcast,
+        on_delete=models.CASCADE,
+        related_name='recipients',
+    )
+    employee_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    name  = models.CharField(max_length=200, blank=True)
+    phone = models.CharField(max_length=20)
+    # Per-recipient template variables (name, net_pay…), merged over the broadcast's.
+    context = models.JSONField(default=dict, blank=True)
+
+    status  = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error   = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['broadcast', 'status'], name='wa_broadcast_rcpt_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name or self.phone} → {self.status}"
@@ -19,12 +19,13 @@ Usage (from attendance/views.py or any other app):
     )
 
 Everything is fire-and-forget.  Failures are logged but never raised.
+The event is written to the NotificationOutbox in the caller's transaction
+and delivered by the outbox workers (see watsapp_config/outbox.py).
 """
 
 import logging
-import threading
 
-from .utils import send_whatsapp_message
+from . import outbox
 
 logger = logging.getLogger(__name__)
 
@@ -194,27 +195,6 @@ PURPOSE_DEFAULTS = {
 }
 
 
-def _get_employee_phone(employee_user) -> str | None:
-    """
-    Try to find a WhatsApp-capable phone number for the employee.
-    First checks Employee profile (employee_management.Employee),
-    then falls back to the User model's phone field if present.
-    """
-    try:
-        from employee_management.models import Employee
-        emp = Employee.objects.filter(admin_owner=employee_user.admin_owner).filter(
-            email=employee_user.email
-        ).first()
-        if emp and emp.phone:
-            return emp.phone.strip()
-    except Exception:  # noqa: BLE001
-        pass
-
-    # Fallback: some custom User models store phone directly
-    phone = getattr(employee_user, 'phone', None) or getattr(employee_user, 'mobile', None)
-    return str(phone).strip() if phone else None
-
-
 def _build_message(purpose_key: str, context: dict) -> str:
     """Render the template for *purpose_key* with *context* substitution.
     Missing placeholders are left as-is rather than raising KeyError."""
@@ -225,86 +205,12 @@ def _build_message(purpose_key: str, context: dict) -> str:
     return template.format_map(safe_ctx)
 
 
-def _dispatch(admin_owner, purpose_key: str, employee_user, context: dict):
-    """
-    Core dispatcher (runs in a background thread).
-
-    Behaviour:
-    - If a WhatsAppNotificationPurpose row exists AND enabled=False  → skip silently.
-    - If a row exists AND enabled=True                               → honour send_to_employee / send_to_admin flags.
-    - If NO row exists at all                                        → default to send_to_employee=True,
-                                                                       so events fire even before the admin
-                                                                       visits the Notification Setup tab.
-    """
-    from .models import WhatsAppNotificationPurpose, WhatsAppAdminNumber
-
-    try:
-        purpose = WhatsAppNotificationPurpose.objects.filter(
-            admin_owner=admin_owner,
-            key=purpose_key,
-        ).first()
-
-        # Explicitly disabled by the admin — respect that and stop here.
-        if purpose is not None and not purpose.enabled:
-            return
-
-        # Determine send flags: use DB values if a row exists, else PURPOSE_DEFAULTS,
-        # else fall back to employee-only.
-        _def = PURPOSE_DEFAULTS.get(purpose_key, {'send_to_employee': True, 'send_to_admin': False})
-        send_to_employee = purpose.send_to_employee if purpose is not None else _def['send_to_employee']
-        send_to_admin    = purpose.send_to_admin    if purpose is not None else _def['send_to_admin']
-
-        message = _build_message(purpose_key, context)
-
-        # ── Send to employee ──────────────────────────────────────────────────
-        if send_to_employee and employee_user:
-            phone = _get_employee_phone(employee_user)
-            if phone:
-                ok, err = send_whatsapp_message(admin_owner, phone, message)
-                if not ok:
-                    logger.warning(
-                        "WA notify [%s] → employee %s (%s): %s",
-                        purpose_key, employee_user.pk, phone, err,
-                    )
-            else:
-                logger.debug(
-                    "WA notify [%s]: no phone for employee %s — skipped",
-                    purpose_key, employee_user.pk,
-                )
-
-        # ── Send to admin numbers ─────────────────────────────────────────────
-        if send_to_admin:
-            admin_nums = WhatsAppAdminNumber.objects.filter(
-                admin_owner=admin_owner,
-                active=True,
-            )
-            for admin_num in admin_nums:
-                if not admin_num.phone:
-                    continue
-
-                # If the admin number has NO purposes configured at all, send
-                # everything (act as a catch-all number).
-                # If purposes ARE configured, only send for subscribed keys.
-                subscribed = admin_num.purposes or []
-                if subscribed and purpose_key not in subscribed:
-                    continue
-
-                ok, err = send_whatsapp_message(admin_owner, admin_num.phone, message)
-                if not ok:
-                    logger.warning(
-                        "WA notify [%s] → admin '%s' (%s): %s",
-                        purpose_key, admin_num.name, admin_num.phone, err,
-                    )
-
-    except Exception as exc:  # noqa: BLE001
-        logger.exception("WA notify [%s] unexpected error: %s", purpose_key, exc)
-
-
 def send_notification(admin_owner, purpose_key: str, employee_user=None, context: dict = None):
     """
     Fire-and-forget WhatsApp notification.
 
-    Runs in a daemon thread so it never blocks the HTTP response.
+    Queues the event in the NotificationOutbox (one INSERT, sent after the
+    current transaction commits) so it never blocks the HTTP response.
 
     Args:
         admin_owner:    The tenant's admin User (or None for SUPER_ADMIN scope).
@@ -315,9 +221,7 @@ def send_notification(admin_owner, purpose_key: str, employee_user=None, context
     if admin_owner is None:
         return  # SUPER_ADMIN actions don't map to a single tenant config
 
-    t = threading.Thread(
-        target=_dispatch,
-        args=(admin_owner, purpose_key, employee_user, context or {}),
-        daemon=True,
-    )
-    t.start()
+    try:
+        outbox.enqueue(admin_owner, purpose_key, employee_user, context)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("WA notify [%s] could not be queued: %s", purpose_key, exc)
@@ -0,0 +1,366 @@
+"""
+watsapp_config/outbox.py
+------------------------
+Durable delivery of WhatsApp notifications.
+
+send_notification() used to start a new daemon thread per event, and each
+thread re-read the purpose, the employee, the tenant's WhatsAppConfig (once
+per recipient) and the admin numbers.  A morning punch rush meant hundreds
+of threads, and anything in flight was lost when the worker restarted.
+
+Now:
+
+  * enqueue() INSERTs a NotificationOutbox row in the caller's transaction
+    (a rolled-back action sends nothing; a committed one is never lost).
+  * Workers claim due rows in batches (SELECT … FOR UPDATE SKIP LOCKED, with
+    a lease so a crashed worker's rows are picked up again), load every
+    tenant's config, purposes, admin numbers and employee phones once per
+    batch, and send on a fixed-size thread pool.
+  * Each recipient's result and latency is recorded in `deliveries`; failed
+    recipients are retried with exponential backoff until
+    WHATSAPP_OUTBOX_MAX_ATTEMPTS, then the row is marked failed.
+
+Workers run either
+
+  * in-process (WHATSAPP_OUTBOX_INPROCESS, the default): one supervisor
+    thread per web worker, woken when an enqueuing transaction commits; or
+  * as `python manage.py run_notification_outbox` — set
+    WHATSAPP_OUTBOX_INPROCESS=false on the web workers then.
+
+Both may run at once; row locks keep a notification from being sent twice.
+
+Settings (all optional):
+    WHATSAPP_OUTBOX_WORKERS             — concurrent sends (default 4)
+    WHATSAPP_OUTBOX_BATCH_SIZE          — rows claimed at a time (default 50)
+    WHATSAPP_OUTBOX_MAX_ATTEMPTS        — before giving up (default 5)
+    WHATSAPP_OUTBOX_RETRY_BASE_SECONDS  — first retry delay, doubled each time (default 30)
+    WHATSAPP_OUTBOX_INPROCESS           — run the supervisor in web workers (default True);
+                                          also covers broadcasts (broadcast.py)
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(minutes=5)
+MAX_RETRY_DELAY = timedelta(hours=1)
+POLL_SECONDS = 30
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(admin_owner, purpose_key, employee_user=None, context=None):
+    """Queue one notification event; it is sent after the current transaction commits."""
+    from .models import NotificationOutbox
+
+    # Stringify now: the template would str() every value anyway, and the
+    # row must be JSON-serialisable (Decimals, dates).
+    context = {key: str(value) for key, value in (context or {}).items()}
+    # Savepoint: callers swallow enqueue errors, and a failed INSERT must
+    # not leave their surrounding transaction unusable.
+    with transaction.atomic():
+        entry = NotificationOutbox.objects.create(
+            admin_owner=admin_owner,
+            purpose_key=purpose_key,
+            employee_user=employee_user,
+            context=context,
+        )
+    if _setting('WHATSAPP_OUTBOX_INPROCESS', True):
+        transaction.on_commit(lambda: get_supervisor().wake())
+    return entry
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLAIM
+# ─────────────────────────────────────────────────────────────────────────────
+
+def claim_batch(limit):
+    """
+    Lock up to `limit` due rows for this worker and return them.  Rows of a
+    worker that died mid-send (lease expired) are due again.
+    """
+    from django.db.models import Q
+    from .models import NotificationOutbox
+
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(
+                Q(status='pending', next_attempt_at__lte=now)
+                | Q(status='sending', locked_until__lt=now)
+            )
+            .select_related('employee_user')
+            .order_by('next_attempt_at')[:limit]
+        )
+        if rows:
+            NotificationOutbox.objects.filter(pk__in=[r.pk for r in rows]).update(
+                status='sending', locked_until=now + LEASE,
+            )
+    return rows
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BATCH CONTEXT
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _TenantData:
+    """Config, purposes and admin numbers for the tenants of one batch (three queries)."""
+
+    def __init__(self, admin_owner_ids):
+        from .models import WhatsAppAdminNumber, WhatsAppConfig, WhatsAppNotificationPurpose
+
+        self.configs = {}
+        for cfg in WhatsAppConfig.objects.filter(
+            admin_owner_id__in=admin_owner_ids, is_active=True,
+        ).order_by('id'):
+            self.configs.setdefault(cfg.admin_owner_id, cfg)
+
+        self.purposes = {
+            (p.admin_owner_id, p.key): p
+            for p in WhatsAppNotificationPurpose.objects.filter(admin_owner_id__in=admin_owner_ids)
+        }
+
+        self.admin_numbers = {}
+        for num in WhatsAppAdminNumber.objects.filter(
+            admin_owner_id__in=admin_owner_ids, active=True,
+        ).order_by('id'):
+            self.admin_numbers.setdefault(num.admin_owner_id, []).append(num)
+
+
+def _employee_phones(rows):
+    """{user_id: phone} for the employee users of rows (one query per tenant)."""
+    from employee_management.identity import employees_for_users
+
+    by_tenant = {}
+    for row in rows:
+        user = row.employee_user
+        if user is not None:
+            by_tenant.setdefault(user.admin_owner_id, set()).add(user.pk)
+
+    employees = {}
+    for tenant_id, user_ids in by_tenant.items():
+        for user_id, emp in employees_for_users(user_ids, admin_owner=tenant_id).items():
+            employees[user_id] = emp
+
+    phones = {}
+    for row in rows:
+        user = row.employee_user
+        if user is None or user.pk in phones:
+            continue
+        emp = employees.get(user.pk)
+        phone = emp.phone.strip() if emp and emp.phone else None
+        if not phone:
+            # Fallback: some custom User models store phone directly
+            phone = getattr(user, 'phone', None) or getattr(user, 'mobile', None)
+            phone = str(phone).strip() if phone else None
+        phones[user.pk] = phone
+    return phones
+
+
+def _recipients(row, tenants, phones):
+    """
+    The deliveries of a new event, or (None, reason) when it is not sent —
+    the rules of the old notify._dispatch.
+    """
+    from .notify import PURPOSE_DEFAULTS
+
+    purpose = tenants.purposes.get((row.admin_owner_id, row.purpose_key))
+    if purpose is not None and not purpose.enabled:
+        return None, 'Purpose disabled.'
+
+    defaults = PURPOSE_DEFAULTS.get(row.purpose_key, {'send_to_employee': True, 'send_to_admin': False})
+    send_to_employee = purpose.send_to_employee if purpose is not None else defaults['send_to_employee']
+    send_to_admin    = purpose.send_to_admin    if purpose is not None else defaults['send_to_admin']
+
+    deliveries = []
+    if send_to_employee and row.employee_user_id:
+        phone = phones.get(row.employee_user_id)
+        if phone:
+            deliveries.append({'to': 'employee', 'name': '', 'phone': phone})
+        else:
+            logger.debug(
+                "WA notify [%s]: no phone for employee %s — skipped",
+                row.purpose_key, row.employee_user_id,
+            )
+
+    if send_to_admin:
+        for admin_num in tenants.admin_numbers.get(row.admin_owner_id, []):
+            if not admin_num.phone:
+                continue
+            # No purposes configured = catch-all number.
+            subscribed = admin_num.purposes or []
+            if subscribed and row.purpose_key not in subscribed:
+                continue
+            deliveries.append({'to': 'admin', 'name': admin_num.name, 'phone': admin_num.phone})
+
+    if not deliveries:
+        return None, 'No recipients.'
+    return deliveries, None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PROCESS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _send(cfg, delivery, message):
+    from .utils import send_with_config
+
+    started = time.monotonic()
+    try:
+        ok, err = send_with_config(cfg, delivery['phone'], message)
+    except Exception as exc:  # noqa: BLE001
+        ok, err = False, str(exc)
+    return ok, err, int((time.monotonic() - started) * 1000)
+
+
+def process_batch(rows, executor):
+    """Resolve, send and record one claimed batch.  Returns the number of messages sent."""
+    from .models import NotificationOutbox
+    from .notify import _build_message
+
+    if not rows:
+        return 0
+    tenants = _TenantData({row.admin_owner_id for row in rows})
+    phones = _employee_phones([row for row in rows if not row.deliveries])
+    now = timezone.now()
+
+    jobs = []   # (row, delivery, future)
+    for row in rows:
+        row.attempts += 1
+        if not row.deliveries:
+            deliveries, reason = _recipients(row, tenants, phones)
+            if deliveries is None:
+                row.status, row.last_error = 'skipped', reason
+                continue
+            row.deliveries = deliveries
+
+        cfg = tenants.configs.get(row.admin_owner_id)
+        if cfg is None or not cfg.instance_id.strip() or not cfg.api_token.strip():
+            row.status = 'skipped'
+            row.last_error = (
+                'WhatsApp not configured or not active for this tenant.' if cfg is None
+                else 'WhatsApp credentials are incomplete.'
+            )
+            continue
+
+        message = _build_message(row.purpose_key, row.context)
+        for delivery in row.deliveries:
+            if not delivery.get('ok'):
+                jobs.append((row, delivery, executor.submit(_send, cfg, delivery, message)))
+
+    sent = 0
+    for row, delivery, future in jobs:
+        ok, err, latency_ms = future.result()
+        delivery.update(ok=ok, error=err, latency_ms=latency_ms, at=timezone.now().isoformat())
+        if ok:
+            sent += 1
+        else:
+            row.last_error = err or ''
+            logger.warning(
+                "WA notify [%s] → %s %s (%s): %s",
+                row.purpose_key, delivery['to'], delivery['name'] or row.employee_user_id,
+                delivery['phone'], err,
+            )
+
+    max_attempts = _setting('WHATSAPP_OUTBOX_MAX_ATTEMPTS', 5)
+    base_delay = timedelta(seconds=_setting('WHATSAPP_OUTBOX_RETRY_BASE_SECONDS', 30))
+    done_at = timezone.now()
+    for row in rows:
+        row.locked_until = None
+        if row.status == 'skipped':
+            row.completed_at = now
+            continue
+        if all(d.get('ok') for d in row.deliveries):
+            row.status, row.last_error = 'sent', ''
+        elif row.attempts >= max_attempts:
+            row.status = 'failed'
+        else:
+            row.status = 'pending'
+            row.next_attempt_at = done_at + min(base_delay * 2 ** (row.attempts - 1), MAX_RETRY_DELAY)
+            continue
+        row.completed_at = done_at
+        row.latency_ms = int((done_at - row.created_at).total_seconds() * 1000)
+
+    NotificationOutbox.objects.bulk_update(rows, [
+        'status', 'attempts', 'next_attempt_at', 'locked_until', 'deliveries',
+        'last_error', 'completed_at', 'latency_ms',
+    ])
+    return sent
+
+
+def drain(executor, batch_size=None):
+    """Process due rows until none are left.  Returns the number of messages sent."""
+    batch_size = batch_size or _setting('WHATSAPP_OUTBOX_BATCH_SIZE', 50)
+    sent = 0
+    while True:
+        close_old_connections()
+        rows = claim_batch(batch_size)
+        if not rows:
+            return sent
+        try:
+            sent += process_batch(rows, executor)
+        except Exception:  # noqa: BLE001
+            # Leave the rows leased; they are retried once the lease expires.
+            logger.exception("WA outbox: batch of %d failed", len(rows))
+            return sent
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# IN-PROCESS SUPERVISOR
+# ─────────────────────────────────────────────────────────────────────────────
+
+class OutboxSupervisor:
+    """
+    One thread that drains the outbox when woken (and every POLL_SECONDS,
+    for retries).  `target` is the drain function, called with the sender
+    pool — broadcast.py runs its own supervisor over drain_broadcasts.
+    """
+
+    def __init__(self, workers=4, target=None, name='wa-outbox'):
+        self._target = target or drain
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f'{name}-send')
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f'{name}-supervisor', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def _loop(self):
+        while True:
+            self._wakeup.wait(POLL_SECONDS)
+            self._wakeup.clear()
+            try:
+                self._target(self._executor)
+            except Exception:  # noqa: BLE001
+                logger.exception("WA %s supervisor error", self._thread.name)
+
+
+_supervisor      = None
+_supervisor_pid  = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor():
+    """This process's OutboxSupervisor, started on first use (again after a fork)."""
+    global _supervisor, _supervisor_pid
+    pid = os.getpid()
+    if _supervisor is None or _supervisor_pid != pid:
+        with _supervisor_lock:
+            if _supervisor is None or _supervisor_pid != pid:
+                _supervisor = OutboxSupervisor(workers=_setting('WHATSAPP_OUTBOX_WORKERS', 4))
+                _supervisor_pid = pid
+    return _supervisor
@@ -1,5 +1,11 @@
 from rest_framework import serializers
-from .models import WhatsAppConfig, WhatsAppAdminNumber, WhatsAppNotificationPurpose
+from .models import (
+    WhatsAppConfig,
+    WhatsAppAdminNumber,
+    WhatsAppNotificationPurpose,
+    WhatsAppBroadcast,
+    WhatsAppBroadcastRecipient,
+)
 
 
 class WhatsAppConfigSerializer(serializers.ModelSerializer):
@@ -29,4 +35,32 @@ class WhatsAppNotificationPurposeSerializer(serializers.ModelSerializer):
         fields = ['id', 'key', 'label', 'icon', 'desc', 'enabled', 'send_to_employee', 'send_to_admin', 'admin_owner']
         extra_kwargs = {
             'admin_owner': {'write_only': True, 'required': False},
-        }
\ No newline at end of file
+        }
+
+class WhatsAppBroadcastSerializer(serializers.ModelSerializer):
+    pending  = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model  = WhatsAppBroadcast
+        fields = [
+            'id', 'purpose_key', 'context', 'status', 'total', 'sent_count',
+            'failed_count', 'pending', 'progress', 'last_error',
+            'created_by', 'created_at', 'started_at', 'completed_at',
+        ]
+        read_only_fields = fields
+
+    def get_pending(self, obj):
+        return max(0, obj.total - obj.sent_count - obj.failed_count)
+
+    def get_progress(self, obj):
+        """Percentage of recipients already attempted."""
+        if not obj.total:
+            return 100
+        return round(100 * (obj.sent_count + obj.failed_count) / obj.total)
+
+
+class WhatsAppBroadcastRecipientSerializer(serializers.ModelSerializer):
+    class Meta:
+        model  = WhatsAppBroadcastRecipient
+        fields = ['id', 'name', 'phone', 'status', 'error', 'sent_at']
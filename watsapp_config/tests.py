@@ -1,3 +1,176 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from employee_management.models import Employee
+from login.models import User
+
+from . import fake, outbox
+from .models import (
+    NotificationOutbox, WhatsAppAdminNumber, WhatsAppConfig, WhatsAppNotificationPurpose,
+)
+from .notify import send_notification
+
+
+class OutboxEnqueueTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', role='ADMIN', email='admin@example.com')
+
+    def test_enqueue_stores_stringified_context(self):
+        with self.captureOnCommitCallbacks():
+            send_notification(self.admin, 'leave_approved', self.admin, {'days': 2})
+
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.purpose_key, 'leave_approved')
+        self.assertEqual(entry.context, {'days': '2'})
+
+    def test_failed_enqueue_leaves_callers_transaction_usable(self):
+        with transaction.atomic():
+            with mock.patch.object(NotificationOutbox, '_do_insert', side_effect=IntegrityError('boom')), \
+                    self.assertLogs('watsapp_config.notify', level='ERROR'):
+                send_notification(self.admin, 'leave_approved', self.admin, {})
+            # Raised TransactionManagementError before enqueue used a savepoint.
+            self.assertEqual(User.objects.filter(pk=self.admin.pk).count(), 1)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+
+@override_settings(
+    WHATSAPP_FAKE_PROVIDER=True,
+    WHATSAPP_OUTBOX_INPROCESS=False,
+    WHATSAPP_OUTBOX_MAX_ATTEMPTS=3,
+    WHATSAPP_OUTBOX_RETRY_BASE_SECONDS=30,
+)
+class OutboxProcessTests(TestCase):
+    EMPLOYEE = '919800000001'
+    CATCH_ALL = '919800000002'
+    SUBSCRIBED = '919800000003'
+
+    def setUp(self):
+        fake.reset()
+        self.addCleanup(fake.reset)
+        self.admin = User.objects.create(username='admin', role='ADMIN', email='admin@example.com')
+        self.user = User.objects.create(
+            username='emp', role='USER', admin_owner=self.admin, email='emp@example.com',
+        )
+        Employee.objects.create(
+            admin_owner=self.admin, user=self.user, first_name='Emp', email=self.user.email,
+            phone=f'+{self.EMPLOYEE}', salary=Decimal('30000'), position='Staff',
+            employment_type='full', date_of_joining=date(2025, 1, 1),
+        )
+        WhatsAppConfig.objects.create(
+            admin_owner=self.admin, provider='ultramsg', instance_id='inst', api_token='token', is_active=True,
+        )
+        for name, phone, purposes, active in [
+            ('All', self.CATCH_ALL, [], True),
+            ('Punches', self.SUBSCRIBED, ['punch_in'], True),
+            ('Leave', '919800000004', ['leave_request'], True),
+            ('Former', '919800000005', [], False),
+        ]:
+            WhatsAppAdminNumber.objects.create(
+                admin_owner=self.admin, name=name, phone=phone, purposes=purposes, active=active,
+            )
+
+    def _enqueue(self, purpose_key='punch_in'):
+        return outbox.enqueue(self.admin, purpose_key, self.user, {'name': 'Emp', 'time': '09:00'})
+
+    def _drain(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return outbox.drain(executor)
+
+    def _drain_with_failures(self):
+        with self.assertLogs('watsapp_config.outbox', level='WARNING'):
+            return self._drain()
+
+    def _make_due(self):
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+
+    def _sent_phones(self):
+        return sorted(m['phone'] for m in fake.sent)
+
+    def test_sends_to_employee_and_subscribed_admin_numbers(self):
+        fake.latency = 0.01
+        entry = self._enqueue()
+
+        self.assertEqual(self._drain(), 3)
+
+        self.assertEqual(self._sent_phones(), [self.EMPLOYEE, self.CATCH_ALL, self.SUBSCRIBED])
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'sent')
+        self.assertEqual(entry.attempts, 1)
+        self.assertIsNotNone(entry.completed_at)
+        self.assertIsNotNone(entry.latency_ms)
+        self.assertEqual([d['to'] for d in entry.deliveries], ['employee', 'admin', 'admin'])
+        for delivery in entry.deliveries:
+            self.assertTrue(delivery['ok'])
+            self.assertGreaterEqual(delivery['latency_ms'], 10)
+
+    def test_disabled_purpose_is_skipped(self):
+        WhatsAppNotificationPurpose.objects.create(admin_owner=self.admin, key='punch_in', label='Punch in')
+        entry = self._enqueue()
+
+        self.assertEqual(self._drain(), 0)
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.last_error), ('skipped', 'Purpose disabled.'))
+        self.assertEqual(fake.sent, [])
+
+    def test_retries_resend_only_failed_recipients_with_backoff(self):
+        fake.fail_phones.add(self.CATCH_ALL)
+        entry = self._enqueue()
+
+        for attempt, delay in [(1, 30), (2, 60)]:
+            started = timezone.now()
+            self._drain_with_failures()
+            entry.refresh_from_db()
+            self.assertEqual((entry.status, entry.attempts), ('pending', attempt))
+            self.assertIn('Fake provider rejected', entry.last_error)
+            self.assertGreaterEqual(entry.next_attempt_at, started + timedelta(seconds=delay))
+            self.assertLess(entry.next_attempt_at, timezone.now() + timedelta(seconds=delay))
+            self.assertEqual(self._drain(), 0)     # not due yet
+            self._make_due()
+
+        fake.fail_phones.clear()
+        self.assertEqual(self._drain(), 1)
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts, entry.last_error), ('sent', 3, ''))
+        self.assertEqual(self._sent_phones(), [self.EMPLOYEE, self.CATCH_ALL, self.SUBSCRIBED])
+
+    def test_gives_up_after_max_attempts(self):
+        fake.fail_phones.add(self.EMPLOYEE)
+        entry = self._enqueue()
+
+        for _ in range(3):
+            self._drain_with_failures()
+            self._make_due()
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('failed', 3))
+        self.assertIn('Fake provider rejected', entry.last_error)
+        self.assertIsNotNone(entry.completed_at)
+        self.assertEqual(self._drain(), 0)
+        self.assertEqual(self._sent_phones(), [self.CATCH_ALL, self.SUBSCRIBED])
+
+    def test_rows_with_an_expired_lease_are_claimed_again(self):
+        now = timezone.now()
+        expired = self._enqueue()
+        leased = self._enqueue('leave_request')
+        NotificationOutbox.objects.filter(pk=expired.pk).update(
+            status='sending', locked_until=now - timedelta(seconds=1),
+        )
+        NotificationOutbox.objects.filter(pk=leased.pk).update(
+            status='sending', locked_until=now + timedelta(minutes=1),
+        )
+
+        self.assertEqual(self._drain(), 3)
+
+        expired.refresh_from_db()
+        leased.refresh_from_db()
+        self.assertEqual(expired.status, 'sent')
+        self.assertEqual((leased.status, leased.attempts), ('sending', 0))
@@ -1,9 +1,16 @@
 
 
 from django.urls import path
-from .views import WhatsAppConfigView, WhatsAppTestView
+from .views import (
+    WhatsAppConfigView,
+    WhatsAppTestView,
+    WhatsAppBroadcastView,
+    WhatsAppBroadcastDetailView,
+)
 
 urlpatterns = [
     path('config/', WhatsAppConfigView.as_view(), name='whatsapp-config'),
     path('test/',   WhatsAppTestView.as_view(),   name='whatsapp-test'),
+    path('broadcasts/',          WhatsAppBroadcastView.as_view(),       name='whatsapp-broadcasts'),
+    path('broadcasts/<int:pk>/', WhatsAppBroadcastDetailView.as_view(), name='whatsapp-broadcast-detail'),
 ]
\ No newline at end of file
@@ -17,10 +17,23 @@ Usage:
 Returns:
     (True, None)          – message sent successfully
     (False, error_string) – something went wrong
+
+send_with_config(cfg, phone, message) does the same with an already-loaded
+WhatsAppConfig (no query) — used by the notification outbox, which loads
+each tenant's config once per batch.
+
+send_bulk_with_config(cfg, items) sends many [(phone, message), …] through
+the provider's bulk endpoint (supports_bulk(cfg)); used by broadcasts.
+
+With settings.WHATSAPP_FAKE_PROVIDER on, nothing leaves the process: every
+send is recorded by watsapp_config.fake instead.
 """
 
 import logging
 import requests
+from django.conf import settings
+
+from task_hrms_backend import httpclient
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +65,25 @@ def send_whatsapp_message(admin_owner, phone: str, message: str) -> tuple[bool,
     if not cfg:
         return False, "WhatsApp not configured or not active for this tenant."
 
+    return send_with_config(cfg, phone, message)
+
+
+def send_with_config(cfg, phone: str, message: str) -> tuple[bool, str | None]:
+    """
+    Send *message* to *phone* through the provider of an active
+    WhatsAppConfig row.  Same return contract as send_whatsapp_message.
+    """
+    if not phone or not message:
+        return False, "Phone or message is empty."
+
+    phone = _normalise_phone(phone)
+    if not phone:
+        return False, "Phone number is blank after normalisation."
+
+    if getattr(settings, 'WHATSAPP_FAKE_PROVIDER', False):
+        from . import fake
+        return fake.send(cfg, phone, message)
+
     provider    = cfg.provider
     instance_id = cfg.instance_id.strip()
     api_token   = cfg.api_token.strip()
@@ -92,6 +124,60 @@ def send_whatsapp_message(admin_owner, phone: str, message: str) -> tuple[bool,
         return False, str(exc)
 
 
+# ── Bulk sends ───────────────────────────────────────────────────────────────
+# Providers whose API accepts many messages in one request, and the most
+# messages per request.  The others are sent one by one.
+BULK_LIMITS = {
+    'wablas': 100,
+}
+
+
+def supports_bulk(cfg) -> bool:
+    return cfg.provider in BULK_LIMITS
+
+
+def send_bulk_with_config(cfg, items) -> list[tuple[bool, str | None]]:
+    """
+    Send [(phone, message), …] (at most BULK_LIMITS[provider] items) in one
+    provider request.  Returns one (ok, error) per item, in order.
+    """
+    items = [(_normalise_phone(phone or ''), message) for phone, message in items]
+    results = [(False, "Phone or message is empty.") if not (phone and message) else None
+               for phone, message in items]
+    valid = [i for i, result in enumerate(results) if result is None]
+    if not valid:
+        return results
+
+    if getattr(settings, 'WHATSAPP_FAKE_PROVIDER', False):
+        from . import fake
+        for i in valid:
+            results[i] = fake.send(cfg, *items[i])
+        return results
+
+    instance_id = cfg.instance_id.strip()
+    api_token   = cfg.api_token.strip()
+    if not instance_id or not api_token:
+        outcome = (False, "WhatsApp credentials are incomplete.")
+    else:
+        try:
+            if cfg.provider == 'wablas':
+                outcome = _send_wablas_bulk(instance_id, api_token, [items[i] for i in valid])
+            else:
+                outcome = (False, f"Provider '{cfg.provider}' has no bulk endpoint.")
+        except requests.exceptions.ConnectionError as exc:
+            logger.warning("WhatsApp connection error (%s bulk): %s", cfg.provider, exc)
+            outcome = (False, f"Could not reach {cfg.provider} API.")
+        except requests.exceptions.Timeout as exc:
+            logger.warning("WhatsApp timeout (%s bulk): %s", cfg.provider, exc)
+            outcome = (False, f"{cfg.provider} API timed out.")
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("WhatsApp unexpected error (%s bulk): %s", cfg.provider, exc)
+            outcome = (False, str(exc))
+    for i in valid:
+        results[i] = outcome
+    return results
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Provider-specific senders
 # ─────────────────────────────────────────────────────────────────────────────
@@ -101,7 +187,8 @@ def _send_dxing(account: str, secret: str, phone: str, message: str, api_url: st
     DXing WhatsApp API
     GET {api_url}?secret=<api_token>&account=<instance_id>&recipient=<phone>&type=text&message=<msg>&priority=1
     """
-    resp = requests.get(
+    resp = httpclient.get(
+        'dxing',
         api_url,
         params={
             'secret':    secret,
@@ -111,7 +198,6 @@ def _send_dxing(account: str, secret: str, phone: str, message: str, api_url: st
             'message':   message,
             'priority':  '1',
         },
-        timeout=15,
     )
     if resp.status_code == 200:
         data = resp.json() if resp.content else {}
@@ -124,10 +210,10 @@ def _send_dxing(account: str, secret: str, phone: str, message: str, api_url: st
 def _send_ultramsg(instance_id: str, token: str, phone: str, message: str) -> tuple[bool, str | None]:
     """UltraMsg — POST /messages/chat"""
     url = f"https://api.ultramsg.com/{instance_id}/messages/chat"
-    resp = requests.post(
+    resp = httpclient.post(
+        'ultramsg',
         url,
         data={'token': token, 'to': phone, 'body': message},
-        timeout=15,
     )
     if resp.status_code == 200:
         return True, None
@@ -137,11 +223,11 @@ def _send_ultramsg(instance_id: str, token: str, phone: str, message: str) -> tu
 def _send_waapi(instance_id: str, api_key: str, phone: str, message: str) -> tuple[bool, str | None]:
     """WaAPI — POST /instances/{id}/client/action/send-message"""
     url = f"https://waapi.app/api/v1/instances/{instance_id}/client/action/send-message"
-    resp = requests.post(
+    resp = httpclient.post(
+        'waapi',
         url,
         headers={'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'},
         json={'chatId': f'{phone}@c.us', 'message': message},
-        timeout=15,
     )
     if resp.status_code in (200, 201):
         return True, None
@@ -161,7 +247,8 @@ def _send_twilio(account_sid: str, auth_token: str, sender: str, phone: str, mes
         sender = f'whatsapp:{sender}'
 
     url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
-    resp = requests.post(
+    resp = httpclient.post(
+        'twilio',
         url,
         auth=(account_sid, auth_token),
         data={
@@ -169,7 +256,6 @@ def _send_twilio(account_sid: str, auth_token: str, sender: str, phone: str, mes
             'To':   f'whatsapp:+{phone}',
             'Body': message,
         },
-        timeout=15,
     )
     if resp.status_code in (200, 201):
         return True, None
@@ -179,7 +265,8 @@ def _send_twilio(account_sid: str, auth_token: str, sender: str, phone: str, mes
 def _send_meta(phone_number_id: str, access_token: str, phone: str, message: str) -> tuple[bool, str | None]:
     """Meta Cloud API — POST /v18.0/{phone_number_id}/messages"""
     url = f"https://graph.facebook.com/v18.0/{phone_number_id}/messages"
-    resp = requests.post(
+    resp = httpclient.post(
+        'meta',
         url,
         headers={'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'},
         json={
@@ -188,7 +275,6 @@ def _send_meta(phone_number_id: str, access_token: str, phone: str, message: str
             'type': 'text',
             'text': {'body': message},
         },
-        timeout=15,
     )
     if resp.status_code in (200, 201):
         return True, None
@@ -198,11 +284,25 @@ def _send_meta(phone_number_id: str, access_token: str, phone: str, message: str
 def _send_wablas(domain: str, token: str, phone: str, message: str) -> tuple[bool, str | None]:
     """Wablas — POST {domain}/api/send-message"""
     url = f"{domain.rstrip('/')}/api/send-message"
-    resp = requests.post(
+    resp = httpclient.post(
+        'wablas',
         url,
         headers={'Authorization': token, 'Content-Type': 'application/json'},
         json={'phone': phone, 'message': message},
-        timeout=15,
+    )
+    if resp.status_code in (200, 201):
+        return True, None
+    return False, f"Wablas returned {resp.status_code}: {resp.text[:200]}"
+
+
+def _send_wablas_bulk(domain: str, token: str, items: list) -> tuple[bool, str | None]:
+    """Wablas — POST {domain}/api/v2/send-message with up to 100 messages"""
+    url = f"{domain.rstrip('/')}/api/v2/send-message"
+    resp = httpclient.post(
+        'wablas',
+        url,
+        headers={'Authorization': token, 'Content-Type': 'application/json'},
+        json={'data': [{'phone': phone, 'message': message} for phone, message in items]},
     )
     if resp.status_code in (200, 201):
         return True, None
@@ -217,7 +317,8 @@ def _send_custom(webhook_url: str, instance_id: str, api_key: str, phone: str, m
     if not webhook_url:
         return False, "Custom provider API URL is not configured."
 
-    resp = requests.post(
+    resp = httpclient.post(
+        'custom',
         webhook_url,
         headers={'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'},
         json={
@@ -226,7 +327,6 @@ def _send_custom(webhook_url: str, instance_id: str, api_key: str, phone: str, m
             'to':          phone,
             'message':     message,
         },
-        timeout=15,
     )
     if resp.status_code in (200, 201):
         return True, None
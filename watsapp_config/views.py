@@ -1,16 +1,22 @@
+import calendar
+
 import requests
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
-from .models import WhatsAppConfig, WhatsAppAdminNumber, WhatsAppNotificationPurpose
+from task_hrms_backend import httpclient
+from .models import WhatsAppConfig, WhatsAppAdminNumber, WhatsAppNotificationPurpose, WhatsAppBroadcast
 from .serializers import (
     WhatsAppConfigSerializer,
     WhatsAppAdminNumberSerializer,
     WhatsAppNotificationPurposeSerializer,
+    WhatsAppBroadcastSerializer,
+    WhatsAppBroadcastRecipientSerializer,
 )
 from activitylog.utils import log_activity
+from login.tenant import resolve_admin_owner
 
 
 def _is_admin(user):
@@ -23,11 +29,7 @@ def _get_admin_owner(user):
     """
     Return the ADMIN who owns the current request's tenant scope.
     """
-    if user.role == 'ADMIN' or getattr(user, 'is_admin_user', False):
-        return user if user.role == 'ADMIN' else user.admin_owner
-    if user.role == 'USER':
-        return user.admin_owner
-    return None  # SUPER_ADMIN
+    return resolve_admin_owner(user)
 
 
 class WhatsAppConfigView(APIView):
@@ -172,7 +174,8 @@ class WhatsAppTestView(APIView):
             if provider == 'dxing':
                 # DXing: instance_id = account, api_token = secret, webhook_url = API URL
                 api_url = config.get('webhook_url', '').strip() or 'https://app.dxing.in/api/send/whatsapp'
-                resp = requests.get(
+                resp = httpclient.get(
+                    'dxing',
                     api_url,
                     params={
                         'secret':    api_token,
@@ -200,7 +203,7 @@ class WhatsAppTestView(APIView):
 
             elif provider == 'ultramsg':
                 url  = f"https://api.ultramsg.com/{instance_id}/instance/status"
-                resp = requests.get(url, params={'token': api_token}, timeout=10)
+                resp = httpclient.get('ultramsg', url, params={'token': api_token}, timeout=10)
                 if resp.status_code == 200:
                     log_activity(
                         user=request.user,
@@ -217,7 +220,8 @@ class WhatsAppTestView(APIView):
 
             elif provider == 'waapi':
                 url  = f"https://waapi.app/api/v1/instances/{instance_id}/client/status"
-                resp = requests.get(
+                resp = httpclient.get(
+                    'waapi',
                     url,
                     headers={'Authorization': f'Bearer {api_token}'},
                     timeout=10,
@@ -251,7 +255,8 @@ class WhatsAppTestView(APIView):
 
             elif provider == 'meta':
                 url  = f"https://graph.facebook.com/v18.0/{instance_id}"
-                resp = requests.get(
+                resp = httpclient.get(
+                    'meta',
                     url,
                     params={'access_token': api_token},
                     timeout=10,
@@ -272,7 +277,8 @@ class WhatsAppTestView(APIView):
 
             elif provider == 'wablas':
                 url  = f"{instance_id.rstrip('/')}/api/device/info"
-                resp = requests.get(
+                resp = httpclient.get(
+                    'wablas',
                     url,
                     headers={'Authorization': api_token},
                     timeout=10,
@@ -315,4 +321,134 @@ class WhatsAppTestView(APIView):
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
-            )
\ No newline at end of file
+            )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BROADCASTS
+# ─────────────────────────────────────────────────────────────────────────────
+
+BROADCAST_PURPOSES = ('announcement', 'payslip')
+
+
+def _int_list(value):
+    if value in (None, ''):
+        return None
+    if not isinstance(value, (list, tuple)):
+        raise ValueError
+    return [int(v) for v in value]
+
+
+class WhatsAppBroadcastView(APIView):
+    """
+    GET  — the tenant's recent broadcasts with their progress.
+    POST — message every employee (or `employee_ids`) of the tenant:
+
+        {"purpose": "announcement", "announcement_id": 12}
+        {"purpose": "announcement", "title": "…", "body": "…"}
+        {"purpose": "payslip", "year": 2026, "month": 9}
+
+    Returns 202 with the queued broadcast; poll
+    /api/whatsapp/broadcasts/<id>/ for progress.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        admin = _get_admin_owner(request.user)
+        if not _is_admin(request.user) or admin is None:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        broadcasts = WhatsAppBroadcast.objects.filter(admin_owner=admin)[:50]
+        return Response(WhatsAppBroadcastSerializer(broadcasts, many=True).data)
+
+    def post(self, request):
+        from .broadcast import announcement_recipients, create_broadcast, payslip_recipients
+
+        user = request.user
+        admin = _get_admin_owner(user)
+        if not _is_admin(user) or admin is None:
+            return Response({'error': 'Only a tenant admin can send broadcasts'}, status=status.HTTP_403_FORBIDDEN)
+
+        data = request.data
+        purpose = data.get('purpose')
+        if purpose not in BROADCAST_PURPOSES:
+            return Response(
+                {'error': f"purpose must be one of: {', '.join(BROADCAST_PURPOSES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            employee_ids = _int_list(data.get('employee_ids'))
+        except (TypeError, ValueError):
+            return Response({'error': 'employee_ids must be a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not WhatsAppConfig.objects.filter(admin_owner=admin, is_active=True).exists():
+            return Response(
+                {'error': 'WhatsApp is not configured or not active for this tenant.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if purpose == 'announcement':
+            title, body = data.get('title', ''), data.get('body', '')
+            if data.get('announcement_id'):
+                from master.models import Announcement
+                announcement = Announcement.objects.filter(
+                    pk=data['announcement_id'], admin_owner=admin,
+                ).first()
+                if announcement is None:
+                    return Response({'error': 'Announcement not found'}, status=status.HTTP_404_NOT_FOUND)
+                title, body = announcement.title, announcement.body
+            if not title:
+                return Response({'error': 'title is required'}, status=status.HTTP_400_BAD_REQUEST)
+            context = {'title': title, 'body': body}
+            recipients = announcement_recipients(admin, employee_ids)
+            description = f"Broadcast announcement '{title}' on WhatsApp"
+        else:
+            try:
+                year, month = int(data.get('year')), int(data.get('month'))
+                if not 1 <= month <= 12:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return Response({'error': 'year and month are required'}, status=status.HTTP_400_BAD_REQUEST)
+            context = {'month': f"{calendar.month_name[month]} {year}"}
+            recipients = payslip_recipients(admin, year, month, employee_ids)
+            description = f"Broadcast payslips for {context['month']} on WhatsApp"
+
+        if not recipients:
+            return Response(
+                {'error': 'No recipients with a phone number.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        broadcast = create_broadcast(admin, purpose, recipients, context=context, created_by=user)
+        log_activity(
+            user=user,
+            action_type='OTHER',
+            module='WhatsApp Config',
+            description=f"{description} ({broadcast.total} recipients)",
+            request=request,
+        )
+        return Response(WhatsAppBroadcastSerializer(broadcast).data, status=status.HTTP_202_ACCEPTED)
+
+
+class WhatsAppBroadcastDetailView(APIView):
+    """Progress of one broadcast, with its failed recipients (`?failures=N`, default 100)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        admin = _get_admin_owner(request.user)
+        if not _is_admin(request.user) or admin is None:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        broadcast = WhatsAppBroadcast.objects.filter(pk=pk, admin_owner=admin).first()
+        if broadcast is None:
+            return Response({'error': 'Broadcast not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            limit = max(0, min(int(request.query_params.get('failures', 100)), 1000))
+        except ValueError:
+            limit = 100
+        failures = broadcast.recipients.filter(status='failed').order_by('id')[:limit]
+        return Response({
+            **WhatsAppBroadcastSerializer(broadcast).data,
+            'failures': WhatsAppBroadcastRecipientSerializer(failures, many=True).data,
+        })